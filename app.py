@@ -1,22 +1,52 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, make_response
-from flask_mail import Mail, Message
+from flask_mail import Mail
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from config import Config
-from models import db, User, Submission
+from models import db, User, Submission, SUBMISSION_STATUSES
+from cache import pricing_catalog, user_cache, cached_page
+from database import configure_engine
+from metrics import configure_metrics
+from compression import configure_compression
+from templating import configure_templates
+from ratelimit import rate_limited
+import stats
+import rollups
+import dedupe
+import groupcommit
 import os
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+if app.config['TRUSTED_PROXY_COUNT']:
+    # Take the client IP (used for rate limiting) from the proxy's X-Forwarded-For
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'],
+                            x_proto=app.config['TRUSTED_PROXY_COUNT'])
+
 # Initialize extensions
 db.init_app(app)
+configure_engine(app)
+configure_metrics(app)
+configure_compression(app)
+configure_templates(app)
 mail = Mail(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'admin_login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Ids are "<user id>:<credential version>"; older sessions carry just the id
+    user_id, _, version = user_id.partition(':')
+    try:
+        return user_cache.get(int(user_id), int(version or 0))
+    except ValueError:
+        return None
+
+# Fingerprinted static assets built by `flask collect-static`
+import assets
+app.add_template_global(assets.asset_url, 'asset_url')
+app.add_url_rule('/assets/<path:filename>', 'serve_asset', assets.serve_asset)
 
 # Context processor to inject current year into templates
 @app.context_processor
@@ -27,31 +57,24 @@ def inject_year():
 # --- Public Routes ---
 
 @app.route('/')
+@cached_page('index.html', 'base.html', ttl=3600)
 def index():
     return render_template('index.html')
 
 @app.route('/services')
+@cached_page('services.html', 'base.html', ttl=3600)
 def services():
     return render_template('services.html')
 
 @app.route('/pricing')
+@cached_page('pricing.html', 'base.html', ttl=600, pricing=True)
 def pricing():
-    from models import PricingPlan
-    import json
-    
-    plans = PricingPlan.query.order_by(PricingPlan.id).all()
-    
-    # Convert features JSON string to list for template
-    for plan in plans:
-        if plan.features:
-            plan.features_list = json.loads(plan.features)
-        else:
-            plan.features_list = []
-    
-    return render_template('pricing.html', plans=plans)
+    # Plans come pre-parsed (features_list included) from the per-worker catalog
+    return render_template('pricing.html', plans=pricing_catalog.plans(), pricing_version=pricing_catalog.version())
 
 
 @app.route('/contact', methods=['GET', 'POST'])
+@rate_limited('contact', 'RATELIMIT_CONTACT')
 def contact():
     if request.method == 'POST':
         try:
@@ -64,31 +87,35 @@ def contact():
             message = request.form.get('message')
             plan_selected = request.form.get('plan_selected')
             
+            # A repeat from the same email or number within the window is not a new lead
+            keys = dedupe.submission_keys(email, whatsapp_number)
+            mode = app.config['DEDUPE_MODE']
+            original = None
+            if mode in ('merge', 'flag'):
+                original = dedupe.find_recent_duplicate(keys['email_key'], keys['phone_key'],
+                                                        app.config['DEDUPE_WINDOW_HOURS'])
+            if original and mode == 'merge':
+                old_key = rollups.submission_key(original)
+                dedupe.merge_repeat(original, message, plan_selected)
+                rollups.record_move(old_key, rollups.submission_key(original))
+                db.session.commit()
+                return redirect(url_for('success'))
+            
             # Create new submission
-            new_submission = Submission(
+            values = dict(
                 full_name=full_name,
                 business_name=business_name,
                 email=email,
                 whatsapp_number=whatsapp_number,
                 country=country,
                 message=message,
-                plan_selected=plan_selected
+                plan_selected=plan_selected,
+                status='pending',
+                duplicate_of_id=original.id if original else None,
+                **keys
             )
-            
-            db.session.add(new_submission)
-            db.session.commit()
-            
-            # Send email notification
-            try:
-                msg = Message(
-                    subject="New WhatsFlow Client Submission",
-                    recipients=[app.config['ADMIN_EMAIL']],
-                    html=render_template('email/new_submission.html', submission=new_submission)
-                )
-                mail.send(msg)
-            except Exception as e:
-                print(f"Email sending failed: {e}")
-                # Continue even if email fails, but log it
+            # Flagged repeats get no new admin email
+            groupcommit.save_submission(app, values, notify=not original)
             
             return redirect(url_for('success'))
             
@@ -97,17 +124,17 @@ def contact():
             flash('Something went wrong. Please try again.', 'error')
             return redirect(url_for('contact'))
             
-    from models import PricingPlan
-    plans = PricingPlan.query.order_by(PricingPlan.id).all()
-    return render_template('contact.html', plans=plans)
+    return render_template('contact.html', plans=pricing_catalog.plans(), pricing_version=pricing_catalog.version())
 
 @app.route('/success')
+@cached_page('success.html', 'base.html', ttl=3600)
 def success():
     return render_template('success.html')
 
 # --- Admin Routes ---
 
 @app.route('/admin/login', methods=['GET', 'POST'])
+@rate_limited('login', 'RATELIMIT_LOGIN')
 def admin_login():
     if current_user.is_authenticated:
         return redirect(url_for('admin_dashboard'))
@@ -134,187 +161,383 @@ def admin_logout():
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    # Dashboard stats
-    total_submissions = Submission.query.count()
-    pending_submissions = Submission.query.filter_by(status='pending').count()
-    contacted_submissions = Submission.query.filter_by(status='contacted').count()
+    # Dashboard stats (one GROUP BY, or the maintained counters when enabled)
+    counts = stats.status_counts()
     
     # Recent submissions
     recent_submissions = Submission.query.order_by(Submission.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html', 
-                          total=total_submissions,
-                          pending=pending_submissions,
-                          contacted=contacted_submissions,
+                          total=sum(counts.values()),
+                          pending=counts.get('pending', 0),
+                          contacted=counts.get('contacted', 0),
                           recent=recent_submissions)
 
 from flask import send_file, make_response
 import csv
 import json
 import io
-from openpyxl import Workbook
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from docx import Document
+from exports import DOCUMENT_EXPORTS, start_export
+
+# Keyset columns for each ?sort= value. Each tuple matches an index in
+# models.Submission so a page is a short index range scan with no sort step.
+SUBMISSION_SORT_KEYS = {
+    'date': (Submission.created_at, Submission.id),
+    'name': (Submission.full_name, Submission.id),
+    'business': (Submission.business_name, Submission.id),
+    'plan': (Submission.plan_selected, Submission.created_at, Submission.id),
+    'status': (Submission.status, Submission.created_at, Submission.id),
+}
+
+# Query-string filters mapped to the Submission column they match exactly
+SUBMISSION_FILTER_COLUMNS = {
+    'status': Submission.status,
+    'plan': Submission.plan_selected,
+    'country': Submission.country,
+}
+
+def encode_cursor(sort, submission):
+    """Encode the keyset position of a row as an opaque token."""
+    import base64
+    values = []
+    for column in SUBMISSION_SORT_KEYS[sort]:
+        value = getattr(submission, column.key)
+        values.append(value.isoformat() if column is Submission.created_at else value)
+    raw = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(sort, token):
+    """Decode a cursor token back into its keyset values, or None if invalid."""
+    import base64
+    from datetime import datetime
+    columns = SUBMISSION_SORT_KEYS[sort]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if len(values) != len(columns):
+            return None
+        return tuple(datetime.fromisoformat(value) if column is Submission.created_at else value
+                     for column, value in zip(columns, values))
+    except (ValueError, TypeError):
+        return None
+
+
+def filter_submissions(query, filters):
+    """Push the status/plan/country filters into the SQL WHERE clause."""
+    for name, column in SUBMISSION_FILTER_COLUMNS.items():
+        if filters.get(name):
+            query = query.filter(column == filters[name])
+    return query
+
+
+def keyset_query(query, sort='date', direction='desc', after=None, before=None):
+    """Apply the keyset condition and ordering for one page of a Submission query."""
+    from sqlalchemy import tuple_
+
+    columns = SUBMISSION_SORT_KEYS[sort]
+    key = tuple_(*columns)
+    descending = direction == 'desc'
+    backwards = before is not None and after is None
+
+    if after is not None:
+        query = query.filter(key < after if descending else key > after)
+    elif before is not None:
+        query = query.filter(key > before if descending else key < before)
+
+    # Walking backwards reads the rows in reverse order, then flips them
+    if descending != backwards:
+        return query.order_by(*[column.desc() for column in columns])
+    return query.order_by(*[column.asc() for column in columns])
+
+
+def paginate_submissions(query, sort='date', direction='desc', after=None, before=None, per_page=50):
+    """
+    Keyset-paginate a Submission query on the sort's key columns.
+
+    Returns (rows, next_cursor, prev_cursor). Cost depends only on per_page,
+    not on how deep into the table the cursor points.
+    """
+    backwards = before is not None and after is None
+    query = keyset_query(query, sort, direction, after=after, before=before)
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    next_cursor = encode_cursor(sort, rows[-1]) if (has_more or backwards) else None
+    prev_cursor = encode_cursor(sort, rows[0]) if (after is not None or (backwards and has_more)) else None
+    return rows, next_cursor, prev_cursor
+
 
 @app.route('/admin/submissions')
 @login_required
 def admin_submissions():
-    submissions = Submission.query.order_by(Submission.created_at.desc()).all()
-    return render_template('admin/submissions.html', submissions=submissions)
+    from models import PricingPlan
+
+    sort = request.args.get('sort', 'date')
+    if sort not in SUBMISSION_SORT_KEYS:
+        sort = 'date'
+    direction = 'asc' if request.args.get('dir') == 'asc' else 'desc'
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 500))
+    filters = {name: request.args[name].strip() for name in SUBMISSION_FILTER_COLUMNS if request.args.get(name, '').strip()}
+
+    after = decode_cursor(sort, request.args['after']) if request.args.get('after') else None
+    before = decode_cursor(sort, request.args['before']) if request.args.get('before') else None
+
+    query = filter_submissions(Submission.query, filters)
+    submissions, next_cursor, prev_cursor = paginate_submissions(
+        query, sort, direction, after=after, before=before, per_page=per_page)
+
+    plans = [name for (name,) in db.session.query(PricingPlan.plan_name).order_by(PricingPlan.id)]
+
+    return render_template('admin/submissions.html',
+                          submissions=submissions,
+                          sort=sort,
+                          direction=direction,
+                          per_page=per_page,
+                          filters=filters,
+                          statuses=SUBMISSION_STATUSES,
+                          plans=plans,
+                          next_cursor=next_cursor,
+                          prev_cursor=prev_cursor)
+
+EXPORT_CSV_HEADER = ['Date', 'Name', 'Business', 'Email', 'WhatsApp', 'Country', 'Plan', 'Message', 'Status']
+
+# Columns read for streamed exports; plain rows avoid building ORM objects
+EXPORT_COLUMNS = [
+    Submission.id,
+    Submission.created_at,
+    Submission.full_name,
+    Submission.business_name,
+    Submission.email,
+    Submission.whatsapp_number,
+    Submission.country,
+    Submission.plan_selected,
+    Submission.message,
+    Submission.status,
+]
+
+
+def iter_submission_batches(filters=None, batch_size=None):
+    """
+    Yield export rows newest first, batch_size rows at a time.
+
+    Each batch is its own keyset query on (created_at, id), so memory stays
+    flat no matter how many rows the table holds.
+    """
+    from sqlalchemy import tuple_
+
+    batch_size = batch_size or app.config['EXPORT_BATCH_SIZE']
+    key = tuple_(Submission.created_at, Submission.id)
+    last = None
+    while True:
+        query = filter_submissions(db.session.query(*EXPORT_COLUMNS), filters or {})
+        if last is not None:
+            query = query.filter(key < last)
+        batch = query.order_by(Submission.created_at.desc(), Submission.id.desc()).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last = (batch[-1].created_at, batch[-1].id)
+
+
+# Incremental exports add what a sync needs to upsert rows and resume
+DELTA_EXPORT_COLUMNS = EXPORT_COLUMNS + [Submission.change_seq, Submission.updated_at]
+DELTA_CSV_HEADER = EXPORT_CSV_HEADER + ['ID', 'Change', 'Updated']
+
+
+def current_watermark():
+    """The newest change sequence number (0 for an empty table)."""
+    return db.session.query(db.func.max(Submission.change_seq)).scalar() or 0
+
+
+def changes_query(query, since, watermark=None):
+    """Rows changed after since (and up to watermark), in the order they changed."""
+    query = query.filter(Submission.change_seq > since)
+    if watermark is not None:
+        query = query.filter(Submission.change_seq <= watermark)
+    return query.order_by(Submission.change_seq)
+
+
+def iter_changed_batches(since, watermark, batch_size=None):
+    """
+    Yield export rows with since < change_seq <= watermark, batch_size rows at a time.
+
+    Status filters are not applied: a row that moved out of a filter is
+    still a change the sync has to see.
+    """
+    batch_size = batch_size or app.config['EXPORT_BATCH_SIZE']
+    while True:
+        batch = changes_query(db.session.query(*DELTA_EXPORT_COLUMNS), since, watermark).limit(batch_size).all()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        since = batch[-1].change_seq
+
+
+def submission_csv_row(sub, delta=False):
+    if delta:
+        return submission_csv_row(sub) + [sub.id, sub.change_seq, format_updated_at(sub)]
+    return [
+        sub.created_at.strftime('%Y-%m-%d %H:%M'),
+        sub.full_name,
+        sub.business_name,
+        sub.email,
+        sub.whatsapp_number,
+        sub.country,
+        sub.plan_selected,
+        sub.message,
+        sub.status
+    ]
+
+
+def format_updated_at(sub):
+    return sub.updated_at.strftime('%Y-%m-%d %H:%M:%S') if sub.updated_at else None
+
+
+def submission_json_row(sub, delta=False):
+    if delta:
+        return dict(submission_json_row(sub), id=sub.id, change_seq=sub.change_seq, updated_at=format_updated_at(sub))
+    return {
+        'date': sub.created_at.strftime('%Y-%m-%d %H:%M'),
+        'name': sub.full_name,
+        'business': sub.business_name,
+        'email': sub.email,
+        'whatsapp': sub.whatsapp_number,
+        'country': sub.country,
+        'plan': sub.plan_selected,
+        'message': sub.message,
+        'status': sub.status
+    }
+
+
+def stream_csv(batches, delta=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DELTA_CSV_HEADER if delta else EXPORT_CSV_HEADER)
+    for batch in batches:
+        for sub in batch:
+            writer.writerow(submission_csv_row(sub, delta))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_ndjson(batches, delta=False):
+    for batch in batches:
+        yield ''.join(json.dumps(submission_json_row(sub, delta)) + '\n' for sub in batch)
+
+
+def stream_json(batches, delta=False):
+    yield '['
+    first = True
+    for batch in batches:
+        chunk = []
+        for sub in batch:
+            chunk.append(('\n    ' if first else ',\n    ') + json.dumps(submission_json_row(sub, delta)))
+            first = False
+        yield ''.join(chunk)
+    yield '\n]\n'
+
+
+# Formats written straight into the response: (stream function, mimetype, extension)
+STREAMED_EXPORTS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+    'json': (stream_json, 'application/json', 'json'),
+}
+
+
+@app.route('/admin/submissions/search')
+@login_required
+def search_submissions():
+    from models import PricingPlan
+    from search import search_query, window_truncated
+
+    text = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 500))
+    filters = {name: request.args[name].strip() for name in SUBMISSION_FILTER_COLUMNS if request.args.get(name, '').strip()}
+
+    # Filters may drop most of the newest matches, so only unfiltered searches use the window
+    rank_window = None if filters else app.config['SEARCH_RANK_WINDOW']
+    query = search_query(filter_submissions(Submission.query, filters), text, rank_window)
+    if query is None:
+        if wants_json():
+            return jsonify({'query': text, 'page': page, 'results': [], 'has_more': False})
+        return redirect(url_for('admin_submissions', **filters))
+
+    # Ranked results cannot use a keyset cursor, so search pages by offset
+    rows = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    has_more = len(rows) > per_page
+    submissions = rows[:per_page]
+    truncated = window_truncated(text, rank_window)
+
+    if wants_json():
+        return jsonify({
+            'query': text,
+            'page': page,
+            'per_page': per_page,
+            'has_more': has_more,
+            'truncated': truncated,
+            'rank_window': rank_window if truncated else None,
+            'results': [sub.to_dict() for sub in submissions]
+        })
+
+    plans = [name for (name,) in db.session.query(PricingPlan.plan_name).order_by(PricingPlan.id)]
+    return render_template('admin/submissions.html',
+                          submissions=submissions,
+                          search=text,
+                          truncated=truncated,
+                          rank_window=rank_window,
+                          page=page,
+                          has_more=has_more,
+                          sort=None,
+                          direction='desc',
+                          per_page=per_page,
+                          filters=filters,
+                          statuses=SUBMISSION_STATUSES,
+                          plans=plans)
 
 @app.route('/admin/export/<format>')
 @login_required
 def export_data(format):
-    try:
-        import tempfile
-        import os
-        from flask import send_from_directory
-        
-        submissions = Submission.query.order_by(Submission.created_at.desc()).all()
-        
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(app.root_path, 'temp_exports')
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        if format == 'csv':
-            filename = 'submissions.csv'
-            filepath = os.path.join(temp_dir, filename)
-            
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Date', 'Name', 'Business', 'Email', 'WhatsApp', 'Country', 'Plan', 'Message', 'Status'])
-                for sub in submissions:
-                    writer.writerow([
-                        sub.created_at.strftime('%Y-%m-%d %H:%M'),
-                        sub.full_name,
-                        sub.business_name,
-                        sub.email,
-                        sub.whatsapp_number,
-                        sub.country,
-                        sub.plan_selected,
-                        sub.message,
-                        sub.status
-                    ])
-            
-            return send_from_directory(temp_dir, filename, as_attachment=True)
-            
-        elif format == 'json':
-            filename = 'submissions.json'
-            filepath = os.path.join(temp_dir, filename)
-            
-            data = []
-            for sub in submissions:
-                data.append({
-                    'date': sub.created_at.strftime('%Y-%m-%d %H:%M'),
-                    'name': sub.full_name,
-                    'business': sub.business_name,
-                    'email': sub.email,
-                    'whatsapp': sub.whatsapp_number,
-                    'country': sub.country,
-                    'plan': sub.plan_selected,
-                    'message': sub.message,
-                    'status': sub.status
-                })
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
-            
-            return send_from_directory(temp_dir, filename, as_attachment=True)
-            
-        elif format == 'excel':
-            filename = 'submissions.xlsx'
-            filepath = os.path.join(temp_dir, filename)
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Submissions"
-            ws.append(['Date', 'Name', 'Business', 'Email', 'WhatsApp', 'Country', 'Plan', 'Message', 'Status'])
-            for sub in submissions:
-                ws.append([
-                    sub.created_at.strftime('%Y-%m-%d %H:%M'),
-                    sub.full_name,
-                    sub.business_name,
-                    sub.email,
-                    sub.whatsapp_number,
-                    sub.country,
-                    sub.plan_selected,
-                    sub.message,
-                    sub.status
-                ])
-            wb.save(filepath)
-            
-            return send_from_directory(temp_dir, filename, as_attachment=True)
-            
-        elif format == 'pdf':
-            filename = 'submissions.pdf'
-            filepath = os.path.join(temp_dir, filename)
-            
-            doc = SimpleDocTemplate(filepath, pagesize=landscape(letter))
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            elements.append(Paragraph("WhatsFlow Submissions", styles['Title']))
-            
-            data = [['Date', 'Name', 'Business', 'Email', 'Plan', 'Status']]
-            for sub in submissions:
-                data.append([
-                    sub.created_at.strftime('%Y-%m-%d'),
-                    sub.full_name,
-                    sub.business_name,
-                    sub.email,
-                    sub.plan_selected,
-                    sub.status
-                ])
-                
-            table = Table(data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            doc.build(elements)
-            
-            return send_from_directory(temp_dir, filename, as_attachment=True)
-            
-        elif format == 'word':
-            filename = 'submissions.docx'
-            filepath = os.path.join(temp_dir, filename)
-            
-            doc = Document()
-            doc.add_heading('WhatsFlow Submissions', 0)
-            
-            table = doc.add_table(rows=1, cols=6)
-            hdr_cells = table.rows[0].cells
-            hdr_cells[0].text = 'Date'
-            hdr_cells[1].text = 'Name'
-            hdr_cells[2].text = 'Business'
-            hdr_cells[3].text = 'Email'
-            hdr_cells[4].text = 'Plan'
-            hdr_cells[5].text = 'Status'
-            
-            for sub in submissions:
-                row_cells = table.add_row().cells
-                row_cells[0].text = sub.created_at.strftime('%Y-%m-%d')
-                row_cells[1].text = sub.full_name
-                row_cells[2].text = sub.business_name
-                row_cells[3].text = sub.email
-                row_cells[4].text = sub.plan_selected
-                row_cells[5].text = sub.status
-                
-            doc.save(filepath)
-            
-            return send_from_directory(temp_dir, filename, as_attachment=True)
-            
+    if format in STREAMED_EXPORTS:
+        from flask import Response, stream_with_context
+
+        stream, mimetype, extension = STREAMED_EXPORTS[format]
+        headers = {'Content-Disposition': f'attachment; filename=submissions.{extension}'}
+        if 'since' not in request.args:
+            batches = iter_submission_batches(request.args)
+            return Response(stream_with_context(stream(batches)), mimetype=mimetype, headers=headers)
+
+        # Incremental export: rows changed after ?since=, up to the watermark handed back
+        since = request.args.get('since', type=int)
+        if since is None or since < 0:
+            return jsonify({'error': 'since must be a change number (0 for everything).'}), 400
+        watermark = current_watermark()
+        headers['X-Watermark'] = str(watermark)
+        batches = iter_changed_batches(since, watermark)
+        return Response(stream_with_context(stream(batches, delta=True)), mimetype=mimetype, headers=headers)
+
+    if format not in DOCUMENT_EXPORTS:
         return redirect(url_for('admin_submissions'))
-        
+    if 'since' in request.args:
+        return jsonify({'error': 'Incremental exports are available as csv, ndjson and json.'}), 400
+
+    try:
+        filters = {name: request.args[name] for name in SUBMISSION_FILTER_COLUMNS if request.args.get(name)}
+        job = start_export(app, format, filters, lambda: iter_submission_batches(filters))
     except Exception as e:
         print(f"Export failed: {e}")
         import traceback
@@ -322,17 +545,239 @@ def export_data(format):
         flash(f"Export failed: {str(e)}", 'error')
         return redirect(url_for('admin_submissions'))
 
+    if wants_json():
+        return jsonify(export_job_payload(job)), 200 if job.status == 'done' else 202
+    return redirect(url_for('export_job_status', job_id=job.id))
+
+
+def wants_json():
+    """True when the client asked for JSON rather than an HTML page."""
+    return request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+
+
+def export_job_payload(job):
+    payload = job.to_dict()
+    payload['status_url'] = url_for('export_job_status', job_id=job.id)
+    if job.status == 'done':
+        payload['download_url'] = url_for('download_export', job_id=job.id)
+    return payload
+
+
+@app.route('/admin/export/jobs/<job_id>')
+@login_required
+def export_job_status(job_id):
+    from models import ExportJob
+    job = ExportJob.query.get_or_404(job_id)
+    if wants_json():
+        return jsonify(export_job_payload(job))
+    return render_template('admin/export_job.html', job=job, payload=export_job_payload(job))
+
+
+@app.route('/admin/export/jobs/<job_id>/download')
+@login_required
+def download_export(job_id):
+    from models import ExportJob
+    job = ExportJob.query.get_or_404(job_id)
+    filepath = os.path.join(app.config['EXPORT_DIR'], job.filename)
+    if job.status != 'done' or not os.path.exists(filepath):
+        flash('That export is no longer available. Please export again.', 'error')
+        return redirect(url_for('admin_submissions'))
+
+    export_format = DOCUMENT_EXPORTS[job.format]
+    return send_file(filepath, mimetype=export_format.mimetype, as_attachment=True,
+                     download_name=f'submissions.{export_format.extension}')
+
 @app.route('/admin/submission/<int:id>/update-status', methods=['POST'])
 @login_required
 def update_submission_status(id):
+    from models import VersionStamp
+
     submission = Submission.query.get_or_404(id)
-    new_status = request.form.get('status')
-    if new_status:
-        submission.status = new_status
-        db.session.commit()
-        flash(f'Status updated to {new_status}', 'success')
+    new_status = (request.form.get('status') or '').strip()
+    if new_status not in SUBMISSION_STATUSES:
+        flash(f"Unknown status '{new_status}'.", 'error')
+        return redirect(url_for('admin_submissions'))
+
+    # Take the write lock first, then re-read the row, so the counter and
+    # rollup deltas start from a status no other request can change underneath
+    VersionStamp.bump('submissions')
+    db.session.refresh(submission)
+    stats.record_status_change(submission.status, new_status)
+    old_key = rollups.submission_key(submission)
+    submission.status = new_status
+    rollups.record_move(old_key, rollups.submission_key(submission))
+    db.session.commit()
+    flash(f'Status updated to {new_status}', 'success')
     return redirect(url_for('admin_submissions'))
 
+BULK_STATUS_MAX_IDS = 10000
+
+
+def bulk_update_status(new_status, ids=None, filters=None):
+    """
+    Set new_status on every submission matching ids or filters in one UPDATE.
+
+    Returns the number of rows changed. Rows already in new_status are left
+    alone so the dashboard counters only move for real changes.
+    """
+    from models import VersionStamp
+
+    condition = db.or_(Submission.status != new_status, Submission.status.is_(None))
+    if ids:
+        condition = db.and_(condition, Submission.id.in_(ids))
+    else:
+        for name, column in SUBMISSION_FILTER_COLUMNS.items():
+            if filters.get(name):
+                condition = db.and_(condition, column == filters[name])
+
+    # Bumping the stamp first takes SQLite's write lock, so the counts read
+    # below cannot go stale before the UPDATE runs
+    VersionStamp.bump('submissions')
+    if stats.counters_enabled():
+        old_counts = dict(db.session.query(Submission.status, db.func.count(Submission.id))
+                          .filter(condition).group_by(Submission.status).all())
+        stats.record_bulk_status_change(old_counts, new_status)
+    rollups.record_bulk_status_change(condition, new_status)
+
+    result = db.session.execute(
+        db.update(Submission).where(condition).values(status=new_status),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def parse_bulk_status_request(data, ids):
+    """Validate a bulk status request. Returns (status, ids, filters, error)."""
+    new_status = (data.get('status') or '').strip()
+    if new_status not in SUBMISSION_STATUSES:
+        return None, None, None, f"Unknown status '{new_status}'."
+
+    try:
+        ids = sorted({int(row_id) for row_id in ids or []})
+    except (TypeError, ValueError):
+        return None, None, None, 'Submission ids must be integers.'
+    if len(ids) > BULK_STATUS_MAX_IDS:
+        return None, None, None, f'At most {BULK_STATUS_MAX_IDS} ids can be updated at once.'
+
+    filters = {name: str(data['filter'][name]).strip() for name in SUBMISSION_FILTER_COLUMNS
+               if isinstance(data.get('filter'), dict) and data['filter'].get(name)}
+    if not ids and not filters:
+        return None, None, None, 'Select some submissions or give a filter.'
+    return new_status, ids, filters, None
+
+
+@app.route('/admin/submissions/bulk-status', methods=['POST'])
+@login_required
+def bulk_update_submission_status():
+    filters = {name: request.form[name] for name in SUBMISSION_FILTER_COLUMNS if request.form.get(name)}
+    if request.form.get('scope') == 'filter':
+        data, ids = {'status': request.form.get('new_status'), 'filter': filters}, []
+    else:
+        data, ids = {'status': request.form.get('new_status')}, request.form.getlist('ids')
+
+    new_status, ids, bulk_filters, error = parse_bulk_status_request(data, ids)
+    if error:
+        flash(error, 'error')
+    else:
+        updated = bulk_update_status(new_status, ids=ids, filters=bulk_filters)
+        flash(f'Status updated to {new_status} for {updated} submissions', 'success')
+    return redirect(url_for('admin_submissions', **filters))
+
+
+@app.route('/admin/api/submissions/status', methods=['POST'])
+@login_required
+def api_bulk_update_status():
+    """JSON body: {"status": ..., "ids": [...]} or {"status": ..., "filter": {"status"|"plan"|"country": ...}}."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object.'}), 400
+    ids = data.get('ids')
+    # bool is an int subclass, but true is not a submission id
+    if ids is not None and not (isinstance(ids, list)
+                                and all(isinstance(row_id, int) and not isinstance(row_id, bool) for row_id in ids)):
+        return jsonify({'error': 'ids must be a list of integers.'}), 400
+    new_status, ids, filters, error = parse_bulk_status_request(data, ids)
+    if error:
+        return jsonify({'error': error}), 400
+    updated = bulk_update_status(new_status, ids=ids, filters=filters)
+    return jsonify({'status': new_status, 'updated': updated})
+
+
+@app.route('/admin/api/analytics')
+@login_required
+def api_analytics():
+    """Daily lead counts by status plus country and plan breakdowns, read from the rollups."""
+    days = max(1, min(request.args.get('days', 30, type=int), 730))
+    return jsonify(rollups.analytics(days))
+
+
+@app.route('/admin/api/submissions/changes')
+@login_required
+def api_submission_changes():
+    """
+    Submissions created or changed after ?since=, oldest change first.
+
+    Pass the returned watermark as the next since; keep going while has_more.
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 500, type=int), 5000))
+    rows = changes_query(Submission.query, max(since, 0)).limit(limit + 1).all()
+    changes = rows[:limit]
+    return jsonify({
+        'since': since,
+        'watermark': changes[-1].change_seq if changes else since,
+        'has_more': len(rows) > limit,
+        'changes': [sub.to_dict() for sub in changes]
+    })
+
+
+@app.route('/admin/import', methods=['GET', 'POST'])
+@login_required
+def admin_import():
+    from importer import import_file
+    report = None
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Please choose a file to import.', 'error')
+            return redirect(url_for('admin_import'))
+        try:
+            report = import_file(upload.stream, upload.filename)
+        except Exception as e:
+            print(f"Import failed: {e}")
+            if wants_json():
+                return jsonify({'error': str(e)}), 400
+            flash(f'Import failed: {str(e)}', 'error')
+            return redirect(url_for('admin_import'))
+        if wants_json():
+            return jsonify(report.to_dict())
+        flash(f'Imported {report.inserted} submissions, rejected {report.rejected} rows.',
+              'success' if not report.rejected else 'error')
+    return render_template('admin/import.html', report=report)
+
+@app.route('/admin/db-stats')
+@login_required
+def admin_db_stats():
+    from database import pool_status
+    return jsonify(pool_status(app))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint; needs METRICS_TOKEN when it is set, else a METRICS_ALLOWED_IPS client."""
+    import hmac
+    from metrics import render_latest
+    if not app.config['METRICS_ENABLED']:
+        return 'Metrics are disabled', 404
+    token = app.config['METRICS_TOKEN']
+    if token:
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return 'Unauthorized', 401, {'WWW-Authenticate': 'Bearer'}
+    elif request.remote_addr not in app.config['METRICS_ALLOWED_IPS']:
+        return 'Forbidden', 403
+    body, content_type = render_latest()
+    return body, 200, {'Content-Type': content_type}
+
 @app.route('/admin/settings')
 @login_required
 def admin_settings():
@@ -359,6 +804,7 @@ def update_pricing(plan_id):
         plan.apply_discount(discount_percent)
         
         db.session.commit()
+        pricing_catalog.invalidate()
         flash(f'{plan.plan_name} plan updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating pricing: {str(e)}', 'error')
@@ -381,15 +827,23 @@ def admin_change_email():
         flash('Please enter a valid email address.', 'error')
         return redirect(url_for('admin_settings'))
     
+    # Nothing to change, so keep the sessions and every worker's user cache
+    if new_email == current_user.email:
+        flash('That is already your email address.', 'error')
+        return redirect(url_for('admin_settings'))
+    
     # Check if email is already in use
     existing_user = User.query.filter_by(email=new_email).first()
     if existing_user and existing_user.id != current_user.id:
         flash('This email is already in use.', 'error')
         return redirect(url_for('admin_settings'))
     
-    # Update email
-    current_user.email = new_email
+    # Update email (current_user is a cached read-only copy)
+    user = db.session.get(User, current_user.id)
+    user.email = new_email
+    user.revoke_sessions()
     db.session.commit()
+    user_cache.invalidate()
     
     # Log out user
     logout_user()
@@ -418,9 +872,17 @@ def admin_change_password():
         flash('New passwords do not match.', 'error')
         return redirect(url_for('admin_settings'))
     
-    # Update password
-    current_user.set_password(new_password)
+    # Nothing to change, so keep the sessions and every worker's user cache
+    if current_user.check_password(new_password):
+        flash('New password must be different from the current one.', 'error')
+        return redirect(url_for('admin_settings'))
+    
+    # Update password (current_user is a cached read-only copy)
+    user = db.session.get(User, current_user.id)
+    user.set_password(new_password)
+    user.revoke_sessions()
     db.session.commit()
+    user_cache.invalidate()
     
     # Log out user
     logout_user()
@@ -429,12 +891,206 @@ def admin_change_password():
 
 
 # --- CLI Commands ---
+import click
+
 @app.cli.command("init-db")
 def init_db_command():
     """Clear existing data and create new tables."""
-    db.create_all()
+    import migrations
+    # Upgrade steps are idempotent, so this also builds what create_all cannot (the search index)
+    migrations.upgrade()
     print("Initialized the database.")
 
+from flask.cli import AppGroup
+db_cli = AppGroup('db', help='Schema migrations.')
+app.cli.add_command(db_cli)
+
+@db_cli.command('upgrade')
+@click.option('--to', 'target', type=int, default=None, help='Version to upgrade to (default: latest).')
+def db_upgrade_command(target):
+    """Create missing tables and apply pending migrations."""
+    import migrations
+    applied = migrations.upgrade(migrations.HEAD if target is None else target)
+    for migration in applied:
+        print(f"  - applied {migration.version}: {migration.description}")
+    print(f"Database is at version {migrations.current_version()}.")
+
+@db_cli.command('downgrade')
+@click.option('--to', 'target', type=int, default=None, help='Version to downgrade to (default: one step back).')
+def db_downgrade_command(target):
+    """Revert applied migrations."""
+    import migrations
+    if target is None:
+        target = max(migrations.current_version() - 1, 0)
+    for migration in migrations.downgrade(target):
+        print(f"  - reverted {migration.version}: {migration.description}")
+    print(f"Database is at version {migrations.current_version()}.")
+
+@db_cli.command('current')
+def db_current_command():
+    """Show the applied schema version."""
+    import migrations
+    print(f"Database is at version {migrations.current_version()} (latest is {migrations.HEAD}).")
+
+def admin_query_plans():
+    """Build the queries behind the admin pages and exports, keyed by a description."""
+    from datetime import datetime
+    now = datetime.utcnow()
+    cursor_values = {
+        'date': (now, 1000),
+        'name': ('M', 1000),
+        'business': ('M', 1000),
+        'plan': ('Pro', now, 1000),
+        'status': ('pending', now, 1000),
+    }
+    queries = {}
+    for sort in SUBMISSION_SORT_KEYS:
+        for direction in ('desc', 'asc'):
+            queries[f'submissions sorted by {sort} {direction}'] = keyset_query(Submission.query, sort, direction).limit(51)
+        queries[f'submissions sorted by {sort}, next page'] = keyset_query(
+            Submission.query, sort, 'desc', after=cursor_values[sort]).limit(51)
+    for name, value in [('status', 'pending'), ('plan', 'Pro'), ('country', 'US')]:
+        queries[f'submissions filtered by {name}'] = keyset_query(
+            filter_submissions(Submission.query, {name: value}), 'date', 'desc', after=cursor_values['date']).limit(51)
+    queries['dashboard status counts'] = db.session.query(Submission.status, db.func.count(Submission.id)).group_by(Submission.status)
+    queries['dashboard recent submissions'] = Submission.query.order_by(Submission.created_at.desc()).limit(5)
+    queries['export batch'] = keyset_query(
+        db.session.query(*EXPORT_COLUMNS), 'date', 'desc', after=cursor_values['date']).limit(1000)
+    queries['export data version'] = db.session.query(db.func.max(Submission.id))
+    queries['changes since watermark'] = changes_query(Submission.query, 1000).limit(501)
+    queries['incremental export batch'] = changes_query(db.session.query(*DELTA_EXPORT_COLUMNS), 1000, 2000).limit(1000)
+    queries['export watermark'] = db.session.query(db.func.max(Submission.change_seq))
+    queries['contact duplicate probe'] = dedupe.recent_duplicate_query('a@example.com', '+15550000000', 72).limit(1)
+    return queries
+
+@db_cli.command('check-indexes')
+def db_check_indexes_command():
+    """EXPLAIN every admin query and fail if any reads submission without an index."""
+    import migrations
+    failures = 0
+    for name, query in admin_query_plans().items():
+        plan = migrations.explain(query)
+        bad = migrations.unindexed_steps(plan)
+        failures += bool(bad)
+        print(f"{'FAIL' if bad else 'ok  '} {name}: {'; '.join(plan)}")
+    if failures:
+        print(f"{failures} admin queries do not use an index. Run `flask db upgrade`.")
+        raise SystemExit(1)
+
+@app.cli.command("collect-static")
+@click.option('--clean', is_flag=True, help='Delete files from earlier builds that the new manifest no longer uses.')
+def collect_static_command(clean):
+    """Fingerprint and precompress static files into ASSETS_DIR."""
+    from assets import collect_static
+    manifest = collect_static(app, clean=clean)
+    print(f"Collected {len(manifest)} static files into {app.config['ASSETS_DIR']}.")
+
+@app.cli.command("import-report")
+@click.option('--top', type=int, default=15, show_default=True, help='Number of packages to list.')
+def import_report_command(top):
+    """Show what a worker pays at startup to import the app, per package and per export backend."""
+    from importcost import import_report
+    seconds, rss_kib, per_package, backends = import_report('app', DOCUMENT_EXPORTS, cwd=app.root_path)
+    print(f"Importing the app: {seconds * 1000:.0f} ms, peak RSS {rss_kib / 1024:.1f} MiB")
+    print(f"\n{'package':<28} {'ms':>8}")
+    for package, package_seconds in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<28} {package_seconds * 1000:>8.1f}")
+    print("\nExport backends, loaded on the first export of each format:")
+    print(f"{'format':<10} {'modules':<20} {'ms':>8} {'RSS MiB':>8}")
+    for format, (extra_seconds, extra_kib) in backends.items():
+        modules = ', '.join(DOCUMENT_EXPORTS[format].modules)
+        print(f"{format:<10} {modules:<20} {extra_seconds * 1000:>8.1f} {extra_kib / 1024:>8.1f}")
+
+@app.cli.command("send-outbox")
+@click.option('--once', is_flag=True, help='Exit once the outbox has been drained.')
+def send_outbox_command(once):
+    """Deliver queued notification emails."""
+    from outbox import run_sender
+    run_sender(app, mail, once=once)
+
+@app.cli.command("check-counters")
+@click.option('--rebuild', is_flag=True, help='Rebuild the counters from the submissions table.')
+def check_counters_command(rebuild):
+    """Compare the dashboard counters with the submissions table."""
+    if rebuild:
+        stats.rebuild_counters()
+        print("Rebuilt the dashboard counters.")
+        return
+    mismatches = stats.check_counters()
+    if not mismatches:
+        print("Dashboard counters are consistent.")
+        return
+    for status, (stored, actual) in sorted(mismatches.items(), key=lambda item: str(item[0])):
+        print(f"  - {status}: counter says {stored}, table has {actual}")
+    print("Run `flask check-counters --rebuild` to fix them.")
+    raise SystemExit(1)
+
+@app.cli.command("check-rollups")
+@click.option('--rebuild', is_flag=True, help='Rebuild (or backfill) the rollups from the submissions table.')
+def check_rollups_command(rebuild):
+    """Compare the analytics rollups with the submissions table."""
+    if rebuild:
+        rollups.rebuild_rollups()
+        print("Rebuilt the analytics rollups.")
+        return
+    mismatches = rollups.check_rollups()
+    if not mismatches:
+        print("Analytics rollups are consistent.")
+        return
+    for (day, country, plan, status), (stored, actual) in sorted(mismatches.items(), key=lambda item: str(item[0])):
+        print(f"  - {day} {country} / {plan} / {status}: rollup says {stored}, table has {actual}")
+    print("Run `flask check-rollups --rebuild` to fix them.")
+    raise SystemExit(1)
+
+@app.cli.command("import-submissions")
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'format', type=click.Choice(['csv', 'json', 'ndjson', 'xlsx']), default=None,
+              help='File format (default: from the file extension).')
+@click.option('--batch-size', type=int, default=None, help='Rows per insert transaction.')
+def import_submissions_command(path, format, batch_size):
+    """Bulk import submissions from a CSV/JSON/NDJSON/XLSX export file."""
+    import time
+    from importer import import_file
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        report = import_file(f, path, format=format, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    for row, error in report.errors[:50]:
+        print(f"  - row {row}: {error}")
+    if report.rejected > 50:
+        print(f"  ... and {report.rejected - 50} more rejected rows")
+    print(f"Imported {report.inserted} submissions ({report.rejected} rejected) in {elapsed:.2f}s.")
+
+@app.cli.command("seed-submissions")
+@click.option('--count', type=int, default=10000, show_default=True, help='Number of submissions to generate.')
+@click.option('--seed', type=int, default=0, show_default=True, help='Random seed; the same seed gives the same rows.')
+@click.option('--days', type=int, default=365, show_default=True, help='Spread created_at over this many past days.')
+@click.option('--batch-size', type=int, default=None, help='Rows per insert transaction.')
+def seed_submissions_command(count, seed, days, batch_size):
+    """Fill the database with realistic synthetic submissions for load testing."""
+    import time
+    from seed import seed_submissions
+    started = time.perf_counter()
+    inserted = seed_submissions(count, seed=seed, days=days, batch_size=batch_size)
+    print(f"Seeded {inserted} submissions in {time.perf_counter() - started:.2f}s.")
+
+@app.cli.command("dedupe-submissions")
+@click.option('--apply', 'apply_changes', is_flag=True, help='Mark every duplicate with the id of its original.')
+def dedupe_submissions_command(apply_changes):
+    """Find submissions sharing an email or WhatsApp number in one pass over the table."""
+    import time
+    started = time.perf_counter()
+    clusters = dedupe.find_clusters()
+    roots = set(clusters.values())
+    print(f"Found {len(roots)} duplicate clusters covering {len(clusters) + len(roots)} submissions "
+          f"in {time.perf_counter() - started:.2f}s.")
+    if not apply_changes:
+        if clusters:
+            print("Run `flask dedupe-submissions --apply` to flag the duplicates.")
+        return
+    changed = dedupe.apply_clusters(clusters)
+    print(f"Flagged {changed} submissions as duplicates.")
+
 @app.cli.command("create-admin")
 def create_admin_command():
     """Create a default admin user."""
@@ -452,6 +1108,7 @@ def create_admin_command():
     print(f"Admin user {email} created successfully.")
 
 if __name__ == '__main__':
+    import migrations
     with app.app_context():
-        db.create_all()
+        migrations.upgrade()
     app.run(debug=True)
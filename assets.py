@@ -0,0 +1,154 @@
+"""
+Fingerprinted, precompressed static assets.
+
+`flask collect-static` copies every file under static/ to ASSETS_DIR with a
+content hash in its name, writes .gz and .br variants next to it and records
+the mapping in manifest.json. Templates call asset_url() to get the hashed
+URL, and /assets/ serves the best precompressed variant the client accepts
+with a year-long immutable Cache-Control. A changed file gets a new name,
+so browsers never need to revalidate. Without a manifest (e.g. during
+development) asset_url() falls back to the regular /static/ URL.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import current_app, abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # gzip variants are still written and served
+    brotli = None
+
+MANIFEST = 'manifest.json'
+# Already-compressed formats gain nothing from another pass
+SKIP_COMPRESSION = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.woff', '.woff2', '.ico', '.zip', '.gz', '.br'}
+# encoding -> file suffix, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_manifest = None
+
+
+def fingerprint(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def hashed_name(relpath, digest):
+    root, ext = os.path.splitext(relpath)
+    return f'{root}.{digest}{ext}'
+
+
+def write_variants(path):
+    """Write .gz and .br next to path when they are smaller than the original."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(suffix)
+    return written
+
+
+def collect_static(app, clean=False):
+    """
+    Fingerprint every file in the static folder into ASSETS_DIR. Returns the manifest.
+
+    Hashed files are immutable, so files from earlier builds are kept for
+    pages still holding their URLs unless clean is set. The manifest is
+    replaced atomically once every file it names exists.
+    """
+    source = app.static_folder
+    target = app.config['ASSETS_DIR']
+
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(source):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, source).replace(os.sep, '/')
+            hashed = hashed_name(relpath, fingerprint(path))
+            destination = os.path.join(target, hashed)
+            if not os.path.exists(destination):
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.copy2(path, destination)
+                if os.path.splitext(filename)[1].lower() not in SKIP_COMPRESSION:
+                    write_variants(destination)
+            manifest[relpath] = hashed
+
+    os.makedirs(target, exist_ok=True)
+    partial = os.path.join(target, MANIFEST + '.part')
+    with open(partial, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(partial, os.path.join(target, MANIFEST))
+
+    if clean:
+        remove_stale(target, manifest)
+    return manifest
+
+
+def remove_stale(target, manifest):
+    keep = {MANIFEST}
+    for hashed in manifest.values():
+        keep.update({hashed, hashed + '.gz', hashed + '.br'})
+    for dirpath, dirnames, filenames in os.walk(target):
+        for filename in filenames:
+            relpath = os.path.relpath(os.path.join(dirpath, filename), target).replace(os.sep, '/')
+            if relpath not in keep:
+                os.remove(os.path.join(dirpath, filename))
+
+
+def load_manifest():
+    """The manifest written by collect-static, read once per worker ({} if it was never built)."""
+    global _manifest
+    if _manifest is None or current_app.debug:
+        try:
+            with open(os.path.join(current_app.config['ASSETS_DIR'], MANIFEST)) as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(filename):
+    """URL for a file under static/, fingerprinted when collect-static has been run."""
+    hashed = load_manifest().get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', filename=hashed)
+
+
+def accepted_encodings():
+    """Content codings the client accepts, honouring q=0."""
+    return {encoding for encoding, quality in request.accept_encodings if quality > 0}
+
+
+def serve_asset(filename):
+    """Send a fingerprinted asset, precompressed when the client accepts it."""
+    directory = current_app.config['ASSETS_DIR']
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    accepted = accepted_encodings()
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + suffix):
+            response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=31536000)
+            response.content_encoding = encoding
+            break
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
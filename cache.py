@@ -0,0 +1,266 @@
+"""
+Per-worker caches for data that changes rarely but is read on every public page.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from types import SimpleNamespace
+
+from flask import current_app, request, session
+
+from models import db, PricingPlan, User
+
+
+class PricingCatalog:
+    """
+    Pre-parsed pricing plans, held in memory by each gunicorn worker.
+
+    Within PRICING_CACHE_TTL seconds of the last check the cached plans are
+    returned without touching the database. After that a single cheap query
+    on max(PricingPlan.updated_at) decides whether to reload, so an update
+    made through any worker is seen by all of them within the TTL.
+    """
+
+    def __init__(self):
+        self._plans = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_version():
+        updated_at, count = db.session.query(db.func.max(PricingPlan.updated_at), db.func.count(PricingPlan.id)).one()
+        return (updated_at.isoformat() if updated_at else '', count)
+
+    def _load(self):
+        plans = []
+        for plan in PricingPlan.query.order_by(PricingPlan.id).all():
+            cached = SimpleNamespace(**plan.to_dict())
+            cached.features_list = json.loads(plan.features) if plan.features else []
+            plans.append(cached)
+        return plans
+
+    def _refresh(self):
+        ttl = current_app.config['PRICING_CACHE_TTL']
+        if self._plans is not None and time.monotonic() - self._checked_at < ttl:
+            return
+        with self._lock:
+            if self._plans is not None and time.monotonic() - self._checked_at < ttl:
+                return
+            version = self.current_version()
+            if version != self._version or self._plans is None:
+                self._plans = self._load()
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def plans(self):
+        """Return the cached plans, revalidating them if the TTL has expired."""
+        self._refresh()
+        return self._plans
+
+    def version(self):
+        """Return the version key of the cached plans (max updated_at, plan count)."""
+        self._refresh()
+        return self._version
+
+    def invalidate(self):
+        """Force the next read in this worker to revalidate against the database."""
+        self._checked_at = 0.0
+
+
+pricing_catalog = PricingCatalog()
+
+
+class UserCache:
+    """
+    Logged-in users, held detached in each worker for USER_CACHE_TTL seconds.
+
+    Cached users are read-only snapshots: views that change a user must load
+    it with db.session.get() first. Changing credentials rewrites a stamp
+    file whose mtime every worker checks on each lookup (one stat() call),
+    so all workers drop their cached users at once and the sessions revoked
+    by the change fail the credential version check immediately.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp_path():
+        return current_app.config['USER_CACHE_STAMP_FILE']
+
+    def _read_stamp(self):
+        try:
+            return os.stat(self._stamp_path()).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def get(self, user_id, credential_version):
+        """Return the user if it exists and the session's credential version is current, else None."""
+        stamp = self._read_stamp()
+        now = time.monotonic()
+        with self._lock:
+            if stamp != self._stamp:
+                self._users.clear()
+                self._stamp = stamp
+            entry = self._users.get(user_id)
+        if entry is None or entry.expires < now:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            db.session.expunge(user)
+            entry = SimpleNamespace(user=user, expires=now + current_app.config['USER_CACHE_TTL'])
+            with self._lock:
+                self._users[user_id] = entry
+        if (entry.user.credential_version or 0) != credential_version:
+            return None
+        return entry.user
+
+    def invalidate(self):
+        """
+        Make every worker reload users on their next request.
+
+        Call it only after a commit that changed a credential_version, since
+        every worker then drops its whole cache.
+        """
+        path = self._stamp_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(str(time.time_ns()))
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class PageCache:
+    """A bounded LRU of rendered pages for one route, keyed by path and the query args that matter."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class FragmentCache:
+    """A bounded LRU of rendered template fragments, keyed by name and version keys."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            markup = self._entries.get(key)
+            if markup is not None:
+                self._entries.move_to_end(key)
+            return markup
+
+    def set(self, key, markup):
+        with self._lock:
+            self._entries[key] = markup
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def page_version(templates, pricing):
+    """
+    Return (version key, last modified) for a page built from templates.
+
+    The page changes when a template file changes, when pricing changes
+    (for pages that show plans) or when the footer year rolls over.
+    """
+    template_dir = os.path.join(current_app.root_path, current_app.template_folder)
+    mtimes = [os.path.getmtime(os.path.join(template_dir, name)) for name in templates]
+    year = datetime.now().year
+
+    last_modified = max(datetime.fromtimestamp(max(mtimes), timezone.utc), datetime(year, 1, 1, tzinfo=timezone.utc))
+    version = (tuple(mtimes), year)
+    if pricing:
+        pricing_version = pricing_catalog.version()
+        version += (pricing_version,)
+        if pricing_version[0]:
+            updated_at = datetime.fromisoformat(pricing_version[0]).replace(tzinfo=timezone.utc)
+            last_modified = max(last_modified, updated_at)
+    return version, last_modified.replace(microsecond=0)
+
+
+def cached_page(*templates, ttl=300, max_entries=16, pricing=False, query_args=()):
+    """
+    Serve a public GET route from a per-worker response cache.
+
+    templates lists every template the page is rendered from (including
+    base.html) so edits invalidate it. Responses carry a strong ETag and
+    Last-Modified, and revalidations are answered with 304.
+
+    Entries are keyed on the path plus only the query_args the view reads,
+    so arbitrary query strings (?utm_source=..., ?x=1) share one entry
+    instead of evicting the real page.
+    """
+    def decorator(view):
+        store = PageCache(max_entries)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pages showing flashed messages are personal and must not be cached
+            if not current_app.config['PAGE_CACHE_ENABLED'] or request.method != 'GET' or '_flashes' in session:
+                return view(*args, **kwargs)
+
+            version, last_modified = page_version(templates, pricing)
+            key = (request.path,) + tuple(tuple(request.args.getlist(name)) for name in query_args)
+            entry = store.get(key, version)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = response.get_data()
+                entry = SimpleNamespace(
+                    body=body,
+                    mimetype=response.mimetype,
+                    etag=hashlib.sha1(body).hexdigest(),
+                    last_modified=last_modified,
+                    version=version,
+                    expires=time.monotonic() + ttl
+                )
+                store.set(key, entry)
+
+            response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.last_modified = entry.last_modified
+            response.cache_control.public = True
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,151 @@
+"""
+Content-negotiated response compression (zstd, brotli, gzip).
+
+Text responses (HTML, JSON, CSV, NDJSON, JS, CSS) are compressed in an
+after_request hook with the encoding the client prefers. Buffered bodies
+below COMPRESS_MIN_SIZE are left alone. Streamed exports are compressed
+chunk by chunk with a flush after each one, so rows still reach the client
+as they are produced and the body is never buffered. Responses that are
+already encoded (precompressed /assets/) or are file downloads (xlsx, docx,
+pdf) pass through untouched.
+
+Compressed responses get the encoding appended to their ETag
+("<etag>-gzip"), since the bytes differ from the identity representation.
+Incoming If-None-Match values have the suffix removed again before the view
+runs, so the page cache and send_file keep matching their own ETags and
+still answer 304.
+"""
+import re
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/xml', 'text/javascript',
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+ETAG_SUFFIX = re.compile(r'-(gzip|br|zstd)(?="|$)')
+
+
+def available_encodings():
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def choose_encoding(accept_encodings, preference):
+    """Pick the encoding with the highest client q-value, ties going to the server's preference."""
+    best, best_quality = None, 0
+    for encoding in preference:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """One streaming compressor with the same interface for every encoding."""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.compress = self._obj.compress
+            self.flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self._obj.flush
+        elif encoding == 'br':
+            self._obj = brotli.Compressor(quality=level)
+            self.compress = self._obj.process
+            self.flush = self._obj.flush
+            self.finish = self._obj.finish
+        elif encoding == 'zstd':
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+            self.compress = self._obj.compress
+            self.flush = lambda: self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self.finish = self._obj.flush
+        else:
+            raise ValueError(f'unsupported encoding {encoding!r}')
+
+
+def compressed_stream(body, chunks, compressor):
+    """Compress a streamed body chunk by chunk, flushing so each chunk goes out immediately."""
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+
+def compression_level(mimetype, encoding):
+    levels = current_app.config['COMPRESS_LEVELS']
+    return levels.get(mimetype, levels['default'])[encoding]
+
+
+def strip_etag_suffix():
+    """before_request: match If-None-Match against the identity ETag the views know about."""
+    header = request.environ.get('HTTP_IF_NONE_MATCH')
+    if header and ETAG_SUFFIX.search(header):
+        request.environ['HTTP_IF_NONE_MATCH'] = ETAG_SUFFIX.sub('', header)
+        # The cached request property may already hold the original header
+        request.__dict__.pop('if_none_match', None)
+
+
+def compress_response(response):
+    """after_request: compress the body when the client and content type allow it."""
+    if not current_app.config['COMPRESS_ENABLED']:
+        return response
+    if response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code < 200 or response.status_code in (204, 206)
+            or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = choose_encoding(request.accept_encodings, available_encodings())
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if response.status_code == 304:
+        # Same representation the client already holds, so hand back the suffixed ETag it sent
+        if etag:
+            response.set_etag(f'{etag}-{encoding}', weak=weak)
+        return response
+
+    compressor = Compressor(encoding, compression_level(response.mimetype, encoding))
+    if response.is_streamed:
+        response.response = compressed_stream(response.response, response.iter_encoded(), compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(compressor.compress(body) + compressor.finish())
+
+    response.content_encoding = encoding
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+    return response
+
+
+def configure_compression(app):
+    app.before_request(strip_etag_suffix)
+    app.after_request(compress_response)
@@ -3,10 +3,48 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+def engine_options(uri):
+    """
+    SQLAlchemy engine options built from the environment.
+
+    In-memory SQLite uses a single static connection, so pool sizing only
+    applies to file databases and server databases.
+    """
+    options = {
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 3600),
+    }
+    if uri.startswith('sqlite'):
+        # The driver-level timeout is the busy wait for the first statement on a connection
+        options['connect_args'] = {'timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000) / 1000}
+        if ':memory:' in uri or uri in ('sqlite://', 'sqlite:///'):
+            return options
+    options['pool_size'] = int(os.environ.get('DB_POOL_SIZE') or 5)
+    options['max_overflow'] = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    options['pool_timeout'] = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    return options
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///whatsflow.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # Applied to every new SQLite connection. WAL lets readers run alongside the
+    # single writer, and busy_timeout makes writers wait instead of failing with
+    # "database is locked". Negative cache_size is in KiB.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL',
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE') or -64000),
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY',
+    }
     
     # Email Configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -16,5 +54,76 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or 'whatsappautomationbusiness@gmail.com'
     
+    # Email Outbox (drained by `flask send-outbox`)
+    MAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE') or 50)
+    MAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL') or 5)
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS') or 8)
+    MAIL_OUTBOX_BACKOFF = int(os.environ.get('MAIL_OUTBOX_BACKOFF') or 30)  # seconds, doubled per attempt
+    MAIL_OUTBOX_MAX_BACKOFF = int(os.environ.get('MAIL_OUTBOX_MAX_BACKOFF') or 3600)
+    MAIL_OUTBOX_CLAIM_TIMEOUT = int(os.environ.get('MAIL_OUTBOX_CLAIM_TIMEOUT') or 600)
+    MAIL_OUTBOX_DIGEST = os.environ.get('MAIL_OUTBOX_DIGEST', '').lower() in ('1', 'true', 'yes')
+    
+    # Export Configuration
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE') or 1000)
+    EXPORT_DIR = os.environ.get('EXPORT_DIR') or os.path.join(basedir, 'temp_exports')
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS') or 2)
+    EXPORT_JOB_TIMEOUT = int(os.environ.get('EXPORT_JOB_TIMEOUT') or 1800)  # seconds before an unfinished job is considered lost
+    
+    # Import Configuration
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or 5000)
+
+    # Duplicate Detection
+    DEDUPE_MODE = os.environ.get('DEDUPE_MODE', 'off').lower()  # off, flag or merge
+    DEDUPE_WINDOW_HOURS = float(os.environ.get('DEDUPE_WINDOW_HOURS') or 72)
+
+    # Group commit: contact submissions from concurrent requests share one transaction
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', '').lower() in ('1', 'true', 'yes')
+    GROUP_COMMIT_MAX_ROWS = int(os.environ.get('GROUP_COMMIT_MAX_ROWS') or 100)  # per transaction
+    GROUP_COMMIT_MAX_DELAY_MS = float(os.environ.get('GROUP_COMMIT_MAX_DELAY_MS') or 5)  # wait for more rows after the first
+
+    # Search Configuration
+    SEARCH_RANK_WINDOW = int(os.environ.get('SEARCH_RANK_WINDOW', 10000))  # newest matches ranked per search, 0 ranks all
+    
+    # Fingerprinted static assets (`flask collect-static`)
+    ASSETS_DIR = os.environ.get('ASSETS_DIR') or os.path.join(basedir, 'build', 'assets')
+    
+    # Caching
+    PRICING_CACHE_TTL = float(os.environ.get('PRICING_CACHE_TTL') or 10)  # seconds before a worker rechecks pricing
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL') or 60)  # seconds a worker keeps a logged-in user
+    USER_CACHE_STAMP_FILE = os.environ.get('USER_CACHE_STAMP_FILE') or os.path.join(basedir, 'instance', 'credentials.stamp')
+    # Compiled templates shared by all workers; set to an empty value to disable
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, 'instance', 'jinja_cache'))
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE', 256))  # {% cache %} blocks kept per worker, 0 disables
+    
+    # Dashboard counters (run `flask check-counters --rebuild` after enabling)
+    DASHBOARD_COUNTERS = os.environ.get('DASHBOARD_COUNTERS', '').lower() in ('1', 'true', 'yes')
+    
+    # Rate limiting and load shedding for /contact and /admin/login POSTs
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATELIMIT_STORAGE = os.environ.get('RATELIMIT_STORAGE') or os.path.join(basedir, 'instance', 'ratelimit.db')
+    RATELIMIT_CONTACT = os.environ.get('RATELIMIT_CONTACT') or '5/minute'  # per client IP
+    RATELIMIT_LOGIN = os.environ.get('RATELIMIT_LOGIN') or '10/minute'
+    LOAD_SHED_MAX_CONCURRENT = int(os.environ.get('LOAD_SHED_MAX_CONCURRENT', 3))  # keep below the worker count, 0 disables
+    LOAD_SHED_SLOT_DIR = os.environ.get('LOAD_SHED_SLOT_DIR') or os.path.join(basedir, 'instance', 'slots')
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or 0)  # set to 1 behind nginx so client IPs are real
+    
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # require "Authorization: Bearer <token>" when set
+    # Without a token, only these client IPs may scrape /metrics
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+    
+    # Response compression (zstd, brotli or gzip, whichever the client prefers)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))  # bytes; smaller buffered bodies are sent as-is
+    # Levels per content type; streamed exports trade some ratio for CPU
+    COMPRESS_LEVELS = {
+        'default': {'gzip': 6, 'br': 5, 'zstd': 3},
+        'text/csv': {'gzip': 4, 'br': 4, 'zstd': 1},
+        'application/x-ndjson': {'gzip': 4, 'br': 4, 'zstd': 1},
+        'application/json': {'gzip': 5, 'br': 4, 'zstd': 3},
+    }
+    
     # Admin Configuration
     ADMIN_EMAIL = 'whatsappautomationbusiness@gmail.com'
@@ -0,0 +1,95 @@
+"""
+Engine tuning for the shared database: SQLite connect-time pragmas and
+connection pool statistics.
+"""
+import threading
+
+from sqlalchemy import event
+
+from models import db
+
+
+class PoolStats:
+    """Counters fed by the pool's checkout/checkin events, per worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidated = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidated += 1
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'invalidated': self.invalidated,
+                'checked_out': self.checked_out,
+                'max_checked_out': self.max_checked_out,
+            }
+
+
+pool_stats = PoolStats()
+
+
+def sqlite_pragma_listener(pragmas):
+    """Build a connect listener that applies pragmas to every new SQLite connection."""
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if value is not None and value != '':
+                    cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def configure_engine(app):
+    """Attach pragmas (for SQLite) and pool statistics to the app's engine."""
+    with app.app_context():
+        engine = db.engine
+
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', sqlite_pragma_listener(app.config['SQLITE_PRAGMAS']))
+
+    event.listen(engine.pool, 'connect', pool_stats.on_connect)
+    event.listen(engine.pool, 'checkout', pool_stats.on_checkout)
+    event.listen(engine.pool, 'checkin', pool_stats.on_checkin)
+    event.listen(engine.pool, 'invalidate', pool_stats.on_invalidate)
+
+
+def pool_status(app):
+    """Return pool configuration and usage for the current worker."""
+    with app.app_context():
+        pool = db.engine.pool
+    status = {'pool': type(pool).__name__, 'status': pool.status()}
+    for attr in ('size', 'overflow', 'checkedin', 'checkedout'):
+        method = getattr(pool, attr, None)
+        if callable(method):
+            status[attr] = method()
+    status.update(pool_stats.to_dict())
+    return status
@@ -0,0 +1,130 @@
+"""
+Duplicate lead detection.
+
+Every submission stores normalized keys (email_key, phone_key) next to the
+raw values, both indexed with created_at. contact() probes them once to
+catch a repeat within DEDUPE_WINDOW_HOURS, and `flask dedupe-submissions`
+groups the existing rows into clusters in a single pass over the table.
+"""
+import re
+from datetime import datetime, timedelta
+
+from models import db, Submission, VersionStamp
+
+MIN_PHONE_DIGITS = 7
+
+
+def normalize_email(email):
+    email = (email or '').strip().lower()
+    return email or None
+
+
+def normalize_phone(number):
+    """
+    Reduce a WhatsApp number to E.164 form: '+' followed by digits only.
+
+    A leading 00 international prefix is dropped. Numbers typed without a
+    country code are kept as entered, since the free-text country field
+    cannot reliably supply one. Anything too short to be a real number gets
+    no key, so placeholder values never group unrelated leads.
+    """
+    digits = re.sub(r'\D', '', number or '')
+    if digits.startswith('00'):
+        digits = digits[2:]
+    return '+' + digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def submission_keys(email, whatsapp_number):
+    return {'email_key': normalize_email(email), 'phone_key': normalize_phone(whatsapp_number)}
+
+
+def recent_duplicate_query(email_key, phone_key, window_hours):
+    """
+    Original submissions sharing a key within the window (None without keys).
+
+    SQLite answers this with one range probe on each key index. There is no
+    ORDER BY, because any original in the window is a good merge target and
+    sorting would cost a temp b-tree.
+    """
+    matches = []
+    if email_key:
+        matches.append(Submission.email_key == email_key)
+    if phone_key:
+        matches.append(Submission.phone_key == phone_key)
+    if not matches:
+        return None
+    since = datetime.utcnow() - timedelta(hours=window_hours)
+    return Submission.query.filter(db.or_(*matches), Submission.created_at >= since,
+                                   Submission.duplicate_of_id.is_(None))
+
+
+def find_recent_duplicate(email_key, phone_key, window_hours):
+    """Return an original submission sharing a key within the window, or None."""
+    query = recent_duplicate_query(email_key, phone_key, window_hours)
+    return query.first() if query is not None else None
+
+
+def merge_repeat(original, message, plan_selected):
+    """Fold a repeat submission into the original instead of inserting a new row."""
+    original.repeat_count = (original.repeat_count or 0) + 1
+    original.last_submitted_at = datetime.utcnow()
+    if plan_selected:
+        original.plan_selected = plan_selected
+    message = (message or '').strip()
+    if message and message not in (original.message or ''):
+        original.message = f"{original.message}\n\n{message}" if original.message else message
+    # Cached Excel/PDF/Word exports may hold the old plan and message
+    VersionStamp.bump('submissions')
+
+
+def find_clusters(batch_size=5000):
+    """
+    Group submissions that share an email or phone key.
+
+    Rows are read once in id order and merged with union-find, so the cost is
+    linear in the table size. Returns {submission id: id of the earliest
+    submission in its cluster} for every row that belongs to a cluster other
+    than as its root.
+    """
+    owner = {}   # key -> first submission id seen with it
+    parent = {}  # submission id -> id it was merged into
+
+    def find(row_id):
+        root = row_id
+        while root in parent:
+            root = parent[root]
+        while row_id != root:
+            parent[row_id], row_id = root, parent[row_id]
+        return root
+
+    rows = db.session.query(Submission.id, Submission.email_key, Submission.phone_key) \
+        .order_by(Submission.id).yield_per(batch_size)
+    for row_id, email_key, phone_key in rows:
+        keys = [('e', email_key)] if email_key else []
+        if phone_key:
+            keys.append(('p', phone_key))
+        roots = {find(owner[key]) for key in keys if key in owner}
+        if roots:
+            root = min(roots)
+            for other in roots - {root}:
+                parent[other] = root
+            parent[row_id] = root
+        else:
+            root = row_id
+        for key in keys:
+            owner.setdefault(key, root)
+
+    return {row_id: find(row_id) for row_id in list(parent)}
+
+
+def apply_clusters(clusters, batch_size=5000):
+    """Point every duplicate at its cluster root. Returns the number of rows changed."""
+    current = dict(db.session.query(Submission.id, Submission.duplicate_of_id)
+                   .filter(Submission.duplicate_of_id.isnot(None)))
+    changes = [{'row_id': row_id, 'root': root} for row_id, root in clusters.items() if current.get(row_id) != root]
+    table = Submission.__table__
+    statement = table.update().where(table.c.id == db.bindparam('row_id')).values(duplicate_of_id=db.bindparam('root'))
+    for start in range(0, len(changes), batch_size):
+        db.session.connection().execute(statement, changes[start:start + batch_size])
+        db.session.commit()
+    return len(changes)
@@ -0,0 +1,351 @@
+"""
+Document exports (Excel, PDF, Word) and the background job runner that builds them.
+
+These formats need the whole document assembled before it can be sent, so
+they run outside the request in a small thread pool. Finished files are kept
+in EXPORT_DIR and reused for as long as the submissions data is unchanged.
+
+Each format registers its builder with @document_export. Builders import
+their backend (openpyxl, reportlab, python-docx) inside the function, so a
+worker only loads a library the first time someone exports that format.
+`flask import-report` shows what this saves at startup.
+"""
+import io
+import json
+import os
+import re
+import time
+import uuid
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+from models import db, Submission, ExportJob, VersionStamp
+import metrics
+
+_executor = None
+
+# Formats built in the background: format -> ExportFormat
+DOCUMENT_EXPORTS = {}
+# modules: the backend the builder imports on first use
+ExportFormat = namedtuple('ExportFormat', 'extension mimetype builder modules')
+
+
+def document_export(format, extension, mimetype, modules=()):
+    """Register the decorated function as the builder for format."""
+    def register(builder):
+        DOCUMENT_EXPORTS[format] = ExportFormat(extension, mimetype, builder, tuple(modules))
+        return builder
+    return register
+
+
+EXPORT_HEADER = ['Date', 'Name', 'Business', 'Email', 'WhatsApp', 'Country', 'Plan', 'Message', 'Status']
+# PDF and Word show a narrower set of columns: (header, PDF column width in points)
+DOCUMENT_COLUMNS = [('Date', 62), ('Name', 120), ('Business', 130), ('Email', 190), ('Plan', 62), ('Status', 70)]
+# Characters XML 1.0 cannot hold at all (python-docx would refuse them too)
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def document_row(sub):
+    return [
+        sub.created_at.strftime('%Y-%m-%d'),
+        sub.full_name,
+        sub.business_name,
+        sub.email,
+        sub.plan_selected,
+        sub.status
+    ]
+
+
+@document_export('excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                 modules=['openpyxl'])
+def build_excel(filepath, batches):
+    """Stream rows into a write-only workbook, so memory stays flat however many rows there are."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Submissions")
+    ws.append(EXPORT_HEADER)
+    for batch in batches:
+        for sub in batch:
+            ws.append([
+                sub.created_at.strftime('%Y-%m-%d %H:%M'),
+                sub.full_name,
+                sub.business_name,
+                sub.email,
+                sub.whatsapp_number,
+                sub.country,
+                sub.plan_selected,
+                sub.message,
+                sub.status
+            ])
+    wb.save(filepath)
+
+
+PDF_MARGIN = 36
+PDF_TITLE_SPACE = 28
+PDF_HEADER_HEIGHT = 20
+PDF_ROW_HEIGHT = 14  # a row of single-line cells
+PDF_LINE_HEIGHT = 10  # added for each extra line of a wrapped cell
+PDF_FONT_SIZE = 8
+PDF_WIDEST_GLYPH = 1.015  # '@' in Helvetica, in ems
+
+
+def wrap_text(text, width, font, size):
+    """Break text into lines that fit in width points, splitting words wider than a line."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    text = str(text or '')
+    # Values too short to overflow even in the widest glyph need no measuring
+    if len(text) * size * PDF_WIDEST_GLYPH <= width or stringWidth(text, font, size) <= width:
+        return [text]
+    lines, line = [], ''
+    for word in text.split():
+        candidate = f'{line} {word}' if line else word
+        if stringWidth(candidate, font, size) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while stringWidth(word, font, size) > width:
+            cut = len(word) - 1
+            while cut > 1 and stringWidth(word[:cut], font, size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    lines.append(line)
+    return lines
+
+
+@document_export('pdf', 'pdf', 'application/pdf', modules=['reportlab.platypus'])
+def build_pdf(filepath, batches):
+    """
+    Draw one table per page straight onto the canvas.
+
+    Values too wide for their column wrap onto extra lines, so a row is as
+    tall as its longest cell. Each page is filled with as many rows as fit
+    under the header row. Each table is laid out once and never split, so
+    the cost is linear in the row count. Only one page of rows is in memory
+    at a time.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Table, TableStyle
+
+    width, height = landscape(letter)
+    col_widths = [col_width for _, col_width in DOCUMENT_COLUMNS]
+    padding = 6  # left and right cell padding
+    page_space = height - 2 * PDF_MARGIN - PDF_TITLE_SPACE - PDF_HEADER_HEIGHT
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), PDF_FONT_SIZE),
+        ('LEADING', (0, 0), (-1, -1), PDF_LINE_HEIGHT),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+    canvas = Canvas(filepath, pagesize=(width, height))
+    canvas.setTitle('WhatsFlow Submissions')
+    header = [name for name, _ in DOCUMENT_COLUMNS]
+
+    def draw_page(rows, row_heights, page_number):
+        top = height - PDF_MARGIN
+        canvas.setFont('Helvetica-Bold', 14)
+        canvas.drawString(PDF_MARGIN, top - 14, 'WhatsFlow Submissions')
+        canvas.setFont('Helvetica', PDF_FONT_SIZE)
+        canvas.drawRightString(width - PDF_MARGIN, top - 14, f'Page {page_number}')
+        table = Table([header] + rows, colWidths=col_widths,
+                      rowHeights=[PDF_HEADER_HEIGHT] + row_heights, style=style, repeatRows=1)
+        table_width, table_height = table.wrapOn(canvas, width, height)
+        table.drawOn(canvas, (width - table_width) / 2, top - PDF_TITLE_SPACE - table_height)
+        canvas.showPage()
+
+    page, row_heights, page_number = [], [], 0
+    for batch in batches:
+        for sub in batch:
+            cells = [wrap_text(value, col_width - padding, 'Helvetica', PDF_FONT_SIZE)
+                     for value, col_width in zip(document_row(sub), col_widths)]
+            row_height = PDF_ROW_HEIGHT + (max(len(lines) for lines in cells) - 1) * PDF_LINE_HEIGHT
+            if page and sum(row_heights) + row_height > page_space:
+                page_number += 1
+                draw_page(page, row_heights, page_number)
+                page, row_heights = [], []
+            page.append(['\n'.join(lines) for lines in cells])
+            row_heights.append(row_height)
+    if page or not page_number:
+        draw_page(page, row_heights, page_number + 1)
+    canvas.save()
+
+
+def word_row_xml(values, cell_properties):
+    cells = ''.join(
+        f'<w:tc>{properties}<w:p><w:r><w:t xml:space="preserve">'
+        f'{escape(XML_ILLEGAL.sub("", str(value or "")))}</w:t></w:r></w:p></w:tc>'
+        for value, properties in zip(values, cell_properties)
+    )
+    return f'<w:tr>{cells}</w:tr>'
+
+
+@document_export('word', 'docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                 modules=['docx'])
+def build_word(filepath, batches):
+    """
+    Lay out the document with python-docx, then stream the table rows in as XML.
+
+    Adding rows one by one through python-docx gets slower with every row
+    already in the table. Here python-docx only writes the heading and the
+    header row. The data rows are then written as plain XML, batch by batch,
+    into the copied word/document.xml, so the cost is linear and the rows are
+    never held in memory as a document tree.
+    """
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading('WhatsFlow Submissions', 0)
+
+    table = doc.add_table(rows=1, cols=len(DOCUMENT_COLUMNS))
+    for cell, (name, _) in zip(table.rows[0].cells, DOCUMENT_COLUMNS):
+        cell.text = name
+    cell_properties = [
+        f'<w:tcPr><w:tcW w:type="dxa" w:w="{grid_col.w.twips}"/></w:tcPr>'
+        for grid_col in table._tbl.tblGrid.gridCol_lst
+    ]
+
+    template = io.BytesIO()
+    doc.save(template)
+    with zipfile.ZipFile(template) as source, zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            if item.filename != 'word/document.xml':
+                target.writestr(item, source.read(item.filename))
+                continue
+            document = source.read(item.filename).decode('utf-8')
+            # The only table in the document ends with its header row
+            split_at = document.rindex('</w:tr>') + len('</w:tr>')
+            with target.open('word/document.xml', 'w', force_zip64=True) as out:
+                out.write(document[:split_at].encode('utf-8'))
+                for batch in batches:
+                    out.write(''.join(word_row_xml(document_row(sub), cell_properties) for sub in batch).encode('utf-8'))
+                out.write(document[split_at:].encode('utf-8'))
+
+
+def data_version():
+    """
+    Identify the current state of the submissions table.
+
+    New rows move max(id) and every status change bumps the 'submissions'
+    stamp, so two exports with the same version contain the same data.
+    """
+    max_id = db.session.query(db.func.max(Submission.id)).scalar() or 0
+    return f"{max_id}.{VersionStamp.current('submissions')}"
+
+
+def export_path(app, job):
+    return os.path.join(app.config['EXPORT_DIR'], job.filename)
+
+
+def find_reusable_job(app, format, version, params):
+    """Return a finished or in-flight job for the same format, filters and data version."""
+    stale_before = datetime.utcnow() - timedelta(seconds=app.config['EXPORT_JOB_TIMEOUT'])
+    jobs = ExportJob.query.filter_by(format=format, data_version=version, params=params) \
+        .filter(ExportJob.status.in_(['queued', 'running', 'done'])) \
+        .order_by(ExportJob.created_at.desc()).all()
+    for job in jobs:
+        if job.status == 'done' and os.path.exists(export_path(app, job)):
+            return job
+        # A job that never finished was most likely lost with its worker
+        if job.status in ('queued', 'running') and job.created_at >= stale_before:
+            return job
+    return None
+
+
+def start_export(app, format, filters, batches_factory):
+    """
+    Return a job for this export, reusing a cached artifact when the data is unchanged.
+
+    batches_factory is called inside the worker thread (with an app context)
+    and must return an iterable of row batches.
+    """
+    params = json.dumps(filters, sort_keys=True)
+    version = data_version()
+
+    job = find_reusable_job(app, format, version, params)
+    if job:
+        return job
+
+    extension = DOCUMENT_EXPORTS[format].extension
+    job = ExportJob(id=uuid.uuid4().hex, format=format, params=params, data_version=version)
+    job.filename = f'{job.id}.{extension}'
+    db.session.add(job)
+    db.session.commit()
+
+    get_executor(app).submit(run_export, app, job.id, batches_factory)
+    return job
+
+
+def get_executor(app):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=app.config['EXPORT_WORKERS'], thread_name_prefix='export')
+    return _executor
+
+
+def run_export(app, job_id, batches_factory):
+    with app.app_context():
+        job = db.session.get(ExportJob, job_id)
+        job.status = 'running'
+        db.session.commit()
+
+        export_dir = app.config['EXPORT_DIR']
+        os.makedirs(export_dir, exist_ok=True)
+        filepath = export_path(app, job)
+        partial = filepath + '.part'
+
+        export_format = job.format
+        started = time.perf_counter()
+        try:
+            builder = DOCUMENT_EXPORTS[export_format].builder
+            builder(partial, batches_factory())
+            # Publish atomically so a download never sees a half-written file
+            os.replace(partial, filepath)
+
+            job.status = 'done'
+            job.size = os.path.getsize(filepath)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            metrics.export_duration.labels(export_format).observe(time.perf_counter() - started)
+            metrics.export_size.labels(export_format).observe(job.size)
+            prune_superseded(app, job)
+        except Exception as e:
+            print(f"Export job {job_id} failed: {e}")
+            metrics.export_failures_total.labels(export_format).inc()
+            import traceback
+            traceback.print_exc()
+            db.session.rollback()
+            if os.path.exists(partial):
+                os.remove(partial)
+            job = db.session.get(ExportJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def prune_superseded(app, job):
+    """Delete artifacts of older data versions for the same format and filters."""
+    older = ExportJob.query.filter_by(format=job.format, params=job.params, status='done') \
+        .filter(ExportJob.id != job.id, ExportJob.data_version != job.data_version).all()
+    for old in older:
+        path = export_path(app, old)
+        if os.path.exists(path):
+            os.remove(path)
+        old.status = 'expired'
+    db.session.commit()
@@ -0,0 +1,197 @@
+"""
+Group commit for new contact form submissions.
+
+With GROUP_COMMIT_ENABLED, request threads do not commit their submission
+themselves. They queue it for one writer thread per worker. The writer
+inserts everything queued within GROUP_COMMIT_MAX_DELAY_MS, up to
+GROUP_COMMIT_MAX_ROWS rows, in a single transaction. Each request waits
+until the transaction holding its row has committed, so the success page
+still means the lead is stored. SQLite then pays for one commit per batch
+instead of one per request. A request that times out while its row is still
+queued withdraws the row, so an error page likewise means nothing was stored.
+
+Batching only happens between requests served by the same process, so it
+needs threaded workers (GUNICORN_THREADS > 1).
+"""
+import queue
+import threading
+import time
+
+from models import db, Submission
+from outbox import enqueue_submission_email
+import metrics
+import rollups
+import stats
+
+# Seconds a request waits for its batch before giving up
+SUBMIT_TIMEOUT = 30
+
+_committer = None
+_committer_lock = threading.Lock()
+
+
+def add_submissions(app, entries):
+    """
+    Add new submissions, given as (values, notify) pairs, to the current transaction.
+
+    Counters and rollups are adjusted once for the whole group, so a batch
+    costs a few UPDATEs plus its INSERTs rather than several statements a row.
+    """
+    submissions = []
+    for values, notify in entries:
+        submission = Submission(**values)
+        db.session.add(submission)
+        # Queued in the same transaction; `flask send-outbox` delivers it
+        if notify:
+            enqueue_submission_email(app, submission)
+        submissions.append(submission)
+    stats.record_new_submissions(submission.status for submission in submissions)
+    rollups.record_new_submissions(submissions)
+    return submissions
+
+
+class PendingWrite:
+    def __init__(self, values, notify):
+        self.values = values
+        self.notify = notify
+        self.done = threading.Event()
+        self.submission_id = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._state = 'queued'  # then 'claimed' by the writer or 'abandoned' by the request
+
+    def claim(self):
+        """Called by the writer. False if the request gave up, so the row must not be written."""
+        with self._lock:
+            if self._state == 'abandoned':
+                return False
+            self._state = 'claimed'
+            return True
+
+    def abandon(self):
+        """Called by the request on timeout. False if the writer already has the row."""
+        with self._lock:
+            if self._state == 'claimed':
+                return False
+            self._state = 'abandoned'
+            return True
+
+
+class GroupCommitter:
+    """Writer thread that commits queued submissions in batches."""
+
+    def __init__(self, app):
+        self.app = app
+        self.max_rows = max(app.config['GROUP_COMMIT_MAX_ROWS'], 1)
+        self.max_delay = app.config['GROUP_COMMIT_MAX_DELAY_MS'] / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, values, notify):
+        """Queue one submission and block until it is committed. Returns its id."""
+        self._ensure_started()
+        # A waiting request must not hold a pooled connection the writer may need
+        db.session.close()
+        write = PendingWrite(values, notify)
+        self._queue.put(write)
+        if not write.done.wait(SUBMIT_TIMEOUT):
+            # Only report a failure the row cannot outlive, or a resubmission would duplicate it
+            if write.abandon():
+                raise TimeoutError(f'Submission not written within {SUBMIT_TIMEOUT}s')
+            write.done.wait()
+        if write.error:
+            raise write.error
+        return write.submission_id
+
+    def _ensure_started(self):
+        # Started on first use, so it runs in the gunicorn worker rather than the master
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = []
+        while not batch:
+            write = self._queue.get()
+            if write.claim():
+                batch.append(write)
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                write = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write.claim():
+                batch.append(write)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            with self.app.app_context():
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # Never leave a request waiting, whatever went wrong
+                    for write in batch:
+                        if not write.done.is_set():
+                            write.error = e
+                            write.done.set()
+                finally:
+                    db.session.remove()
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            submissions = add_submissions(self.app, [(write.values, write.notify) for write in batch])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                batch[0].error = e
+                batch[0].done.set()
+                return
+            # One bad row must not fail the whole batch, so fall back to a commit per row
+            self.app.logger.warning('Group commit of %d submissions failed, retrying one by one',
+                                    len(batch), exc_info=True)
+            metrics.group_commit_fallbacks_total.inc()
+            for write in batch:
+                self._write_one(write)
+            return
+
+        metrics.group_commit_batch_size.observe(len(batch))
+        metrics.group_commit_seconds.observe(time.perf_counter() - started)
+        for write, submission in zip(batch, submissions):
+            write.submission_id = submission.id
+            write.done.set()
+
+    def _write_one(self, write):
+        try:
+            submission, = add_submissions(self.app, [(write.values, write.notify)])
+            db.session.commit()
+            write.submission_id = submission.id
+        except Exception as e:
+            db.session.rollback()
+            write.error = e
+        finally:
+            write.done.set()
+
+
+def get_committer(app):
+    global _committer
+    with _committer_lock:
+        if _committer is None:
+            _committer = GroupCommitter(app)
+    return _committer
+
+
+def save_submission(app, values, notify):
+    """Store a new submission, through the group committer when it is enabled. Returns its id."""
+    if app.config['GROUP_COMMIT_ENABLED']:
+        return get_committer(app).submit(values, notify)
+    submission, = add_submissions(app, [(values, notify)])
+    db.session.commit()
+    return submission.id
@@ -0,0 +1,31 @@
+"""
+Gunicorn settings, picked up automatically from the working directory
+(or explicitly with `gunicorn -c gunicorn.conf.py app:app`).
+
+Also prepares the directory prometheus_client uses to sum /metrics over
+all workers. The `flask send-outbox` mailer can point its own
+PROMETHEUS_MULTIPROC_DIR at the same directory so SMTP metrics show up too.
+"""
+import os
+import shutil
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# More than one thread selects gthread workers, which group commit needs to batch anything
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Must be in the environment before the app (and prometheus_client) is imported
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'metrics'))
+
+
+def on_starting(server):
+    # Samples from a previous run would be summed with the new workers'
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
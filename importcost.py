@@ -0,0 +1,56 @@
+"""
+Import cost of the app, for `flask import-report`.
+
+Each measurement runs in a fresh interpreter with `python -X importtime`, so
+modules already loaded by the CLI process do not hide their cost. The child
+reports its peak RSS once the imports are done.
+"""
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+REPORT_RSS = "import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+
+def measure(modules, cwd=None):
+    """
+    Import modules in a new interpreter.
+
+    Returns (peak RSS in KiB, {module imported directly: cumulative seconds},
+    {top-level package: seconds}) where each package is charged its own
+    import time, not its callers'.
+    """
+    code = ''.join(f'import {module}; ' for module in modules) + REPORT_RSS
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=cwd, capture_output=True, text=True, check=True)
+    direct = {}
+    per_package = defaultdict(float)
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        per_package[name.split('.')[0]] += int(self_us) / 1e6
+        if len(indent) == 1:
+            direct[name] = int(cumulative_us) / 1e6
+    rss_kib = int(result.stdout.strip().splitlines()[-1])
+    return rss_kib, direct, dict(per_package)
+
+
+def import_report(app_module, document_exports, cwd=None):
+    """
+    Cost of importing the app, then the extra cost of each export backend on top of it.
+
+    Returns (app seconds, app RSS KiB, {package: seconds},
+    {format: (extra seconds, extra RSS KiB)}).
+    """
+    rss_kib, direct, per_package = measure([app_module], cwd=cwd)
+    backends = {}
+    for format, export_format in document_exports.items():
+        backend_rss, backend_direct, _ = measure([app_module, *export_format.modules], cwd=cwd)
+        # Everything imported for the first time after the app is the backend's cost
+        extra = sum(seconds for name, seconds in backend_direct.items() if name not in direct)
+        backends[format] = (extra, backend_rss - rss_kib)
+    return direct[app_module], rss_kib, per_package, backends
@@ -0,0 +1,197 @@
+"""
+Bulk import of submissions from the files `export_data` produces.
+
+Accepts CSV, JSON, NDJSON and XLSX in the export column layout, validates
+each row and inserts the valid ones with executemany-style bulk inserts,
+one transaction per batch.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, Submission, SUBMISSION_STATUSES
+from dedupe import submission_keys
+import stats
+import rollups
+
+# Export headers (CSV/XLSX), export JSON keys and model column names all map to a column
+FIELD_ALIASES = {
+    'date': 'created_at', 'created_at': 'created_at',
+    'name': 'full_name', 'full_name': 'full_name',
+    'business': 'business_name', 'business_name': 'business_name',
+    'email': 'email',
+    'whatsapp': 'whatsapp_number', 'whatsapp_number': 'whatsapp_number',
+    'country': 'country',
+    'plan': 'plan_selected', 'plan_selected': 'plan_selected',
+    'message': 'message',
+    'status': 'status',
+}
+
+REQUIRED_FIELDS = ['full_name', 'business_name', 'email', 'whatsapp_number', 'country', 'plan_selected']
+
+DATE_FORMATS = ['%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d']
+
+
+class ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.errors = []  # (row number, message)
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def to_dict(self, max_errors=None):
+        return {
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'errors': [{'row': row, 'error': error} for row, error in self.errors[:max_errors]],
+        }
+
+
+class RejectedRow:
+    """Stands in for a line read_rows could not parse, so it is reported like an invalid row."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'csv': 'csv', 'json': 'json', 'ndjson': 'ndjson', 'jsonl': 'ndjson', 'xlsx': 'xlsx'}.get(extension)
+
+
+def read_rows(stream, format):
+    """Yield (row number, raw dict) pairs from a binary stream in the given format."""
+    if format == 'csv':
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        for number, row in enumerate(reader, start=2):
+            yield number, row
+    elif format == 'json':
+        data = json.load(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+        if not isinstance(data, list):
+            raise ValueError('JSON imports must contain a list of submissions')
+        for number, row in enumerate(data, start=1):
+            yield number, row
+    elif format == 'ndjson':
+        for number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, RejectedRow(f'invalid JSON: {e.msg}')
+                continue
+            yield number, row if isinstance(row, dict) else RejectedRow('row is not an object')
+    elif format == 'xlsx':
+        from openpyxl import load_workbook
+        wb = load_workbook(stream, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(cell or '').strip() for cell in next(rows, [])]
+        for number, values in enumerate(rows, start=2):
+            if any(value not in (None, '') for value in values):
+                yield number, dict(zip(header, values))
+        wb.close()
+    else:
+        raise ValueError(f'Unsupported import format: {format}')
+
+
+def parse_date(value):
+    if value in (None, ''):
+        return datetime.utcnow()
+    if isinstance(value, datetime):
+        return value
+    value = str(value).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value)
+
+
+def validate_row(raw):
+    """Map a raw row onto Submission columns. Returns (values, None) or (None, error)."""
+    if isinstance(raw, RejectedRow):
+        return None, raw.error
+    if not isinstance(raw, dict):
+        return None, 'row is not an object'
+
+    values = {}
+    for key, value in raw.items():
+        column = FIELD_ALIASES.get(str(key or '').strip().lower())
+        if column:
+            values[column] = value.strip() if isinstance(value, str) else value
+
+    missing = [field for field in REQUIRED_FIELDS if values.get(field) in (None, '')]
+    if missing:
+        return None, f"missing {', '.join(missing)}"
+
+    for field in REQUIRED_FIELDS + ['message']:
+        if values.get(field) is not None:
+            values[field] = str(values[field])
+            limit = Submission.__table__.c[field].type.length
+            if limit and len(values[field]) > limit:
+                return None, f'{field} is longer than {limit} characters'
+
+    if '@' not in values['email']:
+        return None, f"invalid email {values['email']!r}"
+
+    values['status'] = (values.get('status') or 'pending').lower()
+    if values['status'] not in SUBMISSION_STATUSES:
+        return None, f"unknown status {values['status']!r}"
+
+    try:
+        values['created_at'] = parse_date(values.get('created_at'))
+    except (TypeError, ValueError):
+        return None, f"invalid date {raw.get('Date', raw.get('date'))!r}"
+
+    values.setdefault('message', None)
+    values.update(submission_keys(values['email'], values['whatsapp_number']))
+    return values, None
+
+
+def insert_batch(batch):
+    """Insert one batch with a single executemany and keep the dashboard counters and rollups in step."""
+    db.session.execute(db.insert(Submission), batch)
+    deltas = {}
+    for values in batch:
+        deltas[values['status']] = deltas.get(values['status'], 0) + 1
+    stats.adjust_counters(deltas)
+    rollups.record_batch(batch)
+    db.session.commit()
+
+
+def import_rows(rows, batch_size=None):
+    """Validate (row number, raw dict) pairs and bulk insert the valid ones."""
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    report = ImportReport()
+    batch = []
+    try:
+        for number, raw in rows:
+            values, error = validate_row(raw)
+            if error:
+                report.errors.append((number, error))
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                insert_batch(batch)
+                report.inserted += len(batch)
+                batch = []
+        if batch:
+            insert_batch(batch)
+            report.inserted += len(batch)
+    except Exception:
+        db.session.rollback()
+        raise
+    return report
+
+
+def import_file(stream, filename, format=None, batch_size=None):
+    format = format or detect_format(filename)
+    if not format:
+        raise ValueError('Could not tell the file format; use .csv, .json, .ndjson or .xlsx')
+    return import_rows(read_rows(stream, format), batch_size=batch_size)
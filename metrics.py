@@ -0,0 +1,131 @@
+"""
+Prometheus metrics: request latency, SQL per request, SMTP, exports, group commits and the DB pool.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR to an empty directory before the
+workers start (gunicorn.conf.py does this) so every worker writes its
+samples there and /metrics reports the sum over all of them. Without it the
+metrics cover the current process only, which is fine for `python app.py`.
+"""
+import os
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess, REGISTRY)
+from sqlalchemy import event
+
+from models import db
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    # Processes started outside gunicorn (e.g. the mailer) may be first to use it
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (10e3, 100e3, 1e6, 10e6, 50e6, 100e6, 500e6)
+BATCH_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+request_duration = Histogram(
+    'whatsflow_request_duration_seconds', 'Time spent handling a request (until the response is returned)',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS)
+requests_total = Counter(
+    'whatsflow_requests_total', 'Requests handled', ['endpoint', 'method', 'status'])
+request_sql_queries = Histogram(
+    'whatsflow_request_sql_queries', 'SQL statements executed per request', ['endpoint'], buckets=QUERY_COUNT_BUCKETS)
+request_sql_seconds = Histogram(
+    'whatsflow_request_sql_seconds', 'Total SQL time per request', ['endpoint'], buckets=LATENCY_BUCKETS)
+sql_queries_total = Counter('whatsflow_sql_queries_total', 'SQL statements executed, in and outside requests')
+sql_seconds_total = Counter('whatsflow_sql_seconds_total', 'Time spent executing SQL statements')
+
+smtp_send_seconds = Histogram('whatsflow_smtp_send_seconds', 'Time to send one email', buckets=LATENCY_BUCKETS)
+smtp_failures_total = Counter('whatsflow_smtp_failures_total', 'Failed SMTP operations', ['stage'])  # connect, send
+
+export_duration = Histogram(
+    'whatsflow_export_duration_seconds', 'Time to build a background export', ['format'], buckets=LATENCY_BUCKETS)
+export_size = Histogram('whatsflow_export_size_bytes', 'Size of finished exports', ['format'], buckets=SIZE_BUCKETS)
+export_failures_total = Counter('whatsflow_export_failures_total', 'Background exports that failed', ['format'])
+
+group_commit_batch_size = Histogram('whatsflow_group_commit_batch_rows', 'Submissions written per group commit',
+                                    buckets=BATCH_BUCKETS)
+group_commit_seconds = Histogram('whatsflow_group_commit_seconds', 'Time to write and commit one group of submissions',
+                                 buckets=LATENCY_BUCKETS)
+group_commit_fallbacks_total = Counter('whatsflow_group_commit_fallbacks_total',
+                                       'Group commits that failed and were retried one row at a time')
+
+pool_checked_out = Gauge('whatsflow_db_pool_checked_out', 'Connections currently checked out of the pool',
+                         multiprocess_mode='livesum')
+pool_connections = Gauge('whatsflow_db_pool_connections', 'Open pooled connections', multiprocess_mode='livesum')
+pool_checkouts_total = Counter('whatsflow_db_pool_checkouts_total', 'Connections checked out of the pool')
+pool_invalidated_total = Counter('whatsflow_db_pool_invalidated_total', 'Pooled connections invalidated after errors')
+
+
+def endpoint_label():
+    return request.endpoint or 'unmatched'
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    sql_queries_total.inc()
+    sql_seconds_total.inc(elapsed)
+    if has_request_context() and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.sql_seconds += elapsed
+
+
+def handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def start_request():
+    g.request_started = time.perf_counter()
+    g.sql_queries = 0
+    g.sql_seconds = 0.0
+
+
+def finish_request(response):
+    if 'request_started' not in g:
+        return response
+    endpoint = endpoint_label()
+    request_duration.labels(endpoint, request.method).observe(time.perf_counter() - g.request_started)
+    requests_total.labels(endpoint, request.method, str(response.status_code)).inc()
+    request_sql_queries.labels(endpoint).observe(g.sql_queries)
+    request_sql_seconds.labels(endpoint).observe(g.sql_seconds)
+    return response
+
+
+def configure_metrics(app):
+    """Hook request timing and SQLAlchemy engine/pool events into the metrics."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    with app.app_context():
+        engine = db.engine
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', handle_error)
+
+    event.listen(engine.pool, 'connect', lambda *args: pool_connections.inc())
+    event.listen(engine.pool, 'close', lambda *args: pool_connections.dec())
+    event.listen(engine.pool, 'checkout', lambda *args: (pool_checked_out.inc(), pool_checkouts_total.inc()))
+    event.listen(engine.pool, 'checkin', lambda *args: pool_checked_out.dec())
+    event.listen(engine.pool, 'invalidate', lambda *args: pool_invalidated_total.inc())
+
+    app.before_request(start_request)
+    app.after_request(finish_request)
+
+
+def render_latest():
+    """Return (body, content type) for the /metrics endpoint, summed over all workers."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,259 @@
+"""
+Versioned schema migrations.
+
+db.create_all() creates missing tables but never touches tables that
+already exist, so indexes and columns added to existing models (and objects
+create_all cannot express, like the FTS5 search table) are applied here.
+Each migration has an upgrade and a downgrade step run in its own
+transaction; the applied version is kept in the schema_version table.
+Upgrade steps are idempotent, so a fresh database simply runs them all.
+"""
+from sqlalchemy import text
+
+from models import db
+
+
+class Migration:
+    def __init__(self, version, description, upgrade, downgrade):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+        self.downgrade = downgrade
+
+
+def column_exists(conn, table, column):
+    return any(row[1] == column for row in conn.execute(text(f'PRAGMA table_info({table})')))
+
+
+SUBMISSION_INDEXES = {
+    'ix_submission_created_at': 'submission (created_at, id)',
+    'ix_submission_status_created_at': 'submission (status, created_at, id)',
+    'ix_submission_plan_created_at': 'submission (plan_selected, created_at, id)',
+    'ix_submission_country_created_at': 'submission (country, created_at, id)',
+    'ix_submission_email': 'submission (email)',
+    'ix_submission_full_name': 'submission (full_name, id)',
+    'ix_submission_business_name': 'submission (business_name, id)',
+}
+
+
+def add_submission_indexes(conn):
+    for name, target in SUBMISSION_INDEXES.items():
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {target}'))
+    conn.execute(text('ANALYZE submission'))
+
+
+def drop_submission_indexes(conn):
+    for name in SUBMISSION_INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+
+def create_submission_fts(conn):
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS submission_fts USING fts5("
+        "full_name, business_name, message, "
+        "content='submission', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS submission_fts_insert AFTER INSERT ON submission BEGIN "
+        "INSERT INTO submission_fts (rowid, full_name, business_name, message) "
+        "VALUES (new.id, new.full_name, new.business_name, new.message); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS submission_fts_delete AFTER DELETE ON submission BEGIN "
+        "INSERT INTO submission_fts (submission_fts, rowid, full_name, business_name, message) "
+        "VALUES ('delete', old.id, old.full_name, old.business_name, old.message); END"
+    ))
+    # Status changes do not touch the indexed columns, so they skip this trigger
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS submission_fts_update "
+        "AFTER UPDATE OF full_name, business_name, message ON submission BEGIN "
+        "INSERT INTO submission_fts (submission_fts, rowid, full_name, business_name, message) "
+        "VALUES ('delete', old.id, old.full_name, old.business_name, old.message); "
+        "INSERT INTO submission_fts (rowid, full_name, business_name, message) "
+        "VALUES (new.id, new.full_name, new.business_name, new.message); END"
+    ))
+    conn.execute(text("INSERT INTO submission_fts (submission_fts) VALUES ('rebuild')"))
+
+
+def drop_submission_fts(conn):
+    for trigger in ('submission_fts_insert', 'submission_fts_delete', 'submission_fts_update'):
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    conn.execute(text('DROP TABLE IF EXISTS submission_fts'))
+
+
+DEDUPE_COLUMNS = {
+    'email_key': 'VARCHAR(120)',
+    'phone_key': 'VARCHAR(24)',
+    'duplicate_of_id': 'INTEGER',
+    'repeat_count': 'INTEGER DEFAULT 0',
+    'last_submitted_at': 'DATETIME',
+}
+
+
+def add_dedupe_keys(conn, batch_size=5000):
+    from dedupe import submission_keys
+    for column, ddl in DEDUPE_COLUMNS.items():
+        if not column_exists(conn, 'submission', column):
+            conn.execute(text(f'ALTER TABLE submission ADD COLUMN {column} {ddl}'))
+
+    # Keys are normalized in Python (phone numbers need more than SQL string functions)
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            'SELECT id, email, whatsapp_number FROM submission WHERE id > :last_id ORDER BY id LIMIT :limit'
+        ), {'last_id': last_id, 'limit': batch_size}).fetchall()
+        if not rows:
+            break
+        conn.execute(
+            text('UPDATE submission SET email_key = :email_key, phone_key = :phone_key WHERE id = :id'),
+            [{'id': row.id, **submission_keys(row.email, row.whatsapp_number)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_submission_email_key ON submission (email_key, created_at)'))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_submission_phone_key ON submission (phone_key, created_at)'))
+    conn.execute(text('ANALYZE submission'))
+
+
+def drop_dedupe_keys(conn):
+    conn.execute(text('DROP INDEX IF EXISTS ix_submission_email_key'))
+    conn.execute(text('DROP INDEX IF EXISTS ix_submission_phone_key'))
+    for column in reversed(list(DEDUPE_COLUMNS)):
+        if column_exists(conn, 'submission', column):
+            conn.execute(text(f'ALTER TABLE submission DROP COLUMN {column}'))
+
+
+def add_credential_version(conn):
+    if not column_exists(conn, 'user', 'credential_version'):
+        conn.execute(text('ALTER TABLE user ADD COLUMN credential_version INTEGER NOT NULL DEFAULT 0'))
+
+
+def drop_credential_version(conn):
+    if column_exists(conn, 'user', 'credential_version'):
+        conn.execute(text('ALTER TABLE user DROP COLUMN credential_version'))
+
+
+# Changes to these columns are what a downstream sync needs to see
+TRACKED_COLUMNS = ('full_name', 'business_name', 'email', 'whatsapp_number', 'country', 'message',
+                   'plan_selected', 'status', 'duplicate_of_id', 'repeat_count', 'last_submitted_at')
+# SQLite serializes writers, so a sequence allocated from max(change_seq) always
+# commits in order and a reader can never see seq N+1 before seq N
+NEXT_CHANGE = ("change_seq = (SELECT coalesce(max(change_seq), 0) + 1 FROM submission), "
+               "updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now')")
+
+
+def add_change_tracking(conn):
+    for column, ddl in (('change_seq', 'INTEGER'), ('updated_at', 'DATETIME')):
+        if not column_exists(conn, 'submission', column):
+            conn.execute(text(f'ALTER TABLE submission ADD COLUMN {column} {ddl}'))
+
+    # Existing rows are numbered in insertion order, so new ones continue after max(id)
+    conn.execute(text(
+        'UPDATE submission SET change_seq = id, updated_at = coalesce(last_submitted_at, created_at) '
+        'WHERE change_seq IS NULL'
+    ))
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_submission_change_seq ON submission (change_seq)'))
+
+    # Triggers cover every write path, including bulk UPDATEs and executemany imports
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS submission_change_insert AFTER INSERT ON submission BEGIN "
+        f"UPDATE submission SET {NEXT_CHANGE} WHERE id = new.id; END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS submission_change_update "
+        f"AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON submission BEGIN "
+        f"UPDATE submission SET {NEXT_CHANGE} WHERE id = new.id; END"
+    ))
+    conn.execute(text('ANALYZE submission'))
+
+
+def drop_change_tracking(conn):
+    for trigger in ('submission_change_insert', 'submission_change_update'):
+        conn.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    conn.execute(text('DROP INDEX IF EXISTS ix_submission_change_seq'))
+    for column in ('updated_at', 'change_seq'):
+        if column_exists(conn, 'submission', column):
+            conn.execute(text(f'ALTER TABLE submission DROP COLUMN {column}'))
+
+
+def backfill_rollups(conn):
+    # The table itself comes from db.create_all()
+    conn.execute(text('DELETE FROM submission_rollup'))
+    conn.execute(text(
+        "INSERT INTO submission_rollup (day, country, plan_selected, status, count) "
+        "SELECT date(created_at), country, plan_selected, coalesce(status, 'pending'), count(*) "
+        "FROM submission GROUP BY 1, 2, 3, 4"
+    ))
+
+
+def drop_rollups(conn):
+    conn.execute(text('DROP TABLE IF EXISTS submission_rollup'))
+
+
+MIGRATIONS = [
+    Migration(1, 'Performance indexes on submission', add_submission_indexes, drop_submission_indexes),
+    Migration(2, 'Full-text search index on submission', create_submission_fts, drop_submission_fts),
+    Migration(3, 'Normalized contact keys for duplicate detection', add_dedupe_keys, drop_dedupe_keys),
+    Migration(4, 'Credential version on user', add_credential_version, drop_credential_version),
+    Migration(5, 'Change tracking on submission', add_change_tracking, drop_change_tracking),
+    Migration(6, 'Daily submission rollups for analytics', backfill_rollups, drop_rollups),
+]
+
+HEAD = MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def ensure_version_table(conn):
+    conn.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    if conn.execute(text('SELECT COUNT(*) FROM schema_version')).scalar() == 0:
+        conn.execute(text('INSERT INTO schema_version (version) VALUES (0)'))
+
+
+def current_version():
+    with db.engine.begin() as conn:
+        ensure_version_table(conn)
+        return conn.execute(text('SELECT version FROM schema_version')).scalar()
+
+
+def set_version(conn, version):
+    conn.execute(text('UPDATE schema_version SET version = :version'), {'version': version})
+
+
+def upgrade(target=HEAD):
+    """Create missing tables, then apply every migration up to target. Returns the versions applied."""
+    db.create_all()
+    applied = []
+    for migration in MIGRATIONS:
+        if current_version() < migration.version <= target:
+            with db.engine.begin() as conn:
+                migration.upgrade(conn)
+                set_version(conn, migration.version)
+            applied.append(migration)
+    return applied
+
+
+def downgrade(target):
+    """Revert migrations newer than target, newest first. Returns the versions reverted."""
+    reverted = []
+    for migration in reversed(MIGRATIONS):
+        if target < migration.version <= current_version():
+            with db.engine.begin() as conn:
+                migration.downgrade(conn)
+                set_version(conn, migration.version - 1)
+            reverted.append(migration)
+    return reverted
+
+
+def explain(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query or Core statement."""
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup or [])
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params)]
+
+
+def unindexed_steps(plan, table='submission'):
+    """Return the plan steps that scan table without an index or sort rows in a temp b-tree."""
+    return [step for step in plan
+            if (step.startswith('SCAN ' + table) and 'INDEX' not in step) or 'TEMP B-TREE' in step]
@@ -10,6 +10,15 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
     is_admin = db.Column(db.Boolean, default=False)
+    credential_version = db.Column(db.Integer, nullable=False, default=0)  # bumped to end existing sessions
+
+    def get_id(self):
+        # Sessions remember the credential version they were issued for
+        return f"{self.id}:{self.credential_version or 0}"
+
+    def revoke_sessions(self):
+        """Invalidate every session issued before this change of credentials."""
+        self.credential_version = (self.credential_version or 0) + 1
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -17,7 +26,25 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+SUBMISSION_STATUSES = ['pending', 'contacted', 'converted']
+
 class Submission(db.Model):
+    # Every index ends in id so keyset pagination on (column, id) can walk it;
+    # the leading column also serves plain filters on it. Kept in step with
+    # migrations 1, 3 and 5 in migrations.py for databases created before they existed.
+    __table_args__ = (
+        db.Index('ix_submission_created_at', 'created_at', 'id'),
+        db.Index('ix_submission_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_submission_plan_created_at', 'plan_selected', 'created_at', 'id'),
+        db.Index('ix_submission_country_created_at', 'country', 'created_at', 'id'),
+        db.Index('ix_submission_email', 'email'),
+        db.Index('ix_submission_full_name', 'full_name', 'id'),
+        db.Index('ix_submission_business_name', 'business_name', 'id'),
+        db.Index('ix_submission_email_key', 'email_key', 'created_at'),
+        db.Index('ix_submission_phone_key', 'phone_key', 'created_at'),
+        db.Index('ix_submission_change_seq', 'change_seq'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
     business_name = db.Column(db.String(100), nullable=False)
@@ -28,6 +55,16 @@ class Submission(db.Model):
     plan_selected = db.Column(db.String(20), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, contacted, converted
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Normalized contact keys for duplicate detection (see dedupe.py)
+    email_key = db.Column(db.String(120), nullable=True)
+    phone_key = db.Column(db.String(24), nullable=True)
+    duplicate_of_id = db.Column(db.Integer, nullable=True)  # original submission when flagged as a repeat
+    repeat_count = db.Column(db.Integer, default=0)  # repeats merged into this row
+    last_submitted_at = db.Column(db.DateTime, nullable=True)
+    # Change tracking for incremental exports: set by the triggers from
+    # migration 5 on insert and on every change to the lead's fields
+    change_seq = db.Column(db.Integer, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=True)
     
     def to_dict(self):
         return {
@@ -40,7 +77,11 @@ class Submission(db.Model):
             'message': self.message,
             'plan_selected': self.plan_selected,
             'status': self.status,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'duplicate_of_id': self.duplicate_of_id,
+            'repeat_count': self.repeat_count or 0,
+            'change_seq': self.change_seq,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
         }
 
 class PricingPlan(db.Model):
@@ -73,3 +114,82 @@ class PricingPlan(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
         }
 
+
+class VersionStamp(db.Model):
+    """Named counters bumped whenever the data they describe changes"""
+    key = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def current(cls, key):
+        """Return the current version for key (0 if it was never bumped)"""
+        stamp = db.session.get(cls, key)
+        return stamp.version if stamp else 0
+    
+    @classmethod
+    def bump(cls, key):
+        """Increment the version for key inside the caller's transaction"""
+        result = db.session.execute(
+            db.update(cls).where(cls.key == key).values(version=cls.version + 1, updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.add(cls(key=key, version=1))
+
+class ExportJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    format = db.Column(db.String(20), nullable=False)
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON-encoded filters
+    data_version = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    filename = db.Column(db.String(200), nullable=True)
+    size = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'size': self.size,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None,
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+
+class EmailOutbox(db.Model):
+    """Notification emails waiting to be delivered by the `flask send-outbox` worker"""
+    __table_args__ = (db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(30), nullable=False, default='new_submission')
+    submission_id = db.Column(db.Integer, db.ForeignKey('submission.id'), nullable=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    submission = db.relationship('Submission')
+
+class SubmissionCounter(db.Model):
+    """Running count of submissions per status, kept in step by the write paths"""
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class SubmissionRollup(db.Model):
+    """Submissions per creation day, country, plan and current status, kept in step by the write paths"""
+    # Rows are stored in primary key order, so a date range is one contiguous
+    # read and the per-day status series needs no sort
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    country = db.Column(db.String(50), primary_key=True)
+    plan_selected = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,160 @@
+"""
+Durable outbox for notification emails.
+
+contact() only adds an EmailOutbox row in the same transaction as the
+Submission. The `flask send-outbox` worker delivers pending rows over one
+reused SMTP connection, retrying failures with exponential backoff.
+"""
+import time
+from datetime import datetime, timedelta
+
+from flask import render_template
+from flask_mail import Message
+
+from models import db, EmailOutbox
+import metrics
+
+
+def enqueue_submission_email(app, submission):
+    """Queue the admin notification for a submission in the caller's transaction."""
+    db.session.add(EmailOutbox(
+        kind='new_submission',
+        submission=submission,
+        recipient=app.config['ADMIN_EMAIL'],
+        subject="New WhatsFlow Client Submission"
+    ))
+
+
+def claim_due(app, limit):
+    """
+    Mark up to limit due messages as 'sending' and return them.
+
+    Each row is claimed with a conditional UPDATE so two senders never pick
+    the same message. Rows left in 'sending' by a crashed sender become due
+    again after MAIL_OUTBOX_CLAIM_TIMEOUT seconds.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config['MAIL_OUTBOX_CLAIM_TIMEOUT'])
+    due = db.or_(
+        db.and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        db.and_(EmailOutbox.status == 'sending', EmailOutbox.next_attempt_at <= stale),
+    )
+    candidates = [row_id for (row_id,) in db.session.query(EmailOutbox.id).filter(due)
+                  .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit)]
+
+    claimed = []
+    for row_id in candidates:
+        result = db.session.execute(
+            db.update(EmailOutbox).where(EmailOutbox.id == row_id, due)
+            .values(status='sending', next_attempt_at=now)
+        )
+        if result.rowcount:
+            claimed.append(row_id)
+    db.session.commit()
+
+    if not claimed:
+        return []
+    return EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+
+def build_emails(app, messages):
+    """Turn claimed outbox rows into (Message, rows) pairs, folding new submissions into digests."""
+    emails = []
+    digests = {}
+    for row in messages:
+        if app.config['MAIL_OUTBOX_DIGEST'] and row.kind == 'new_submission':
+            digests.setdefault(row.recipient, []).append(row)
+            continue
+        emails.append((render_message(row), [row]))
+
+    for recipient, rows in digests.items():
+        if len(rows) == 1:
+            emails.append((render_message(rows[0]), rows))
+            continue
+        msg = Message(
+            subject=f"{len(rows)} New WhatsFlow Client Submissions",
+            recipients=[recipient],
+            html=render_template('email/digest.html', submissions=[row.submission for row in rows])
+        )
+        emails.append((msg, rows))
+    return emails
+
+
+def render_message(row):
+    return Message(
+        subject=row.subject,
+        recipients=[row.recipient],
+        html=render_template('email/new_submission.html', submission=row.submission)
+    )
+
+
+def record_failure(app, rows, error):
+    """Schedule a retry with exponential backoff, or give up after MAIL_OUTBOX_MAX_ATTEMPTS."""
+    now = datetime.utcnow()
+    for row in rows:
+        row.attempts = (row.attempts or 0) + 1
+        row.last_error = str(error)
+        if row.attempts >= app.config['MAIL_OUTBOX_MAX_ATTEMPTS']:
+            row.status = 'failed'
+            continue
+        delay = min(app.config['MAIL_OUTBOX_BACKOFF'] * 2 ** (row.attempts - 1), app.config['MAIL_OUTBOX_MAX_BACKOFF'])
+        row.status = 'pending'
+        row.next_attempt_at = now + timedelta(seconds=delay)
+    db.session.commit()
+
+
+def send_pending(app, mail):
+    """
+    Deliver one batch of due messages over a single SMTP connection.
+
+    Returns (sent, failed) counts of outbox rows.
+    """
+    messages = claim_due(app, app.config['MAIL_OUTBOX_BATCH_SIZE'])
+    if not messages:
+        return 0, 0
+
+    sent = failed = 0
+    try:
+        emails = build_emails(app, messages)
+        with mail.connect() as conn:
+            for msg, rows in emails:
+                started = time.perf_counter()
+                try:
+                    conn.send(msg)
+                except Exception as e:
+                    print(f"Email sending failed: {e}")
+                    metrics.smtp_failures_total.labels('send').inc()
+                    record_failure(app, rows, e)
+                    failed += len(rows)
+                    continue
+                metrics.smtp_send_seconds.observe(time.perf_counter() - started)
+                # Commit per email so a crash never re-sends what already went out
+                for row in rows:
+                    row.status = 'sent'
+                    row.sent_at = datetime.utcnow()
+                db.session.commit()
+                sent += len(rows)
+    except Exception as e:
+        # Connecting (or quitting) failed: everything still claimed is retried later
+        print(f"SMTP connection failed: {e}")
+        metrics.smtp_failures_total.labels('connect').inc()
+        db.session.rollback()
+        remaining = [row for row in messages if row.status == 'sending']
+        record_failure(app, remaining, e)
+        failed += len(remaining)
+    return sent, failed
+
+
+def run_sender(app, mail, once=False):
+    """Drain the outbox forever (or until empty when once=True)."""
+    interval = app.config['MAIL_OUTBOX_POLL_INTERVAL']
+    while True:
+        with app.app_context():
+            sent, failed = send_pending(app, mail)
+            db.session.remove()
+        if sent or failed:
+            print(f"Outbox: sent {sent}, failed {failed}")
+        if once and not (sent or failed):
+            return
+        if not (sent or failed):
+            time.sleep(interval)
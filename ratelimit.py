@@ -0,0 +1,143 @@
+"""
+Rate limiting and load shedding for the expensive public POST routes.
+
+Token buckets keyed by (route, client IP) live in a small SQLite file next
+to the app, so every gunicorn worker draws from the same buckets. Each
+check is one short BEGIN IMMEDIATE transaction. Separately, a fixed number
+of slot files capped with flock() bounds how many expensive requests run at
+once across all workers; when every slot is taken the request is shed with
+503 instead of queueing behind a busy worker.
+"""
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests, ServiceUnavailable
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process slots, rate limits still apply
+    fcntl = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+_local = threading.local()
+
+
+def parse_rate(rate):
+    """Parse '5/minute' into (capacity, tokens per second)."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(second|minute|hour|day)\s*', rate or '')
+    if not match:
+        raise ValueError(f'invalid rate {rate!r}, expected e.g. "5/minute"')
+    count = int(match.group(1))
+    return count, count / PERIODS[match.group(2)]
+
+
+def get_connection(path):
+    """One connection per thread; the bucket table is created on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=1.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+        connections[path] = conn
+    return conn
+
+
+def take_token(path, key, capacity, refill_rate):
+    """
+    Take one token from the bucket for key.
+
+    Returns 0 when the request may proceed, otherwise the number of seconds
+    until a token will be available.
+    """
+    conn = get_connection(path)
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+        tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * refill_rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) / refill_rate
+        conn.execute('INSERT INTO bucket (key, tokens, updated) VALUES (?, ?, ?) '
+                     'ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated',
+                     (key, tokens, now))
+        # Buckets idle for a day are full again, so dropping them changes nothing
+        if random.random() < 0.001:
+            conn.execute('DELETE FROM bucket WHERE updated < ?', (now - 86400,))
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return wait
+
+
+def acquire_slot(slot_dir, slots):
+    """Lock one of slots slot files without blocking. Returns the open file, or None if all are busy."""
+    os.makedirs(slot_dir, exist_ok=True)
+    for index in random.sample(range(slots), slots):
+        handle = open(os.path.join(slot_dir, f'slot-{index}.lock'), 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return handle
+        except OSError:
+            handle.close()
+    return None
+
+
+def release_slot(handle):
+    fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+
+
+def rate_limited(name, rate_setting, methods=('POST',)):
+    """
+    Apply the token bucket configured in rate_setting (e.g. '5/minute') and
+    the shared concurrency cap to a view, for the given methods only.
+
+    Raises 429 with Retry-After when the client's bucket is empty and 503
+    when every concurrency slot is busy. If the limiter store itself fails,
+    the request is let through, because a limiter outage must never take the
+    site down.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if not config['RATELIMIT_ENABLED'] or request.method not in methods:
+                return view(*args, **kwargs)
+
+            capacity, refill_rate = parse_rate(config[rate_setting])
+            try:
+                wait = take_token(config['RATELIMIT_STORAGE'], f'{name}:{request.remote_addr}', capacity, refill_rate)
+            except sqlite3.Error as e:
+                print(f"Rate limiter unavailable: {e}")
+                wait = 0
+            if wait:
+                raise TooManyRequests(retry_after=max(1, int(wait + 0.999)))
+
+            slots = config['LOAD_SHED_MAX_CONCURRENT']
+            if not slots or fcntl is None:
+                return view(*args, **kwargs)
+            handle = acquire_slot(config['LOAD_SHED_SLOT_DIR'], slots)
+            if handle is None:
+                raise ServiceUnavailable(retry_after=1)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                release_slot(handle)
+        return wrapper
+    return decorator
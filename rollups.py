@@ -0,0 +1,162 @@
+"""
+Daily lead rollups for the dashboard charts.
+
+SubmissionRollup holds one count per (creation day, country, plan, status).
+The write paths adjust it in the same transaction as the submissions they
+change, so charts read a few hundred rollup rows instead of scanning the
+submissions table. A lead that changes status moves between buckets of the
+day it was created, which makes each day a cohort: its converted count is
+how many of that day's leads have converted so far.
+"""
+from datetime import date, datetime, timedelta
+
+from models import db, Submission, SubmissionRollup, SUBMISSION_STATUSES
+
+ROLLUP_COLUMNS = (SubmissionRollup.day, SubmissionRollup.country, SubmissionRollup.plan_selected,
+                  SubmissionRollup.status)
+
+
+def as_day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
+
+
+def rollup_key(created_at, country, plan_selected, status):
+    return (as_day(created_at), country, plan_selected, status or 'pending')
+
+
+def submission_key(submission):
+    return rollup_key(submission.created_at, submission.country, submission.plan_selected, submission.status)
+
+
+def adjust_rollups(deltas):
+    """
+    Apply {rollup key: delta} inside the caller's transaction.
+
+    Every bucket is upserted by a single executemany, so an import batch
+    spread over many days costs one statement instead of one per bucket.
+    """
+    rows = [{'day': day, 'country': country, 'plan_selected': plan_selected, 'status': status, 'count': delta}
+            for (day, country, plan_selected, status), delta in deltas.items() if delta]
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f'Rollup upserts are not supported on {dialect}')
+    statement = insert(SubmissionRollup)
+    statement = statement.on_conflict_do_update(
+        index_elements=[SubmissionRollup.day, SubmissionRollup.status, SubmissionRollup.country,
+                        SubmissionRollup.plan_selected],
+        set_={'count': SubmissionRollup.count + statement.excluded.count},
+    )
+    db.session.execute(statement, rows)
+
+
+def record_new_submissions(submissions):
+    deltas = {}
+    for submission in submissions:
+        # The default would only be filled in at flush time, after the bucket is chosen
+        if submission.created_at is None:
+            submission.created_at = datetime.utcnow()
+        key = submission_key(submission)
+        deltas[key] = deltas.get(key, 0) + 1
+    adjust_rollups(deltas)
+
+
+def record_move(old_key, new_key):
+    """Move one submission between buckets, e.g. after a status or plan change."""
+    if old_key != new_key:
+        adjust_rollups({old_key: -1, new_key: 1})
+
+
+def record_batch(rows):
+    """Count a batch of inserted row dicts (importer and seed)."""
+    deltas = {}
+    for row in rows:
+        key = rollup_key(row['created_at'], row['country'], row['plan_selected'], row.get('status'))
+        deltas[key] = deltas.get(key, 0) + 1
+    adjust_rollups(deltas)
+
+
+def grouped_rollups(condition=None):
+    """Count submissions per rollup key with one GROUP BY, optionally limited to condition."""
+    day = db.func.date(Submission.created_at)
+    status = db.func.coalesce(Submission.status, 'pending')
+    query = db.session.query(day, Submission.country, Submission.plan_selected, status, db.func.count(Submission.id))
+    if condition is not None:
+        query = query.filter(condition)
+    rows = query.group_by(day, Submission.country, Submission.plan_selected, status).all()
+    return {rollup_key(*row[:4]): row[4] for row in rows}
+
+
+def record_bulk_status_change(condition, new_status):
+    """Move every row matching condition to new_status. Run before the UPDATE itself."""
+    deltas = {}
+    for key, count in grouped_rollups(condition).items():
+        target = key[:3] + (new_status,)
+        if key != target:
+            deltas[key] = deltas.get(key, 0) - count
+            deltas[target] = deltas.get(target, 0) + count
+    adjust_rollups(deltas)
+
+
+def check_rollups():
+    """Return {rollup key: (stored, actual)} for every bucket where the two disagree."""
+    actual = grouped_rollups()
+    stored = {tuple(row[:4]): row[4] for row in db.session.query(*ROLLUP_COLUMNS, SubmissionRollup.count)}
+    return {key: (stored.get(key, 0), actual.get(key, 0))
+            for key in set(actual) | set(stored) if stored.get(key, 0) != actual.get(key, 0)}
+
+
+def rebuild_rollups():
+    """Replace the rollups with a fresh GROUP BY over the submissions table."""
+    SubmissionRollup.query.delete()
+    rows = [{'day': day, 'country': country, 'plan_selected': plan_selected, 'status': status, 'count': count}
+            for (day, country, plan_selected, status), count in grouped_rollups().items()]
+    if rows:
+        db.session.execute(db.insert(SubmissionRollup), rows)
+    db.session.commit()
+
+
+def analytics(days, top=10):
+    """Daily status counts for the last days days, and totals per country and plan, from the rollups only."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    in_range = SubmissionRollup.day >= since
+    total = db.func.sum(SubmissionRollup.count)
+
+    daily = {since + timedelta(days=offset): dict.fromkeys(SUBMISSION_STATUSES, 0) for offset in range(days)}
+    for day, status, count in db.session.query(SubmissionRollup.day, SubmissionRollup.status, total) \
+            .filter(in_range).group_by(SubmissionRollup.day, SubmissionRollup.status):
+        daily.setdefault(day, dict.fromkeys(SUBMISSION_STATUSES, 0))[status] = count
+
+    # One pass over the range serves both breakdowns
+    countries, plans = {}, {}
+    for country, plan_selected, status, count in db.session.query(
+            SubmissionRollup.country, SubmissionRollup.plan_selected, SubmissionRollup.status, total) \
+            .filter(in_range).group_by(SubmissionRollup.country, SubmissionRollup.plan_selected, SubmissionRollup.status):
+        for groups, name in ((countries, country), (plans, plan_selected)):
+            counts = groups.setdefault(name, dict.fromkeys(SUBMISSION_STATUSES, 0))
+            counts[status] = counts.get(status, 0) + count
+
+    def breakdown(groups):
+        rows = []
+        for name, counts in groups.items():
+            leads = sum(counts.values())
+            rows.append(dict(counts, name=name, total=leads,
+                             conversion_rate=round(counts['converted'] / leads, 4) if leads else 0))
+        return sorted(rows, key=lambda row: -row['total'])[:top]
+
+    return {
+        'days': days,
+        'since': since.isoformat(),
+        'daily': [dict(counts, day=day.isoformat(), total=sum(counts.values())) for day, counts in sorted(daily.items())],
+        'countries': breakdown(countries),
+        'plans': breakdown(plans),
+    }
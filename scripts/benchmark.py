@@ -0,0 +1,250 @@
+"""
+Local benchmark of the main public and admin routes.
+
+Builds a throwaway SQLite database seeded with synthetic submissions, drives
+the app in-process through the Flask test client and writes throughput and
+latency percentiles per scenario to a JSON file. Compare two runs to spot
+regressions between commits:
+
+    python scripts/benchmark.py --rows 100000 --output before.json
+    python scripts/benchmark.py --rows 100000 --output after.json --compare before.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ADMIN_EMAIL = 'bench@example.com'
+ADMIN_PASSWORD = 'benchmark-password'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples, elapsed, errors):
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
+
+
+def login(client):
+    response = client.post('/admin/login', data={'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f'benchmark login failed with {response.status_code}')
+
+
+def run_scenario(app, request_fn, iterations, concurrency, warmup, authenticated):
+    """Time request_fn(client, i) iterations times across concurrency threads, each with its own client."""
+    clients = []
+    for _ in range(concurrency):
+        client = app.test_client()
+        if authenticated:
+            login(client)
+        clients.append(client)
+    for i in range(warmup):
+        request_fn(clients[0], -i - 1)
+
+    def worker(worker_index):
+        samples, errors = [], 0
+        for i in range(worker_index, iterations, concurrency):
+            started = time.perf_counter()
+            ok = request_fn(clients[worker_index], i)
+            samples.append(time.perf_counter() - started)
+            errors += not ok
+        return samples, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    samples = [sample for worker_samples, _ in results for sample in worker_samples]
+    return summarize(samples, elapsed, sum(errors for _, errors in results))
+
+
+def get(path):
+    def request_fn(client, i):
+        response = client.get(path)
+        # Read the whole body so streamed responses are measured to the last byte
+        response.get_data()
+        return response.status_code == 200
+    return request_fn
+
+
+def post_contact(client, i):
+    response = client.post('/contact', data={
+        'full_name': f'Bench User {i}',
+        'business_name': 'Bench Bakery',
+        'email': f'bench{i}@example.com',
+        'whatsapp_number': f'+234{8000000000 + i}',
+        'country': 'Nigeria',
+        'plan_selected': 'Pro',
+        'message': 'Benchmark submission',
+    })
+    return response.status_code == 302
+
+
+def document_export(app, format):
+    """Build a document export from scratch: request it, wait for the job and download the file."""
+    from models import db, VersionStamp
+
+    def request_fn(client, i):
+        # A new data version forces a fresh build instead of reusing the cached artifact
+        with app.app_context():
+            VersionStamp.bump('submissions')
+            db.session.commit()
+        response = client.get(f'/admin/export/{format}', headers={'Accept': 'application/json'})
+        job = response.get_json()
+        while job and job['status'] in ('queued', 'running'):
+            time.sleep(0.01)
+            job = client.get(job['status_url'], headers={'Accept': 'application/json'}).get_json()
+        if not job or job['status'] != 'done':
+            return False
+        download = client.get(job['download_url'])
+        download.get_data()
+        return download.status_code == 200
+    return request_fn
+
+
+def scenarios(app, iterations):
+    """name -> (request function, iterations, authenticated)"""
+    export_iterations = max(1, iterations // 20)
+    return {
+        'GET /': (get('/'), iterations, False),
+        'GET /pricing': (get('/pricing'), iterations, False),
+        'POST /contact': (post_contact, iterations, False),
+        'GET /admin': (get('/admin'), iterations, True),
+        'GET /admin/submissions': (get('/admin/submissions'), iterations, True),
+        'GET /admin/submissions?sort=name': (get('/admin/submissions?sort=name&dir=asc'), iterations, True),
+        'GET /admin/export/csv': (get('/admin/export/csv'), export_iterations, True),
+        'GET /admin/export/ndjson': (get('/admin/export/ndjson'), export_iterations, True),
+        'GET /admin/export/json': (get('/admin/export/json'), export_iterations, True),
+        'GET /admin/export/excel': (document_export(app, 'excel'), export_iterations, True),
+        'GET /admin/export/pdf': (document_export(app, 'pdf'), export_iterations, True),
+        'GET /admin/export/word': (document_export(app, 'word'), export_iterations, True),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    """Print p50/p99/throughput changes against a previous results file."""
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('rows')} rows):")
+    print(f"{'scenario':<36} {'p50 ms':>18} {'p99 ms':>18} {'req/s':>18}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old:
+            continue
+        cells = []
+        for key in ('p50_ms', 'p99_ms', 'throughput_rps'):
+            change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0
+            cells.append(f"{result[key]:>9.1f} ({change:+5.0f}%)")
+        print(f"{name:<36} {cells[0]:>18} {cells[1]:>18} {cells[2]:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help='Synthetic submissions to seed (default: 10000).')
+    parser.add_argument('--iterations', type=int, default=200, help='Requests per scenario (exports run 1/20 of this).')
+    parser.add_argument('--concurrency', type=int, default=1, help='Client threads per scenario.')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed requests before each scenario.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data.')
+    parser.add_argument('--only', action='append', help='Run only scenarios containing this text (repeatable).')
+    parser.add_argument('--output', help='Results file (default: benchmark-<commit>.json).')
+    parser.add_argument('--compare', help='Previous results file to compare with.')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='whatsflow-bench-')
+    # Configure the app before it is imported
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['EXPORT_DIR'] = os.path.join(workdir, 'exports')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['USER_CACHE_STAMP_FILE'] = os.path.join(workdir, 'credentials.stamp')
+    os.environ['JINJA_BYTECODE_CACHE_DIR'] = os.path.join(workdir, 'jinja_cache')
+    os.environ['RATELIMIT_STORAGE'] = os.path.join(workdir, 'ratelimit.db')
+    os.environ['LOAD_SHED_SLOT_DIR'] = os.path.join(workdir, 'slots')
+    # Keep metrics in memory rather than in a gunicorn multiprocess directory
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    sys.path.insert(0, ROOT)
+
+    try:
+        from app import app
+        from models import db, User
+        import migrations
+        from init_pricing import init_pricing
+        from seed import seed_submissions
+
+        with app.app_context():
+            migrations.upgrade()
+            init_pricing()
+            user = User(email=ADMIN_EMAIL, is_admin=True)
+            user.set_password(ADMIN_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+            started = time.perf_counter()
+            seed_submissions(args.rows, seed=args.seed)
+            print(f"Seeded {args.rows} submissions in {time.perf_counter() - started:.1f}s")
+
+        results = {}
+        for name, (request_fn, iterations, authenticated) in scenarios(app, args.iterations).items():
+            if args.only and not any(text in name for text in args.only):
+                continue
+            result = run_scenario(app, request_fn, iterations, args.concurrency, min(args.warmup, iterations),
+                                  authenticated)
+            results[name] = result
+            print(f"{name:<36} p50 {result['p50_ms']:>9.2f} ms  p99 {result['p99_ms']:>9.2f} ms  "
+                  f"{result['throughput_rps']:>8.1f} req/s  errors {result['errors']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'rows': args.rows,
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    output = args.output or f"benchmark-{commit or 'local'}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
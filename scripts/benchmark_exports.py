@@ -0,0 +1,118 @@
+"""
+Build time and peak memory of the document exports (Excel, PDF, Word).
+
+Seeds a throwaway SQLite database, then builds each format in its own child
+process so the peak RSS reported belongs to that build alone:
+
+    python scripts/benchmark_exports.py --rows 100000
+    python scripts/benchmark_exports.py --rows 100000 --only pdf --output pdf.json
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ['excel', 'pdf', 'word']
+
+
+def peak_rss_mib():
+    # ru_maxrss survives fork and exec, so a child would report the parent's
+    # peak after seeding; the kernel's VmHWM starts over with each exec
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def configure(workdir):
+    """Point the app's database and working files at workdir before it is imported."""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(workdir, 'bench.db')
+    os.environ['EXPORT_DIR'] = os.path.join(workdir, 'exports')
+    os.environ['USER_CACHE_STAMP_FILE'] = os.path.join(workdir, 'credentials.stamp')
+    os.environ['JINJA_BYTECODE_CACHE_DIR'] = os.path.join(workdir, 'jinja_cache')
+    os.environ['RATELIMIT_STORAGE'] = os.path.join(workdir, 'ratelimit.db')
+    os.environ['LOAD_SHED_SLOT_DIR'] = os.path.join(workdir, 'slots')
+    os.environ['METRICS_ENABLED'] = 'false'
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    sys.path.insert(0, ROOT)
+
+
+def seed(workdir, rows, seed_value):
+    configure(workdir)
+    from app import app
+    import migrations
+    from seed import seed_submissions
+
+    with app.app_context():
+        migrations.upgrade()
+        started = time.perf_counter()
+        seed_submissions(rows, seed=seed_value)
+        print(f"Seeded {rows} submissions in {time.perf_counter() - started:.1f}s")
+
+
+def build(workdir, format):
+    """Child process: build one export and print its measurements as JSON."""
+    configure(workdir)
+    from app import app, iter_submission_batches
+    from exports import DOCUMENT_EXPORTS
+
+    export_format = DOCUMENT_EXPORTS[format]
+    filepath = os.path.join(workdir, f'export.{export_format.extension}')
+    with app.app_context():
+        baseline = peak_rss_mib()
+        started = time.perf_counter()
+        export_format.builder(filepath, iter_submission_batches({}))
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'seconds': round(elapsed, 2),
+        'peak_rss_mib': round(peak_rss_mib(), 1),
+        'build_rss_mib': round(peak_rss_mib() - baseline, 1),
+        'size_mib': round(os.path.getsize(filepath) / 2 ** 20, 2),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic submissions to seed (default: 100000).')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data.')
+    parser.add_argument('--only', action='append', choices=FORMATS, help='Build only this format (repeatable).')
+    parser.add_argument('--output', help='Results file (default: print only).')
+    parser.add_argument('--child', nargs=2, metavar=('WORKDIR', 'FORMAT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        build(*args.child)
+        return
+
+    workdir = tempfile.mkdtemp(prefix='whatsflow-export-bench-')
+    try:
+        seed(workdir, args.rows, args.seed)
+        results = {}
+        for format in args.only or FORMATS:
+            output = subprocess.run([sys.executable, __file__, '--child', workdir, format],
+                                    check=True, capture_output=True, text=True).stdout
+            results[format] = json.loads(output.strip().splitlines()[-1])
+            result = results[format]
+            print(f"{format:<6} {result['seconds']:>8.2f} s  peak RSS {result['peak_rss_mib']:>7.1f} MiB "
+                  f"(+{result['build_rss_mib']:.1f} for the build)  file {result['size_mib']:.2f} MiB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rows': args.rows, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,8 @@ elif [ -d ".venv" ]; then
     source .venv/bin/activate
 fi
 
-# Initialize database
-python -c "from app import app, db; app.app_context().push(); db.create_all(); print('Database tables created successfully!')"
+# Create tables and apply schema migrations (safe to re-run on an existing database)
+FLASK_APP=app.py flask db upgrade
 
 # Run pricing initialization
 python init_pricing.py
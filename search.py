@@ -0,0 +1,78 @@
+"""
+Full-text search over submissions, backed by an SQLite FTS5 index.
+
+submission_fts is an external-content FTS5 table over full_name,
+business_name and message. Triggers created by migration 2 keep it in sync
+on insert, delete and on updates to those columns, so every write path
+(the contact form, imports, bulk updates) is covered without code changes.
+"""
+import re
+
+import sqlalchemy as sa
+
+from models import db, Submission
+
+submission_fts = sa.table('submission_fts', sa.column('rowid'))
+
+# Column weights for bm25: a hit in the name counts most, the message least
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query where every word must match as a prefix.
+
+    Words are quoted so punctuation in user input can never produce an FTS5
+    syntax error.
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def fts_available():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def search_query(query, text, rank_window=None):
+    """
+    Restrict a Submission query to rows matching text, best matches first.
+
+    bm25 has to score every matching row before the first page can be
+    returned, so a word found in most submissions is slow to rank. With
+    rank_window set, only the newest rank_window matches are considered.
+
+    Returns None when text has no searchable words.
+    """
+    expression = match_expression(text)
+    if not expression:
+        return None
+
+    if not fts_available():
+        pattern = f'%{text.strip()}%'
+        return query.filter(db.or_(
+            Submission.full_name.ilike(pattern),
+            Submission.business_name.ilike(pattern),
+            Submission.message.ilike(pattern),
+        )).order_by(Submission.created_at.desc(), Submission.id.desc())
+
+    rank = sa.func.bm25(sa.literal_column('submission_fts'), *RANK_WEIGHTS)
+    query = query.join(submission_fts, submission_fts.c.rowid == Submission.id) \
+        .filter(sa.text('submission_fts MATCH :match').bindparams(match=expression))
+    if rank_window:
+        # FTS5 walks rowids in order cheaply, so finding the cutoff is fast
+        query = query.filter(sa.text(
+            'submission_fts.rowid >= coalesce((SELECT rowid FROM submission_fts '
+            'WHERE submission_fts MATCH :match ORDER BY rowid DESC LIMIT 1 OFFSET :cutoff), 0)'
+        ).bindparams(match=expression, cutoff=rank_window - 1))
+    return query.order_by(rank, Submission.id.desc())
+
+
+def window_truncated(text, rank_window):
+    """True when text matches more rows than rank_window, so older matches were left out."""
+    expression = match_expression(text)
+    if not rank_window or not expression or not fts_available():
+        return False
+    return db.session.execute(sa.text(
+        'SELECT 1 FROM submission_fts WHERE submission_fts MATCH :match '
+        'ORDER BY rowid DESC LIMIT 1 OFFSET :rank_window'
+    ), {'match': expression, 'rank_window': rank_window}).first() is not None
@@ -0,0 +1,98 @@
+"""
+Synthetic submissions for load tests and benchmarks.
+
+Rows look like real leads (names, businesses, E.164 numbers per country,
+plan and status mixes, some repeat contacts) and are reproducible for a
+given seed. They go through importer.insert_batch, so counters and the
+duplicate keys stay consistent with the rest of the table.
+"""
+import random
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from dedupe import submission_keys
+from importer import insert_batch
+
+FIRST_NAMES = ['Amina', 'Chinedu', 'Fatima', 'James', 'Grace', 'Kwame', 'Maria', 'David', 'Aisha', 'John',
+               'Wanjiru', 'Emeka', 'Sarah', 'Mohammed', 'Blessing', 'Peter', 'Zainab', 'Samuel', 'Linda', 'Tunde']
+LAST_NAMES = ['Okafor', 'Mensah', 'Smith', 'Kamau', 'Adeyemi', 'Johnson', 'Otieno', 'Garcia', 'Bello', 'Brown',
+              'Mwangi', 'Nwosu', 'Williams', 'Abubakar', 'Osei', 'Lopez', 'Ibrahim', 'Taylor', 'Njoroge', 'Eze']
+BUSINESS_WORDS = ['Sunrise', 'Golden', 'Prime', 'Urban', 'Royal', 'Blue', 'Green', 'Swift', 'Bright', 'Unity']
+BUSINESS_KINDS = ['Bakery', 'Salon', 'Pharmacy', 'Logistics', 'Fashion', 'Electronics', 'Clinic', 'Restaurant',
+                  'Realty', 'Supermarket', 'Travel', 'Academy']
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com']
+# country, calling code, weight
+COUNTRIES = [('Nigeria', '234', 30), ('Kenya', '254', 20), ('Ghana', '233', 12), ('United States', '1', 12),
+             ('South Africa', '27', 8), ('United Kingdom', '44', 8), ('India', '91', 6), ('Brazil', '55', 4)]
+PLANS = [('Starter', 50), ('Pro', 35), ('Business', 15)]
+STATUSES = [('pending', 60), ('contacted', 30), ('converted', 10)]
+MESSAGES = [
+    'We get {n} WhatsApp messages a day and need an auto-reply for {topic}.',
+    'Looking to send order updates and {topic} to our customers on WhatsApp.',
+    'Can your bot handle {topic} in more than one language?',
+    'We want a catalog bot so customers can browse and ask about {topic}.',
+    'Interested in broadcast campaigns for {topic}. How many contacts can we reach?',
+    '',
+]
+TOPICS = ['bookings', 'delivery tracking', 'payments', 'FAQs', 'promotions', 'appointment reminders',
+          'customer support', 'new arrivals']
+
+
+def weighted(rng, choices):
+    return rng.choices([value for value, weight in choices], weights=[weight for value, weight in choices])[0]
+
+
+def make_contact(rng, index):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    country, code, _ = rng.choices(COUNTRIES, weights=[c[2] for c in COUNTRIES])[0]
+    local_digits = 10 if code == '1' else 9
+    number = f"+{code} {rng.randrange(10 ** (local_digits - 1), 10 ** local_digits)}"
+    return {
+        'full_name': f'{first} {last}',
+        'business_name': f'{rng.choice(BUSINESS_WORDS)} {rng.choice(BUSINESS_KINDS)}',
+        'email': f'{first}.{last}{index}@{rng.choice(DOMAINS)}'.lower(),
+        'whatsapp_number': number,
+        'country': country,
+    }
+
+
+def generate_submissions(count, seed=0, days=365, repeat_rate=0.03, now=None):
+    """Yield count submission dicts, oldest first, spread over the last days days."""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    start = now - timedelta(days=days)
+    step = (now - start) / max(count, 1)
+    contacts = deque(maxlen=1000)  # repeats come from recent contacts only
+    for index in range(count):
+        if contacts and rng.random() < repeat_rate:
+            contact = rng.choice(contacts)
+        else:
+            contact = make_contact(rng, index)
+            contacts.append(contact)
+        message = rng.choice(MESSAGES).format(n=rng.choice([20, 50, 100, 500]), topic=rng.choice(TOPICS))
+        row = dict(contact,
+                   message=message or None,
+                   plan_selected=weighted(rng, PLANS),
+                   status=weighted(rng, STATUSES),
+                   created_at=start + step * index + timedelta(seconds=rng.randrange(60)))
+        row.update(submission_keys(row['email'], row['whatsapp_number']))
+        yield row
+
+
+def seed_submissions(count, seed=0, days=365, batch_size=None):
+    """Insert count synthetic submissions in batches. Returns the number inserted."""
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    batch = []
+    inserted = 0
+    for row in generate_submissions(count, seed=seed, days=days):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            insert_batch(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        insert_batch(batch)
+        inserted += len(batch)
+    return inserted
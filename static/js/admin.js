@@ -36,14 +36,22 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     }
 
-    // Table Sorting
+    // Bulk selection
+    const selectAll = document.getElementById('select-all');
+    if (selectAll) {
+        selectAll.addEventListener('change', function () {
+            document.querySelectorAll('.row-select').forEach(box => box.checked = selectAll.checked);
+        });
+    }
+
+    // Table Sorting (tables marked data-server-sort are sorted by the server)
     const getCellValue = (tr, idx) => tr.children[idx].innerText || tr.children[idx].textContent;
 
     const comparer = (idx, asc) => (a, b) => ((v1, v2) =>
         v1 !== '' && v2 !== '' && !isNaN(v1) && !isNaN(v2) ? v1 - v2 : v1.toString().localeCompare(v2)
     )(getCellValue(asc ? a : b, idx), getCellValue(asc ? b : a, idx));
 
-    document.querySelectorAll('th').forEach(th => th.addEventListener('click', (() => {
+    document.querySelectorAll('table:not([data-server-sort]) th').forEach(th => th.addEventListener('click', (() => {
         const table = th.closest('table');
         const tbody = table.querySelector('tbody');
         Array.from(tbody.querySelectorAll('tr'))
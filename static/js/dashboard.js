@@ -0,0 +1,69 @@
+// Dashboard trend charts, drawn from /admin/api/analytics (daily rollups only)
+(function () {
+    var panel = document.getElementById('analytics');
+    if (!panel || typeof Chart === 'undefined') {
+        return;
+    }
+
+    var STATUS_COLORS = {
+        pending: '#ffc107',
+        contacted: '#17a2b8',
+        converted: '#28a745'
+    };
+    var charts = {};
+
+    function draw(id, config) {
+        if (charts[id]) {
+            charts[id].destroy();
+        }
+        charts[id] = new Chart(document.getElementById(id), config);
+    }
+
+    function statusDatasets(rows) {
+        return Object.keys(STATUS_COLORS).map(function (status) {
+            return {
+                label: status.charAt(0).toUpperCase() + status.slice(1),
+                data: rows.map(function (row) { return row[status] || 0; }),
+                backgroundColor: STATUS_COLORS[status],
+                borderColor: STATUS_COLORS[status]
+            };
+        });
+    }
+
+    function breakdownChart(id, rows) {
+        draw(id, {
+            type: 'bar',
+            data: {
+                labels: rows.map(function (row) {
+                    return row.name + ' (' + Math.round(row.conversion_rate * 100) + '%)';
+                }),
+                datasets: statusDatasets(rows)
+            },
+            options: {
+                indexAxis: 'y',
+                scales: { x: { stacked: true }, y: { stacked: true } }
+            }
+        });
+    }
+
+    function load(days) {
+        fetch(panel.dataset.url + '?days=' + days, { headers: { 'Accept': 'application/json' } })
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                draw('daily-chart', {
+                    type: 'bar',
+                    data: {
+                        labels: data.daily.map(function (row) { return row.day; }),
+                        datasets: statusDatasets(data.daily)
+                    },
+                    options: { scales: { x: { stacked: true }, y: { stacked: true, beginAtZero: true } } }
+                });
+                breakdownChart('country-chart', data.countries);
+                breakdownChart('plan-chart', data.plans);
+            });
+    }
+
+    var select = document.getElementById('analytics-days');
+    select.addEventListener('change', function () { load(select.value); });
+    load(select.value);
+})();
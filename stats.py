@@ -0,0 +1,87 @@
+"""
+Submission statistics for the admin dashboard.
+
+Counts come from a single GROUP BY status query, or, when
+DASHBOARD_COUNTERS is enabled, from the SubmissionCounter table that the
+write paths update in the same transaction as the rows they change.
+"""
+from flask import current_app
+
+from models import db, Submission, SubmissionCounter
+
+
+def counters_enabled():
+    return current_app.config['DASHBOARD_COUNTERS']
+
+
+def grouped_status_counts():
+    """Count submissions per status with one GROUP BY query."""
+    rows = db.session.query(Submission.status, db.func.count(Submission.id)).group_by(Submission.status).all()
+    return {status: count for status, count in rows}
+
+
+def status_counts():
+    """Return {status: count}, read from the counter table when it is enabled."""
+    if counters_enabled():
+        return {row.status: row.count for row in SubmissionCounter.query.all() if row.count}
+    return grouped_status_counts()
+
+
+def adjust_counters(deltas):
+    """
+    Apply {status: delta} to the counters inside the caller's transaction.
+
+    Does nothing unless DASHBOARD_COUNTERS is enabled.
+    """
+    if not counters_enabled():
+        return
+    for status, delta in deltas.items():
+        if not delta:
+            continue
+        result = db.session.execute(
+            db.update(SubmissionCounter).where(SubmissionCounter.status == status)
+            .values(count=SubmissionCounter.count + delta)
+        )
+        if result.rowcount == 0:
+            db.session.add(SubmissionCounter(status=status, count=delta))
+            db.session.flush()
+
+
+def record_new_submissions(statuses):
+    deltas = {}
+    for status in statuses:
+        deltas[status] = deltas.get(status, 0) + 1
+    adjust_counters(deltas)
+
+
+def record_status_change(old_status, new_status):
+    if old_status != new_status:
+        adjust_counters({old_status: -1, new_status: 1})
+
+
+def record_bulk_status_change(old_counts, new_status):
+    """Move rows counted in {old status: count} over to new_status."""
+    deltas = {status: -count for status, count in old_counts.items() if status != new_status}
+    deltas[new_status] = deltas.get(new_status, 0) + sum(-delta for delta in deltas.values())
+    adjust_counters(deltas)
+
+
+def check_counters():
+    """Return {status: (counter, actual)} for every status where the two disagree."""
+    actual = grouped_status_counts()
+    stored = {row.status: row.count for row in SubmissionCounter.query.all()}
+    mismatches = {}
+    for status in set(actual) | set(stored):
+        if stored.get(status, 0) != actual.get(status, 0):
+            mismatches[status] = (stored.get(status, 0), actual.get(status, 0))
+    return mismatches
+
+
+def rebuild_counters():
+    """Replace the counters with a fresh GROUP BY over the submissions table."""
+    SubmissionCounter.query.delete()
+    for status, count in grouped_status_counts().items():
+        if status is None:
+            continue
+        db.session.add(SubmissionCounter(status=status, count=count))
+    db.session.commit()
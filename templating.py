@@ -0,0 +1,68 @@
+"""
+Template compilation and fragment caching.
+
+Compiled templates are written to a FileSystemBytecodeCache shared by all
+workers, so after a deploy only the first worker to render a template
+compiles it. Jinja checks the source checksum, so edited templates are
+recompiled.
+
+{% cache %} keeps the rendered output of an expensive block in a per-worker
+LRU. The block is re-rendered only when one of its version keys changes:
+
+    {% cache 'pricing-cards', pricing_version %} ... {% endcache %}
+"""
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from cache import FragmentCache
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        # The template name keeps equally named fragments in different templates apart
+        keys = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            keys.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render_cached', [nodes.List(keys)]), [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, keys, caller):
+        fragments = self.environment.fragment_cache
+        # Templates can change under the reloader in debug mode, so render them fresh
+        if fragments is None or current_app.debug:
+            return caller()
+        key = tuple(keys)
+        markup = fragments.get(key)
+        if markup is None:
+            markup = caller()
+            fragments.set(key, markup)
+        return markup
+
+
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that creates its directory on the first write, not when the app is imported."""
+
+    def dump_bytecode(self, bucket):
+        os.makedirs(self.directory, exist_ok=True)
+        super().dump_bytecode(bucket)
+
+
+def configure_templates(app):
+    """Install the shared bytecode cache and the {% cache %} tag on the app's Jinja environment."""
+    cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        app.jinja_env.bytecode_cache = SharedBytecodeCache(cache_dir)
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    size = app.config['FRAGMENT_CACHE_SIZE']
+    app.jinja_env.fragment_cache = FragmentCache(size) if size > 0 else None
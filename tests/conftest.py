@@ -0,0 +1,184 @@
+"""
+Shared fixtures: the app on a throwaway SQLite database, and a stub SMTP server.
+
+The environment is set before the app is imported, so every file the app
+writes (database, stamps, rate limiter, exports) lands in a temp directory.
+"""
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix='whatsflow-tests-')
+os.environ.update({
+    'DATABASE_URL': 'sqlite:///' + os.path.join(WORKDIR, 'test.db'),
+    'USER_CACHE_STAMP_FILE': os.path.join(WORKDIR, 'credentials.stamp'),
+    'RATELIMIT_STORAGE': os.path.join(WORKDIR, 'ratelimit.db'),
+    'LOAD_SHED_SLOT_DIR': os.path.join(WORKDIR, 'slots'),
+    'EXPORT_DIR': os.path.join(WORKDIR, 'exports'),
+    'JINJA_BYTECODE_CACHE_DIR': '',
+    'RATELIMIT_ENABLED': 'false',
+    'LOAD_SHED_MAX_CONCURRENT': '0',
+    'METRICS_ENABLED': 'false',
+    'DASHBOARD_COUNTERS': 'true',
+})
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+os.environ.pop('MAIL_USE_TLS', None)
+
+
+@pytest.fixture(scope='session')
+def flask_app():
+    from flask import g, has_app_context
+    from flask.testing import FlaskClient
+    from app import app
+    import migrations
+
+    class LoginClient(FlaskClient):
+        """
+        Forgets the user Flask-Login cached on g before each request. Requests
+        share the test's app context, so otherwise one login would let every
+        later request through login_required without a session cookie.
+        """
+        def open(self, *args, **kwargs):
+            if has_app_context():
+                g.pop('_login_user', None)
+            return super().open(*args, **kwargs)
+
+    app.test_client_class = LoginClient
+    with app.app_context():
+        migrations.upgrade()
+    return app
+
+
+@pytest.fixture
+def app(flask_app):
+    """The app inside an app context, with every table emptied and config changes undone afterwards."""
+    from cache import user_cache
+    from models import db
+
+    config = dict(flask_app.config)
+    with flask_app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+        # Emptied tables hand out the same ids again, so no cached user may outlive its test
+        user_cache.invalidate()
+        yield flask_app
+        db.session.remove()
+    flask_app.config.clear()
+    flask_app.config.update(config)
+
+
+@pytest.fixture
+def client(app):
+    """A test client logged in as an admin."""
+    from models import db, User
+
+    user = User(email='admin@example.com', is_admin=True)
+    user.set_password('password1')
+    db.session.add(user)
+    db.session.commit()
+    client = app.test_client()
+    response = client.post('/admin/login', data={'email': 'admin@example.com', 'password': 'password1'})
+    assert response.status_code == 302
+    return client
+
+
+class SMTPStub(socketserver.ThreadingTCPServer):
+    """
+    Just enough SMTP for smtplib: records each message, or refuses every
+    recipient with 550 while reject is set.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.reject = False
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 stub ready')
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 stub')
+            elif command.startswith('RCPT') and self.server.reject:
+                self.reply('550 mailbox unavailable')
+            elif command == 'DATA':
+                self.reply('354 end with .')
+                lines = []
+                for data in self.rfile:
+                    if data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data.decode())
+                self.server.messages.append(''.join(lines))
+                self.reply('250 queued')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def mail(app, smtp_server):
+    """A Flask-Mail instance that delivers to the stub server."""
+    from flask_mail import Mail
+
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=smtp_server.server_address[1],
+                      MAIL_USE_TLS=False, MAIL_USE_SSL=False, MAIL_USERNAME=None, MAIL_PASSWORD=None,
+                      MAIL_SUPPRESS_SEND=False)
+    return Mail(app)
+
+
+def make_contact_form(index, **values):
+    form = dict(full_name=f'Lead {index}', business_name='Biz', email=f'lead{index}@example.com',
+                whatsapp_number=f'+1555{index:07}', country='Kenya', message=f'hello {index}',
+                plan_selected='Pro')
+    form.update(values)
+    return form
+
+
+@pytest.fixture
+def contact_form():
+    """Builds the POST data of a /contact submission."""
+    return make_contact_form
+
+
+def make_submission(index, **values):
+    from models import Submission
+    from dedupe import submission_keys
+
+    row = dict(full_name=f'Lead {index}', business_name='Biz', email=f'lead{index}@example.com',
+               whatsapp_number=f'+1555{index:07}', country='Kenya', plan_selected='Pro',
+               message='hello', status='pending')
+    row.update(values)
+    row.update(submission_keys(row['email'], row['whatsapp_number']))
+    return Submission(**row)
+
+
+@pytest.fixture
+def submission_factory():
+    return make_submission
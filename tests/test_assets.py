@@ -0,0 +1,85 @@
+"""collect-static fingerprints and precompresses static files, and /assets/ serves them as immutable."""
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+import assets
+
+
+@pytest.fixture
+def assets_dir(app, tmp_path, monkeypatch):
+    app.config['ASSETS_DIR'] = str(tmp_path)
+    # Each worker reads the manifest once, so start every test without one
+    monkeypatch.setattr(assets, '_manifest', None)
+    return tmp_path
+
+
+def test_collect_static_fingerprints_every_file(app, assets_dir):
+    result = app.test_cli_runner().invoke(args=['collect-static'])
+
+    manifest = json.loads((assets_dir / assets.MANIFEST).read_text())
+    with open(os.path.join(app.static_folder, 'css', 'main.css'), 'rb') as f:
+        source = f.read()
+    hashed = manifest['css/main.css']
+    assert f'Collected {len(manifest)} static files' in result.output
+    assert hashed == f'css/main.{hashlib.sha256(source).hexdigest()[:12]}.css'
+    assert (assets_dir / hashed).read_bytes() == source
+    assert gzip.decompress((assets_dir / (hashed + '.gz')).read_bytes()) == source
+
+
+def test_clean_drops_files_the_manifest_no_longer_names(app, assets_dir):
+    stale = assets_dir / 'css' / 'main.000000000000.css'
+    stale.parent.mkdir()
+    stale.write_text('old')
+
+    assets.collect_static(app)
+    assert stale.exists()
+    assets.collect_static(app, clean=True)
+    assert not stale.exists()
+
+
+def test_pages_link_the_hashed_url_once_collected(app, assets_dir):
+    with app.test_request_context():
+        assert assets.asset_url('css/main.css') == '/static/css/main.css'
+
+    hashed = assets.collect_static(app)['css/main.css']
+    assets._manifest = None
+
+    with app.test_request_context():
+        assert assets.asset_url('css/main.css') == f'/assets/{hashed}'
+
+
+@pytest.mark.parametrize('accept, encoding', [('gzip', 'gzip'), ('identity', None), ('gzip;q=0', None)])
+def test_assets_are_immutable_and_precompressed(app, assets_dir, accept, encoding):
+    hashed = assets.collect_static(app)['css/main.css']
+
+    response = app.test_client().get(f'/assets/{hashed}', headers={'Accept-Encoding': accept})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/css'
+    assert response.content_encoding == encoding
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'max-age=31536000' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = gzip.decompress(response.data) if encoding else response.data
+    assert body == (assets_dir / hashed).read_bytes()
+
+
+@pytest.mark.skipif(assets.brotli is None, reason='brotli is not installed')
+def test_brotli_is_preferred_when_accepted(app, assets_dir):
+    hashed = assets.collect_static(app)['css/main.css']
+
+    response = app.test_client().get(f'/assets/{hashed}', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.content_encoding == 'br'
+    assert assets.brotli.decompress(response.data) == (assets_dir / hashed).read_bytes()
+
+
+def test_unknown_and_escaping_paths_are_not_found(app, assets_dir):
+    client = app.test_client()
+
+    assert client.get('/assets/css/missing.css').status_code == 404
+    assert client.get('/assets/../config.py').status_code == 404
@@ -0,0 +1,59 @@
+"""Bulk status updates by id list or filter, through the form and the JSON API."""
+import pytest
+
+from models import db, Submission
+
+URL = '/admin/api/submissions/status'
+
+
+@pytest.fixture
+def ids(app, submission_factory):
+    rows = [submission_factory(index, country='Kenya' if index % 2 else 'Ghana') for index in range(6)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def statuses():
+    db.session.expire_all()
+    return {row.id: row.status for row in Submission.query}
+
+
+def test_api_updates_listed_ids(client, ids):
+    response = client.post(URL, json={'status': 'contacted', 'ids': ids[:2]})
+
+    assert response.get_json() == {'status': 'contacted', 'updated': 2}
+    assert [status for _, status in sorted(statuses().items())] == ['contacted'] * 2 + ['pending'] * 4
+
+
+def test_api_updates_filter_matches(client, ids):
+    response = client.post(URL, json={'status': 'converted', 'filter': {'country': 'Kenya'}})
+
+    assert response.get_json()['updated'] == 3
+    assert Submission.query.filter_by(status='converted', country='Kenya').count() == 3
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    'contacted',
+    {'status': 'contacted', 'ids': '123'},
+    {'status': 'contacted', 'ids': 7},
+    {'status': 'contacted', 'ids': ['1', '2']},
+    {'status': 'contacted', 'ids': [1.5]},
+    {'status': 'contacted', 'ids': [True]},
+    {'status': 'archived', 'ids': [1]},
+    {'status': 'contacted'},
+])
+def test_api_rejects_malformed_bodies(client, ids, body):
+    response = client.post(URL, json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert set(statuses().values()) == {'pending'}
+
+
+def test_form_updates_checked_rows(client, ids):
+    response = client.post('/admin/submissions/bulk-status', data={'new_status': 'contacted', 'ids': ids[-2:]})
+
+    assert response.status_code == 302
+    assert sorted(row_id for row_id, status in statuses().items() if status == 'contacted') == ids[-2:]
@@ -0,0 +1,87 @@
+"""Negotiated zstd, brotli and gzip compression for buffered and streamed responses."""
+import zlib
+
+import pytest
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from models import db
+import compression
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    if encoding == 'br':
+        return compression.brotli.decompress(data)
+    return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+ENCODINGS = [
+    'gzip',
+    pytest.param('br', marks=pytest.mark.skipif(compression.brotli is None, reason='brotli is not installed')),
+    pytest.param('zstd', marks=pytest.mark.skipif(compression.zstandard is None, reason='zstandard is not installed')),
+]
+
+
+@pytest.mark.parametrize('header, preference, expected', [
+    ('gzip, br, zstd', ['zstd', 'br', 'gzip'], 'zstd'),
+    ('gzip;q=1, br;q=0.5', ['zstd', 'br', 'gzip'], 'gzip'),
+    ('br;q=0, gzip;q=0', ['br', 'gzip'], None),
+    ('identity', ['br', 'gzip'], None),
+    ('*', ['br', 'gzip'], 'br'),
+])
+def test_choose_encoding(header, preference, expected):
+    assert compression.choose_encoding(parse_accept_header(header, Accept), preference) == expected
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_pages_are_compressed_with_the_accepted_encoding(app, encoding):
+    client = app.test_client()
+    plain = client.get('/pricing', headers={'Accept-Encoding': 'identity'})
+
+    response = client.get('/pricing', headers={'Accept-Encoding': encoding})
+
+    assert response.content_encoding == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(response.data) < len(plain.data)
+    assert decompress(encoding, response.data) == plain.data
+
+
+def test_small_bodies_and_disabled_compression_are_sent_as_is(app):
+    client = app.test_client()
+    app.config['COMPRESS_MIN_SIZE'] = 10 ** 6
+    assert client.get('/pricing', headers={'Accept-Encoding': 'gzip'}).content_encoding is None
+
+    app.config.update(COMPRESS_MIN_SIZE=0, COMPRESS_ENABLED=False)
+    assert client.get('/pricing', headers={'Accept-Encoding': 'gzip'}).content_encoding is None
+
+
+def test_etag_is_suffixed_and_still_answers_304(app):
+    client = app.test_client()
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    assert etag.endswith('-gzip"')
+
+    revalidated = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('encoding', ENCODINGS)
+def test_streamed_exports_are_compressed_chunk_by_chunk(app, client, submission_factory, encoding):
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    db.session.add_all([submission_factory(index) for index in range(5)])
+    db.session.commit()
+    plain = client.get('/admin/export/csv', headers={'Accept-Encoding': 'identity'}).data
+
+    response = client.get('/admin/export/csv', headers={'Accept-Encoding': encoding}, buffered=False)
+    chunks = list(response.response)
+    response.close()
+
+    assert response.content_encoding == encoding
+    assert 'Content-Length' not in response.headers
+    # Every batch of rows is flushed as its own compressed chunk
+    assert len(chunks) > 3
+    assert decompress(encoding, b''.join(chunks)) == plain
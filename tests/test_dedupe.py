@@ -0,0 +1,92 @@
+"""Repeat leads: normalized keys, the contact-form modes and the one-pass cluster command."""
+import pytest
+
+from models import db, Submission
+import dedupe
+import exports
+
+
+@pytest.mark.parametrize('number, key', [
+    ('+1 (555) 000-1234', '+15550001234'),
+    ('0015550001234', '+15550001234'),
+    ('555-0001234', '+5550001234'),
+    ('12-34', None),
+    (None, None),
+])
+def test_phone_numbers_are_reduced_to_e164(number, key):
+    assert dedupe.normalize_phone(number) == key
+
+
+def test_email_keys_ignore_case_and_whitespace():
+    assert dedupe.normalize_email('  Lead@Example.COM ') == 'lead@example.com'
+    assert dedupe.normalize_email('   ') is None
+
+
+@pytest.mark.parametrize('mode, rows', [('off', 2), ('flag', 2), ('merge', 1)])
+def test_contact_form_modes(app, contact_form, mode, rows):
+    app.config['DEDUPE_MODE'] = mode
+    client = app.test_client()
+
+    client.post('/contact', data=contact_form(1))
+    client.post('/contact', data=contact_form(1, email='LEAD1@example.com ', whatsapp_number='+1 555 999 0000',
+                                              message='second try'))
+
+    submissions = Submission.query.order_by(Submission.id).all()
+    assert len(submissions) == rows
+    if mode == 'flag':
+        assert submissions[1].duplicate_of_id == submissions[0].id
+    elif mode == 'off':
+        assert submissions[1].duplicate_of_id is None
+
+
+def test_repeats_outside_the_window_are_new_leads(app, contact_form):
+    app.config.update(DEDUPE_MODE='merge', DEDUPE_WINDOW_HOURS=0)
+    client = app.test_client()
+
+    client.post('/contact', data=contact_form(1))
+    client.post('/contact', data=contact_form(1))
+
+    assert Submission.query.count() == 2
+
+
+def test_merge_folds_the_repeat_into_the_original(app, contact_form):
+    app.config['DEDUPE_MODE'] = 'merge'
+    client = app.test_client()
+    client.post('/contact', data=contact_form(1))
+    version = exports.data_version()
+
+    client.post('/contact', data=contact_form(1, message='second try', plan_selected='Business'))
+    client.post('/contact', data=contact_form(1, message='second try', plan_selected=''))
+
+    original = Submission.query.one()
+    assert original.repeat_count == 2
+    assert original.plan_selected == 'Business'
+    assert original.message == 'hello 1\n\nsecond try'
+    assert original.last_submitted_at is not None
+    # Cached exports hold the old plan and message
+    assert exports.data_version() != version
+
+
+def test_cluster_command_flags_every_duplicate(app, submission_factory):
+    db.session.add_all([
+        submission_factory(1),
+        submission_factory(2),
+        submission_factory(3, email='lead1@example.com'),         # shares lead 1's email
+        submission_factory(4, whatsapp_number='+15550000003'),    # shares lead 3's number
+        submission_factory(5, email='LEAD2@example.com'),
+    ])
+    db.session.commit()
+    ids = [row.id for row in Submission.query.order_by(Submission.id)]
+
+    assert dedupe.find_clusters(batch_size=2) == {ids[2]: ids[0], ids[3]: ids[0], ids[4]: ids[1]}
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['dedupe-submissions'])
+    assert 'Found 2 duplicate clusters covering 5 submissions' in result.output
+    assert Submission.query.filter(Submission.duplicate_of_id.isnot(None)).count() == 0
+
+    assert 'Flagged 3 submissions' in runner.invoke(args=['dedupe-submissions', '--apply']).output
+    assert 'Flagged 0 submissions' in runner.invoke(args=['dedupe-submissions', '--apply']).output
+    db.session.expire_all()
+    assert {row.id: row.duplicate_of_id for row in Submission.query} == \
+        {ids[0]: None, ids[1]: None, ids[2]: ids[0], ids[3]: ids[0], ids[4]: ids[1]}
@@ -0,0 +1,91 @@
+"""Change tracking on Submission, the changes API and incremental (?since=) exports."""
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import text
+
+from models import db, Submission
+
+
+@pytest.fixture
+def ids(app, submission_factory):
+    db.session.add_all([submission_factory(index) for index in range(4)])
+    db.session.commit()
+    return [row.id for row in Submission.query.order_by(Submission.id)]
+
+
+def sequence():
+    """Submission ids in change order."""
+    return [row.id for row in Submission.query.order_by(Submission.change_seq)]
+
+
+def ndjson_changes(client, since):
+    response = client.get('/admin/export/ndjson', query_string={'since': since})
+    return int(response.headers['X-Watermark']), [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_every_write_path_moves_the_row_to_the_end(client, ids):
+    assert sequence() == ids
+
+    client.post(f'/admin/submission/{ids[0]}/update-status', data={'status': 'contacted'})
+    assert sequence() == ids[1:] + ids[:1]
+
+    client.post('/admin/api/submissions/status', json={'ids': [ids[2], ids[1]], 'status': 'converted'})
+    assert set(sequence()[-2:]) == {ids[1], ids[2]}
+
+    # Untracked columns such as the duplicate keys leave the order alone
+    before = sequence()
+    db.session.execute(text('UPDATE submission SET email_key = NULL WHERE id = :id'), {'id': ids[3]})
+    db.session.commit()
+    assert sequence() == before
+
+
+def test_incremental_export_resumes_from_the_watermark(client, ids):
+    watermark, rows = ndjson_changes(client, 0)
+    assert [row['id'] for row in rows] == ids
+    assert [row['change_seq'] for row in rows] == sorted(row['change_seq'] for row in rows)
+    assert watermark == rows[-1]['change_seq']
+    assert rows[0]['updated_at']
+
+    client.post(f'/admin/submission/{ids[1]}/update-status', data={'status': 'converted'})
+    next_watermark, rows = ndjson_changes(client, watermark)
+
+    assert [(row['id'], row['status']) for row in rows] == [(ids[1], 'converted')]
+    assert next_watermark > watermark
+    assert ndjson_changes(client, next_watermark) == (next_watermark, [])
+
+
+def test_incremental_csv_ignores_status_filters(client, ids):
+    client.post(f'/admin/submission/{ids[0]}/update-status', data={'status': 'contacted'})
+
+    response = client.get('/admin/export/csv', query_string={'since': 0, 'status': 'pending'})
+    header, *rows = csv.reader(io.StringIO(response.get_data(as_text=True)))
+
+    assert header[-3:] == ['ID', 'Change', 'Updated']
+    # A row that left the filter is still a change the sync has to see
+    assert [int(row[-3]) for row in rows] == ids[1:] + ids[:1]
+
+
+@pytest.mark.parametrize('url', ['/admin/export/csv?since=-1', '/admin/export/csv?since=abc',
+                                 '/admin/export/excel?since=0'])
+def test_bad_incremental_requests_are_rejected(client, url):
+    response = client.get(url)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_changes_api_pages_until_caught_up(client, ids):
+    seen, since = [], 0
+    while True:
+        page = client.get('/admin/api/submissions/changes', query_string={'since': since, 'limit': 3}).get_json()
+        seen += [change['id'] for change in page['changes']]
+        since = page['watermark']
+        if not page['has_more']:
+            break
+
+    assert seen == ids
+    assert client.get('/admin/api/submissions/changes', query_string={'since': since}).get_json() == \
+        {'since': since, 'watermark': since, 'has_more': False, 'changes': []}
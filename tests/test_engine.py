@@ -0,0 +1,74 @@
+"""The SQLite engine profile: pragmas on every connection, pool options and waiting writers."""
+import sqlite3
+import threading
+import time
+
+from sqlalchemy import text
+
+from config import engine_options
+from models import db
+
+
+def pragma(conn, name):
+    return conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+
+
+def test_every_connection_gets_the_pragmas(app):
+    # Two connections at once, so at least one is not the connection the app already had
+    with db.engine.connect() as first, db.engine.connect() as second:
+        for conn in (first, second):
+            assert pragma(conn, 'journal_mode') == 'wal'
+            assert pragma(conn, 'synchronous') == 1  # NORMAL
+            assert pragma(conn, 'busy_timeout') == 5000
+            assert pragma(conn, 'temp_store') == 2  # MEMORY
+            assert pragma(conn, 'cache_size') == -64000
+
+
+def test_engine_options_size_the_pool_from_the_environment(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '7')
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '2500')
+
+    options = engine_options('sqlite:////tmp/whatsflow.db')
+    assert options['pool_size'] == 7
+    assert options['connect_args'] == {'timeout': 2.5}
+
+    # In-memory SQLite is one static connection, so it takes no pool sizing
+    assert 'pool_size' not in engine_options('sqlite://')
+    assert 'connect_args' not in engine_options('postgresql://db/whatsflow')
+
+
+def test_a_writer_waits_for_the_lock_instead_of_failing(app, submission_factory):
+    locked, errors = threading.Event(), []
+    path = db.engine.url.database
+
+    def hold_write_lock():
+        # Another process's writer, outside the app's pool
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute('BEGIN IMMEDIATE')
+        locked.set()
+        time.sleep(0.5)
+        conn.execute('COMMIT')
+        conn.close()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    assert locked.wait(5)
+    started = time.monotonic()
+    try:
+        db.session.add(submission_factory(1))
+        db.session.commit()
+    except Exception as e:
+        errors.append(e)
+    holder.join()
+
+    assert errors == []
+    assert time.monotonic() - started >= 0.3
+    assert db.session.execute(text('SELECT count(*) FROM submission')).scalar() == 1
+
+
+def test_pool_stats_are_reported(client):
+    stats = client.get('/admin/db-stats').get_json()
+
+    assert stats['pool'] == 'QueuePool'
+    assert stats['checkouts'] >= stats['checkins'] > 0
+    assert stats['max_checked_out'] >= 1
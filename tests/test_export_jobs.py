@@ -0,0 +1,78 @@
+"""Excel, PDF and Word exports run as background jobs whose files are reused until the data changes."""
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, ExportJob
+import exports
+
+pytest.importorskip('openpyxl')
+
+JSON = {'Accept': 'application/json'}
+
+
+@pytest.fixture
+def leads(app, submission_factory):
+    db.session.add_all([submission_factory(index) for index in range(5)])
+    db.session.commit()
+
+
+def wait_for(client, payload, timeout=10):
+    deadline = time.monotonic() + timeout
+    while payload['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline, payload
+        time.sleep(0.05)
+        payload = client.get(payload['status_url'], headers=JSON).get_json()
+    return payload
+
+
+def export(client, format='excel', **filters):
+    response = client.get(f'/admin/export/{format}', query_string=filters, headers=JSON)
+    assert response.status_code in (200, 202)
+    return wait_for(client, response.get_json())
+
+
+def test_job_builds_a_downloadable_file(client, leads):
+    job = export(client)
+
+    assert job['status'] == 'done'
+    response = client.get(job['download_url'])
+    assert response.headers['Content-Disposition'] == 'attachment; filename=submissions.xlsx'
+    assert response.data[:2] == b'PK'
+
+
+def test_unchanged_data_reuses_the_finished_file(client, leads):
+    first = export(client)
+
+    second = client.get('/admin/export/excel', headers=JSON)
+
+    assert second.status_code == 200
+    assert second.get_json()['id'] == first['id']
+    # Different filters are a different export
+    assert export(client, status='pending')['id'] != first['id']
+
+
+def test_changed_data_builds_a_new_file_and_expires_the_old_one(app, client, leads):
+    first = export(client)
+    old_path = os.path.join(app.config['EXPORT_DIR'], f"{first['id']}.xlsx")
+    client.post('/admin/submissions/bulk-status', data={'scope': 'filter', 'status': 'pending',
+                                                       'new_status': 'contacted'})
+
+    second = export(client)
+
+    assert second['id'] != first['id']
+    assert not os.path.exists(old_path)
+    assert db.session.get(ExportJob, first['id']).status == 'expired'
+    assert client.get(first['download_url']).status_code == 302
+
+
+def test_a_job_lost_with_its_worker_is_not_reused(app, leads):
+    lost = ExportJob(id='lost', format='excel', params='{}', data_version=exports.data_version(),
+                     status='running', filename='lost.xlsx',
+                     created_at=datetime.utcnow() - timedelta(seconds=app.config['EXPORT_JOB_TIMEOUT'] + 1))
+    db.session.add(lost)
+    db.session.commit()
+
+    assert exports.find_reusable_job(app, 'excel', exports.data_version(), '{}') is None
@@ -0,0 +1,90 @@
+"""Concurrent contact submissions share one commit, and the counters and rollups still add up."""
+import threading
+
+import pytest
+
+from models import db, Submission, EmailOutbox
+import groupcommit
+import rollups
+import stats
+
+
+def assert_consistent():
+    db.session.expire_all()
+    assert stats.check_counters() == {}
+    assert rollups.check_rollups() == {}
+
+
+@pytest.fixture
+def committer(app):
+    app.config.update(GROUP_COMMIT_ENABLED=True, GROUP_COMMIT_MAX_DELAY_MS=200)
+    groupcommit._committer = None
+    yield groupcommit.get_committer(app)
+    groupcommit._committer = None
+
+
+def post_concurrently(app, forms):
+    results = {}
+
+    def post(index, form):
+        results[index] = app.test_client().post('/contact', data=form).headers['Location']
+
+    threads = [threading.Thread(target=post, args=(index, form)) for index, form in enumerate(forms)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_group_commit_writes_concurrent_submissions_together(app, committer, contact_form):
+    batches = []
+    write = committer._write
+    committer._write = lambda batch: (batches.append(len(batch)), write(batch))
+
+    results = post_concurrently(app, [contact_form(index) for index in range(8)])
+
+    assert all(location.endswith('/success') for location in results.values())
+    assert Submission.query.count() == 8
+    assert EmailOutbox.query.count() == 8
+    assert sum(batches) == 8 and len(batches) < 8
+    assert_consistent()
+
+
+def test_group_commit_falls_back_to_single_rows_when_a_batch_fails(app, committer, contact_form):
+    forms = [contact_form(index) for index in range(6)]
+    del forms[3]['full_name']  # NOT NULL violation fails the whole batch
+
+    results = post_concurrently(app, forms)
+
+    assert results[3].endswith('/contact')
+    assert all(results[index].endswith('/success') for index in results if index != 3)
+    assert sorted(row.full_name for row in Submission.query) == [f'Lead {index}' for index in (0, 1, 2, 4, 5)]
+    assert_consistent()
+
+
+def test_group_commit_withdraws_a_row_whose_request_timed_out(app, committer, contact_form, monkeypatch):
+    monkeypatch.setattr(groupcommit, 'SUBMIT_TIMEOUT', 0.3)
+    committer.max_delay = 0
+    writing, release = threading.Event(), threading.Event()
+    write = committer._write
+
+    def stalled(batch):
+        writing.set()
+        release.wait(5)
+        write(batch)
+    committer._write = stalled
+
+    first = threading.Thread(target=lambda: app.test_client().post('/contact', data=contact_form(1)))
+    first.start()
+    # The writer is stuck on the first row, so the second stays queued until it times out
+    assert writing.wait(5)
+    response = app.test_client().post('/contact', data=contact_form(2))
+    release.set()
+    first.join()
+    committer._write = write
+    # Let the writer drain the withdrawn entry
+    post_concurrently(app, [contact_form(3)])
+
+    assert response.headers['Location'].endswith('/contact')
+    assert sorted(row.full_name for row in Submission.query) == ['Lead 1', 'Lead 3']
@@ -0,0 +1,98 @@
+"""Bulk lead import: validation, batched inserts, the admin endpoint and the CLI."""
+import io
+import json
+
+import pytest
+
+from models import db, Submission
+import importer
+
+HEADER = 'Date,Name,Business,Email,WhatsApp,Country,Plan,Message,Status\n'
+
+
+def ndjson_lead(index, **values):
+    row = {'Name': f'N{index}', 'Business': 'B', 'Email': f'n{index}@example.com',
+           'WhatsApp': f'+1999{index:07}', 'Country': 'US', 'Plan': 'Pro'}
+    row.update(values)
+    return json.dumps(row)
+
+
+def test_rows_are_inserted_in_batches(app, monkeypatch):
+    batches = []
+    insert_batch = importer.insert_batch
+    monkeypatch.setattr(importer, 'insert_batch', lambda batch: (batches.append(len(batch)), insert_batch(batch)))
+    lines = '\n'.join(ndjson_lead(index) for index in range(7))
+
+    report = importer.import_file(io.BytesIO(lines.encode()), 'leads.ndjson', batch_size=3)
+
+    assert report.inserted == 7
+    assert batches == [3, 3, 1]
+    assert Submission.query.filter_by(email_key='n6@example.com').count() == 1
+
+
+def test_import_reports_malformed_ndjson_lines(app):
+    good = [ndjson_lead(index) for index in range(6)]
+    lines = good[:5] + ['{"Name": broken', '[1, 2]'] + good[5:]
+
+    report = importer.import_file(io.BytesIO('\n'.join(lines).encode()), 'leads.ndjson', batch_size=2)
+
+    assert report.inserted == 6
+    assert report.errors == [(6, 'invalid JSON: Expecting value'), (7, 'row is not an object')]
+    assert Submission.query.count() == 6
+
+
+def test_invalid_csv_rows_are_reported_by_line(app):
+    rows = [
+        '2024-03-01 10:00,Ann,Biz,ann@example.com,+15550000001,Kenya,Pro,hi,pending',
+        '2024-03-01 10:00,,Biz,bob@example.com,+15550000002,Kenya,Pro,hi,pending',
+        '2024-03-01 10:00,Cy,Biz,not-an-email,+15550000003,Kenya,Pro,hi,pending',
+        '2024-03-01 10:00,Di,Biz,di@example.com,+15550000004,Kenya,Pro,hi,archived',
+        'yesterday,Ed,Biz,ed@example.com,+15550000005,Kenya,Pro,hi,pending',
+        f'2024-03-01 10:00,{"F" * 101},Biz,f@example.com,+15550000006,Kenya,Pro,hi,pending',
+    ]
+
+    report = importer.import_file(io.BytesIO((HEADER + '\n'.join(rows)).encode()), 'leads.csv')
+
+    assert report.inserted == 1
+    assert report.errors == [(3, 'missing full_name'), (4, "invalid email 'not-an-email'"),
+                             (5, "unknown status 'archived'"), (6, "invalid date 'yesterday'"),
+                             (7, 'full_name is longer than 100 characters')]
+
+
+def test_csv_export_imports_back_unchanged(app, client, submission_factory):
+    db.session.add_all([submission_factory(index, message=f'line one\nline "{index}"', status='contacted')
+                        for index in range(3)])
+    db.session.commit()
+    exported = client.get('/admin/export/csv').data
+    before = sorted(client.get('/admin/export/ndjson').get_data(as_text=True).splitlines())
+    Submission.query.delete()
+    db.session.commit()
+
+    response = client.post('/admin/import', data={'file': (io.BytesIO(exported), 'leads.csv')},
+                           headers={'Accept': 'application/json'})
+
+    assert response.get_json() == {'inserted': 3, 'rejected': 0, 'errors': []}
+    # Exports list newest first, so the re-imported rows come back in the opposite id order
+    assert sorted(client.get('/admin/export/ndjson').get_data(as_text=True).splitlines()) == before
+
+
+def test_endpoint_rejects_unreadable_files(client):
+    response = client.post('/admin/import', data={'file': (io.BytesIO(b'{"not": "a list"}'), 'leads.json')},
+                           headers={'Accept': 'application/json'})
+    assert response.status_code == 400
+    assert 'list of submissions' in response.get_json()['error']
+
+    response = client.post('/admin/import', data={'file': (io.BytesIO(b'x'), 'leads.txt')},
+                           headers={'Accept': 'application/json'})
+    assert response.status_code == 400
+
+
+def test_cli_imports_a_file(app, tmp_path):
+    path = tmp_path / 'leads.jsonl'
+    path.write_text('\n'.join(ndjson_lead(index) for index in range(4)) + '\n{"Name": "only"}\n')
+
+    result = app.test_cli_runner().invoke(args=['import-submissions', str(path), '--batch-size', '2'])
+
+    assert 'row 5: missing business_name, email, whatsapp_number, country, plan_selected' in result.output
+    assert 'Imported 4 submissions (1 rejected)' in result.output
+    assert Submission.query.count() == 4
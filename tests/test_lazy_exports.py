@@ -0,0 +1,49 @@
+"""Export backends stay out of a worker until the first export that needs them."""
+import os
+import subprocess
+import sys
+
+from exports import DOCUMENT_EXPORTS
+import importcost
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BACKENDS = sorted({module.split('.')[0] for export_format in DOCUMENT_EXPORTS.values()
+                   for module in export_format.modules})
+
+
+def loaded_after(code):
+    """Top-level backend packages imported by running code in a fresh interpreter."""
+    result = subprocess.run([sys.executable, '-c', f'{code}; import sys; print(*sorted(sys.modules))'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return sorted(set(result.stdout.split()) & set(BACKENDS))
+
+
+def test_importing_the_app_loads_no_export_backend():
+    assert BACKENDS == ['docx', 'openpyxl', 'reportlab']
+    assert loaded_after('import app') == []
+
+
+def test_each_builder_loads_only_its_own_backend(tmp_path):
+    path = tmp_path / 'leads.xlsx'
+    code = f"import app, exports; exports.DOCUMENT_EXPORTS['excel'].builder({str(path)!r}, [])"
+
+    assert loaded_after(code) == ['openpyxl']
+    assert path.read_bytes()[:2] == b'PK'
+
+
+def test_measure_charges_packages_their_own_time():
+    rss_kib, direct, per_package = importcost.measure(['json'], cwd=ROOT)
+
+    assert rss_kib > 0
+    assert 'json' in direct
+    assert direct['json'] >= per_package['json'] > 0
+
+
+def test_import_report_command_lists_every_backend(app):
+    result = app.test_cli_runner().invoke(args=['import-report', '--top', '3'])
+
+    assert result.exit_code == 0, result.output
+    assert result.output.startswith('Importing the app: ')
+    for format in DOCUMENT_EXPORTS:
+        assert f'\n{format}' in result.output
@@ -0,0 +1,71 @@
+"""The /metrics endpoint's access rules and the per-request latency and SQL samples it reports."""
+import pytest
+from flask import Response
+from prometheus_client import REGISTRY
+from sqlalchemy import event, text
+
+from models import db
+import metrics
+
+
+@pytest.fixture
+def scraper(app):
+    app.config.update(METRICS_ENABLED=True, METRICS_TOKEN=None, METRICS_ALLOWED_IPS=['127.0.0.1', '::1'])
+    return app.test_client()
+
+
+def from_address(client, address):
+    client.environ_base['REMOTE_ADDR'] = address
+    return client
+
+
+def test_local_scrapes_are_allowed(scraper):
+    response = scraper.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    assert b'whatsflow_request_duration_seconds' in response.data
+
+
+def test_other_addresses_are_forbidden(scraper):
+    assert from_address(scraper, '203.0.113.7').get('/metrics').status_code == 403
+
+
+def test_token_is_required_from_every_address_when_set(app, scraper):
+    app.config['METRICS_TOKEN'] = 's3cret'
+
+    assert scraper.get('/metrics').status_code == 401
+    assert scraper.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    remote = from_address(scraper, '203.0.113.7')
+    assert remote.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code == 200
+
+
+def test_disabled_metrics_are_not_found(app, scraper):
+    app.config['METRICS_ENABLED'] = False
+
+    assert scraper.get('/metrics').status_code == 404
+
+
+def test_request_samples_count_its_sql(app):
+    def sample(name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    labels = {'endpoint': 'pricing'}
+    before = (sample('whatsflow_request_sql_queries_sum', **labels),
+              sample('whatsflow_requests_total', method='GET', status='200', **labels))
+    # The app was imported with metrics off, so attach the hooks for this request only
+    event.listen(db.engine, 'before_cursor_execute', metrics.before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', metrics.after_cursor_execute)
+    try:
+        with app.test_request_context('/pricing'):
+            metrics.start_request()
+            db.session.execute(text('SELECT 1'))
+            db.session.execute(text('SELECT 2'))
+            metrics.finish_request(Response('ok'))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', metrics.before_cursor_execute)
+        event.remove(db.engine, 'after_cursor_execute', metrics.after_cursor_execute)
+
+    assert sample('whatsflow_request_sql_queries_sum', **labels) - before[0] == 2
+    assert sample('whatsflow_requests_total', method='GET', status='200', **labels) - before[1] == 1
+    assert sample('whatsflow_request_duration_seconds_count', method='GET', **labels) >= 1
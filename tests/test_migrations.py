@@ -0,0 +1,82 @@
+"""Schema migrations go down and back up with the data intact, and leave every admin query indexed."""
+import pytest
+from sqlalchemy import text
+
+from app import admin_query_plans
+from models import db
+import migrations
+
+
+def schema_objects():
+    with db.engine.connect() as conn:
+        return {name for (name,) in conn.execute(text('SELECT name FROM sqlite_master'))}
+
+
+def columns(table):
+    with db.engine.connect() as conn:
+        return {row[1] for row in conn.execute(text(f'PRAGMA table_info({table})'))}
+
+
+def scalar(sql):
+    with db.engine.connect() as conn:
+        return conn.execute(text(sql)).scalar()
+
+
+@pytest.fixture
+def leads(app, submission_factory):
+    db.session.add_all([submission_factory(index, message=f'needs payments {index}') for index in range(3)])
+    db.session.commit()
+    db.session.remove()
+
+
+def test_downgrade_to_zero_and_upgrade_back(app, leads):
+    try:
+        reverted = migrations.downgrade(0)
+
+        assert [migration.version for migration in reverted] == [6, 5, 4, 3, 2, 1]
+        assert migrations.current_version() == 0
+        assert not schema_objects() & ({'submission_fts', 'submission_rollup', 'submission_change_insert'}
+                                       | set(migrations.SUBMISSION_INDEXES))
+        assert not columns('submission') & {'email_key', 'change_seq', 'updated_at'}
+        assert 'credential_version' not in columns('user')
+        assert scalar('SELECT count(*) FROM submission') == 3
+    finally:
+        applied = migrations.upgrade()
+
+    assert [migration.version for migration in applied] == [1, 2, 3, 4, 5, 6]
+    assert migrations.current_version() == migrations.HEAD
+    assert set(migrations.SUBMISSION_INDEXES) <= schema_objects()
+    # Each step backfills what the rows already in the table need
+    assert scalar("SELECT count(*) FROM submission_fts WHERE submission_fts MATCH 'payments'") == 3
+    assert scalar("SELECT count(*) FROM submission WHERE email_key = 'lead1@example.com'") == 1
+    assert scalar('SELECT count(*) FROM submission WHERE change_seq = id') == 3
+    assert scalar('SELECT sum(count) FROM submission_rollup') == 3
+
+
+def test_upgrade_is_a_no_op_at_head(app):
+    assert migrations.upgrade() == []
+    assert migrations.current_version() == migrations.HEAD
+
+
+def test_admin_queries_use_an_index(app, submission_factory):
+    # On a handful of rows the planner rightly prefers a scan, so give it realistic statistics
+    db.session.add_all([submission_factory(index, status=['pending', 'contacted', 'converted'][index % 3],
+                                           plan_selected=['Starter', 'Pro', 'Business'][index % 3],
+                                           country=f'Country {index % 20}') for index in range(500)])
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conn.execute(text('ANALYZE'))
+
+    for name, query in admin_query_plans().items():
+        assert migrations.unindexed_steps(migrations.explain(query)) == [], name
+
+
+def test_db_cli_steps_one_version_at_a_time(app):
+    runner = app.test_cli_runner()
+    try:
+        result = runner.invoke(args=['db', 'downgrade'])
+        assert f'reverted {migrations.HEAD}' in result.output
+        assert migrations.current_version() == migrations.HEAD - 1
+    finally:
+        result = runner.invoke(args=['db', 'upgrade'])
+    assert f'Database is at version {migrations.HEAD}.' in result.output
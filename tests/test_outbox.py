@@ -0,0 +1,127 @@
+"""Outbox delivery against a stub SMTP server: claiming, retries with backoff, giving up, digests."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, EmailOutbox
+import outbox
+
+
+@pytest.fixture
+def queue_email(app, submission_factory):
+    def queue(index, **values):
+        submission = submission_factory(index)
+        db.session.add(submission)
+        outbox.enqueue_submission_email(app, submission)
+        db.session.commit()
+        row = EmailOutbox.query.filter_by(submission_id=submission.id).one()
+        for name, value in values.items():
+            setattr(row, name, value)
+        db.session.commit()
+        return row.id
+    return queue
+
+
+def test_send_pending_delivers_and_marks_sent(app, mail, smtp_server, queue_email):
+    row_id = queue_email(1)
+
+    assert outbox.send_pending(app, mail) == (1, 0)
+
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == 'sent'
+    assert row.sent_at is not None
+    assert len(smtp_server.messages) == 1
+    assert 'New WhatsFlow Client Submission' in smtp_server.messages[0]
+    # Nothing is due any more
+    assert outbox.send_pending(app, mail) == (0, 0)
+
+
+def test_claim_due_picks_due_and_stale_rows_only(app, queue_email):
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=app.config['MAIL_OUTBOX_CLAIM_TIMEOUT'] + 60)
+    due = queue_email(1)
+    queue_email(2, next_attempt_at=now + timedelta(minutes=5))
+    queue_email(3, status='sending', next_attempt_at=now)
+    crashed = queue_email(4, status='sending', next_attempt_at=stale)
+    queue_email(5, status='sent')
+
+    claimed = outbox.claim_due(app, limit=10)
+
+    assert [row.id for row in claimed] == [due, crashed]
+    assert all(row.status == 'sending' for row in claimed)
+    # A second sender finds nothing left to claim
+    assert outbox.claim_due(app, limit=10) == []
+
+
+def test_claim_due_respects_limit(app, queue_email):
+    ids = [queue_email(index) for index in range(5)]
+
+    assert [row.id for row in outbox.claim_due(app, limit=2)] == ids[:2]
+    assert [row.id for row in outbox.claim_due(app, limit=10)] == ids[2:]
+
+
+def test_rejected_send_is_retried_with_exponential_backoff(app, mail, smtp_server, queue_email):
+    app.config.update(MAIL_OUTBOX_BACKOFF=30, MAIL_OUTBOX_MAX_BACKOFF=100, MAIL_OUTBOX_MAX_ATTEMPTS=10)
+    smtp_server.reject = True
+    row_id = queue_email(1)
+
+    delays = []
+    for _ in range(4):
+        started = datetime.utcnow()
+        assert outbox.send_pending(app, mail) == (0, 1)
+        row = db.session.get(EmailOutbox, row_id)
+        assert row.status == 'pending'
+        assert '550' in row.last_error
+        delays.append(round((row.next_attempt_at - started).total_seconds()))
+        # Make it due again without waiting
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+    assert delays == [30, 60, 100, 100]
+    assert db.session.get(EmailOutbox, row_id).attempts == 4
+
+    smtp_server.reject = False
+    assert outbox.send_pending(app, mail) == (1, 0)
+    assert db.session.get(EmailOutbox, row_id).status == 'sent'
+
+
+def test_gives_up_after_max_attempts(app, mail, smtp_server, queue_email):
+    app.config['MAIL_OUTBOX_MAX_ATTEMPTS'] = 3
+    smtp_server.reject = True
+    row_id = queue_email(1, attempts=2)
+
+    assert outbox.send_pending(app, mail) == (0, 1)
+
+    row = db.session.get(EmailOutbox, row_id)
+    assert row.status == 'failed'
+    assert row.attempts == 3
+    assert outbox.claim_due(app, limit=10) == []
+
+
+def test_connection_failure_reschedules_every_claimed_row(app, mail, smtp_server, queue_email):
+    ids = [queue_email(index) for index in range(3)]
+    smtp_server.shutdown()
+    smtp_server.server_close()
+
+    assert outbox.send_pending(app, mail) == (0, 3)
+
+    for row_id in ids:
+        row = db.session.get(EmailOutbox, row_id)
+        assert row.status == 'pending'
+        assert row.attempts == 1
+        assert row.next_attempt_at > datetime.utcnow()
+
+
+def test_digest_folds_new_submissions_into_one_email(app, mail, smtp_server, queue_email):
+    app.config['MAIL_OUTBOX_DIGEST'] = True
+    try:
+        for index in range(3):
+            queue_email(index)
+
+        assert outbox.send_pending(app, mail) == (3, 0)
+    finally:
+        app.config['MAIL_OUTBOX_DIGEST'] = False
+
+    assert len(smtp_server.messages) == 1
+    assert '3 New WhatsFlow Client Submissions' in smtp_server.messages[0]
+    assert EmailOutbox.query.filter_by(status='sent').count() == 3
@@ -0,0 +1,61 @@
+"""Public pages are cached per worker and answer conditional GETs with 304."""
+from flask import flash
+
+from cache import cached_page
+
+
+def counting_view(**options):
+    calls = []
+
+    def view():
+        calls.append(1)
+        return f'page {len(calls)}'
+    return cached_page('index.html', 'base.html', **options)(view), calls
+
+
+def test_page_carries_validators_and_revalidates_with_304(client):
+    first = client.get('/')
+    assert first.status_code == 200
+    assert first.headers['ETag'] and first.headers['Last-Modified']
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    by_etag = client.get('/', headers={'If-None-Match': first.headers['ETag']})
+    by_date = client.get('/', headers={'If-Modified-Since': first.headers['Last-Modified']})
+
+    assert by_etag.status_code == 304 and by_etag.data == b''
+    assert by_date.status_code == 304
+    assert client.get('/', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_key_ignores_query_args_the_view_does_not_read(app):
+    view, calls = counting_view(query_args=('page',))
+
+    for url in ('/', '/?utm_source=mail', '/?x=1&utm_source=ads', '/?page=2', '/?page=2&x=1'):
+        with app.test_request_context(url):
+            view()
+
+    # One render for the bare path and one for page=2
+    assert len(calls) == 2
+
+
+def test_flashed_messages_bypass_the_cache(app):
+    view, calls = counting_view()
+
+    with app.test_request_context('/'):
+        view()
+        flash('Saved')
+        view()
+        view()
+
+    assert len(calls) == 3
+
+
+def test_disabled_cache_renders_every_time(app):
+    app.config['PAGE_CACHE_ENABLED'] = False
+    view, calls = counting_view()
+
+    for _ in range(2):
+        with app.test_request_context('/'):
+            view()
+
+    assert len(calls) == 2
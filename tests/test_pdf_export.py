@@ -0,0 +1,67 @@
+"""The PDF export keeps every value whole, wrapping long ones onto extra lines."""
+import re
+from datetime import datetime
+
+import pytest
+
+from exports import build_pdf, wrap_text
+
+pytest.importorskip('reportlab')
+
+LONG_BUSINESS = 'Sunrise Golden Prime Urban Royal Electronics and Home Appliances Wholesale Limited'
+LONG_EMAIL = 'procurement.department.head.office@sunrise-golden-prime-wholesale.example.com'
+
+
+@pytest.fixture(autouse=True)
+def uncompressed_pages(monkeypatch):
+    from reportlab import rl_config
+
+    monkeypatch.setattr(rl_config, 'pageCompression', 0)
+
+
+def pdf_pages(path):
+    """The text drawn on each page, one string per page."""
+    with open(path, 'rb') as f:
+        raw = f.read().decode('latin-1')
+    streams = re.findall(r'stream\r?\n(.*?)endstream', raw, re.S)
+    return [' '.join(re.findall(r'\((.*?)\) Tj', stream)) for stream in streams if ' Tj' in stream]
+
+
+def test_wrap_text_fits_every_line_and_keeps_every_character():
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    lines = wrap_text(LONG_EMAIL, 60, 'Helvetica', 8)
+
+    assert len(lines) > 1
+    assert ''.join(lines) == LONG_EMAIL
+    assert all(stringWidth(line, 'Helvetica', 8) <= 60 for line in lines)
+    assert wrap_text('Pro', 60, 'Helvetica', 8) == ['Pro']
+
+
+def test_long_values_are_wrapped_not_cut(tmp_path, submission_factory):
+    rows = [submission_factory(index, created_at=datetime(2024, 3, 1)) for index in range(3)]
+    rows[1].business_name = LONG_BUSINESS
+    rows[1].email = LONG_EMAIL
+    path = tmp_path / 'leads.pdf'
+
+    build_pdf(str(path), [rows])
+
+    text, = pdf_pages(path)
+    assert '...' not in text
+    # A cell's lines are drawn one after another, and words only split at spaces
+    assert LONG_BUSINESS in text
+    assert LONG_EMAIL in text.replace(' ', '')
+
+
+def test_taller_rows_push_later_rows_onto_the_next_page(tmp_path, submission_factory):
+    rows = [submission_factory(index, created_at=datetime(2024, 3, 1)) for index in range(35)]
+    path = tmp_path / 'leads.pdf'
+
+    build_pdf(str(path), [rows])
+    assert len(pdf_pages(path)) == 1
+
+    rows[0].business_name = LONG_BUSINESS
+    build_pdf(str(path), [rows])
+    pages = pdf_pages(path)
+    assert len(pages) == 2
+    assert 'Lead 34' in pages[1]
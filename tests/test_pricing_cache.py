@@ -0,0 +1,77 @@
+"""The per-worker pricing catalog serves plans from memory and notices updates."""
+import json
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from cache import PricingCatalog, pricing_catalog
+from models import db, PricingPlan
+
+
+@pytest.fixture
+def plans(app):
+    db.session.add_all([
+        PricingPlan(plan_name='Starter', base_price=10, current_price=10, features=json.dumps(['Auto-replies'])),
+        PricingPlan(plan_name='Pro', base_price=20, current_price=20, features=json.dumps(['Broadcasts', 'Catalog'])),
+    ])
+    db.session.commit()
+    pricing_catalog.invalidate()
+
+
+@contextmanager
+def count_queries():
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+
+def test_plans_are_parsed_once_and_served_from_memory(app, plans):
+    catalog = PricingCatalog()
+    first = catalog.plans()
+
+    with count_queries() as statements:
+        again = catalog.plans()
+
+    assert statements == []
+    assert again is first
+    assert [plan.features_list for plan in first] == [['Auto-replies'], ['Broadcasts', 'Catalog']]
+
+
+def test_expired_ttl_costs_one_version_query_when_nothing_changed(app, plans):
+    app.config['PRICING_CACHE_TTL'] = 0
+    catalog = PricingCatalog()
+    first = catalog.plans()
+
+    with count_queries() as statements:
+        assert catalog.plans() is first
+
+    assert len(statements) == 1
+
+
+def test_update_made_elsewhere_is_seen_after_the_ttl(app, plans):
+    app.config['PRICING_CACHE_TTL'] = 3600
+    catalog = PricingCatalog()
+    catalog.plans()
+    plan = PricingPlan.query.filter_by(plan_name='Pro').one()
+    plan.apply_discount(50)
+    db.session.commit()
+
+    assert catalog.plans()[1].current_price == 20
+    catalog.invalidate()
+    assert catalog.plans()[1].current_price == 10
+
+
+def test_admin_update_shows_on_the_pricing_page_at_once(app, client, plans):
+    app.config['PRICING_CACHE_TTL'] = 3600
+    assert '$20<span>/month' in client.get('/pricing').get_data(as_text=True)
+    plan_id = PricingPlan.query.filter_by(plan_name='Pro').one().id
+
+    client.post(f'/admin/pricing/update/{plan_id}', data={'base_price': '20', 'discount_percent': '25'})
+
+    assert [plan.current_price for plan in pricing_catalog.plans()] == [10, 15]
+    assert '$15<span>/month' in client.get('/pricing').get_data(as_text=True)
@@ -0,0 +1,105 @@
+"""Token buckets shared through SQLite, and the concurrency cap that sheds load with 503."""
+import itertools
+import sqlite3
+import threading
+
+import pytest
+
+from models import Submission
+import groupcommit
+import ratelimit
+
+# Buckets outlive a test in the shared store, so each test posts from its own address
+addresses = (f'10.0.0.{index}' for index in itertools.count(1))
+
+
+def client_from_new_address(app):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = next(addresses)
+    return client
+
+
+@pytest.fixture
+def limited(app):
+    app.config.update(RATELIMIT_ENABLED=True, RATELIMIT_CONTACT='2/minute', RATELIMIT_LOGIN='1/hour')
+    return client_from_new_address(app)
+
+
+def test_parse_rate():
+    assert ratelimit.parse_rate('5/minute') == (5, 5 / 60)
+    assert ratelimit.parse_rate(' 2 / second ') == (2, 2)
+    with pytest.raises(ValueError):
+        ratelimit.parse_rate('5 per minute')
+
+
+def test_empty_bucket_answers_429_with_retry_after(app, limited, contact_form):
+    assert [limited.post('/contact', data=contact_form(index)).status_code for index in range(2)] == [302, 302]
+
+    refused = limited.post('/contact', data=contact_form(2))
+
+    assert refused.status_code == 429
+    assert 1 <= int(refused.headers['Retry-After']) <= 30
+    assert Submission.query.count() == 2
+    # Only POSTs spend tokens, and every client has its own bucket
+    assert limited.get('/contact').status_code == 200
+    other = client_from_new_address(app)
+    assert other.post('/contact', data=contact_form(3)).status_code == 302
+
+
+def test_routes_have_separate_buckets(limited, contact_form):
+    login = {'email': 'nobody@example.com', 'password': 'wrong'}
+    assert limited.post('/admin/login', data=login).status_code == 200
+    assert limited.post('/admin/login', data=login).status_code == 429
+    assert limited.post('/contact', data=contact_form(1)).status_code == 302
+
+
+def test_tokens_refill_over_time(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ratelimit.db')
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, 'time', lambda: now[0])
+
+    assert ratelimit.take_token(path, 'k', 1, 0.5) == 0
+    assert ratelimit.take_token(path, 'k', 1, 0.5) == pytest.approx(2)
+    now[0] += 2
+    assert ratelimit.take_token(path, 'k', 1, 0.5) == 0
+
+
+def test_store_failure_lets_requests_through(limited, contact_form, monkeypatch):
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(ratelimit, 'take_token', locked)
+
+    assert limited.post('/contact', data=contact_form(1)).status_code == 302
+
+
+@pytest.mark.skipif(ratelimit.fcntl is None, reason='slots need flock()')
+def test_requests_beyond_the_slots_are_shed_with_503(app, limited, contact_form, tmp_path, monkeypatch):
+    app.config.update(RATELIMIT_CONTACT='100/minute', LOAD_SHED_MAX_CONCURRENT=1, LOAD_SHED_SLOT_DIR=str(tmp_path))
+    entered, release = threading.Event(), threading.Event()
+    save_submission = groupcommit.save_submission
+
+    def slow_save(*args, **kwargs):
+        entered.set()
+        release.wait(5)
+        return save_submission(*args, **kwargs)
+    monkeypatch.setattr(groupcommit, 'save_submission', slow_save)
+
+    responses = []
+
+    def first():
+        with app.app_context():
+            responses.append(limited.post('/contact', data=contact_form(1)).status_code)
+    thread = threading.Thread(target=first)
+    thread.start()
+    try:
+        assert entered.wait(5)
+        shed = limited.post('/contact', data=contact_form(2))
+    finally:
+        release.set()
+        thread.join()
+
+    assert shed.status_code == 503
+    assert shed.headers['Retry-After'] == '1'
+    assert responses == [302]
+    # The slot is free again once the first request is done
+    assert limited.post('/contact', data=contact_form(3)).status_code == 302
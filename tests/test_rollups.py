@@ -0,0 +1,116 @@
+"""Daily rollups stay equal to a GROUP BY over the submissions they summarise."""
+import csv
+import io
+from datetime import date, datetime
+
+from models import db, Submission, SubmissionRollup
+import importer
+import rollups
+
+HEADER = ['Date', 'Name', 'Business', 'Email', 'WhatsApp', 'Country', 'Plan', 'Status']
+
+
+def lead_csv(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(HEADER)
+    for index, (day, country, plan, status) in enumerate(rows):
+        writer.writerow([f'{day} 10:{index % 60:02}', f'Lead {index}', 'Biz', f'lead{index}@example.com',
+                         f'+1555{index:07}', country, plan, status])
+    return io.BytesIO(out.getvalue().encode())
+
+
+def assert_rollups_match():
+    db.session.expire_all()
+    assert rollups.check_rollups() == {}
+
+
+def stored_rollups():
+    return {(row.day, row.country, row.plan_selected, row.status): row.count
+            for row in SubmissionRollup.query}
+
+
+def test_multi_day_import_upserts_every_bucket(app):
+    rows = ([('2024-03-01', 'Kenya', 'Pro', 'pending')] * 3 + [('2024-03-01', 'Ghana', 'Pro', 'converted')] * 2
+            + [('2024-03-02', 'Kenya', 'Starter', 'contacted')] * 4 + [('2024-03-03', 'Kenya', 'Pro', 'pending')])
+
+    # Small batches, so later batches land on buckets the earlier ones created
+    report = importer.import_file(lead_csv(rows), 'leads.csv', batch_size=2)
+
+    assert report.inserted == 10
+    assert stored_rollups() == {
+        (date(2024, 3, 1), 'Kenya', 'Pro', 'pending'): 3,
+        (date(2024, 3, 1), 'Ghana', 'Pro', 'converted'): 2,
+        (date(2024, 3, 2), 'Kenya', 'Starter', 'contacted'): 4,
+        (date(2024, 3, 3), 'Kenya', 'Pro', 'pending'): 1,
+    }
+    assert rollups.check_rollups() == {}
+
+
+def test_adjust_rollups_adds_to_existing_buckets_and_skips_zero_deltas(app):
+    first, second = (date(2024, 3, 1), 'Kenya', 'Pro', 'pending'), (date(2024, 3, 1), 'Kenya', 'Pro', 'converted')
+    rollups.adjust_rollups({first: 5})
+    rollups.adjust_rollups({first: -2, second: 2, (date(2024, 3, 2), 'Kenya', 'Pro', 'pending'): 0})
+    db.session.commit()
+
+    assert stored_rollups() == {first: 3, second: 2}
+
+
+def test_rollups_follow_every_write_path(app, client, contact_form):
+    app.config['DEDUPE_MODE'] = 'merge'
+    for index in range(4):
+        client.post('/contact', data=contact_form(index, country='Kenya' if index % 2 else 'Ghana'))
+    # A merged repeat that changes the plan moves the original to another bucket
+    client.post('/contact', data=contact_form(1, country='Kenya', plan_selected='Business'))
+    assert Submission.query.count() == 4
+    assert_rollups_match()
+
+    first, second = [row.id for row in Submission.query.order_by(Submission.id).limit(2)]
+    client.post(f'/admin/submission/{first}/update-status', data={'status': 'contacted'})
+    assert_rollups_match()
+
+    client.post('/admin/api/submissions/status', json={'ids': [first, second], 'status': 'converted'})
+    client.post('/admin/api/submissions/status', json={'filter': {'country': 'Ghana'}, 'status': 'contacted'})
+    assert_rollups_match()
+
+    client.post('/admin/import', data={'file': (lead_csv([('2024-03-01', 'Kenya', 'Pro', 'converted')] * 2),
+                                                'leads.csv')})
+    assert_rollups_match()
+
+    today = datetime.utcnow().date()
+    # Emptied buckets stay behind with a zero count
+    assert {key: count for key, count in stored_rollups().items() if count} == {
+        (today, 'Ghana', 'Pro', 'contacted'): 2,
+        (today, 'Kenya', 'Business', 'converted'): 1,
+        (today, 'Kenya', 'Pro', 'pending'): 1,
+        (date(2024, 3, 1), 'Kenya', 'Pro', 'converted'): 2,
+    }
+
+
+def test_analytics_reads_the_rollups(client, submission_factory):
+    db.session.add_all([submission_factory(index, status=status, country=country)
+                        for index, (status, country) in enumerate([('converted', 'Kenya'), ('pending', 'Kenya'),
+                                                                   ('pending', 'Ghana')])])
+    db.session.commit()
+    rollups.rebuild_rollups()
+
+    analytics = client.get('/admin/api/analytics', query_string={'days': 7}).get_json()
+
+    assert len(analytics['daily']) == 7
+    assert analytics['daily'][-1] == {'day': datetime.utcnow().date().isoformat(), 'pending': 2, 'contacted': 0,
+                                      'converted': 1, 'total': 3}
+    assert [(row['name'], row['total'], row['conversion_rate']) for row in analytics['countries']] == \
+        [('Kenya', 2, 0.5), ('Ghana', 1, 0)]
+
+
+def test_check_rollups_command_reports_and_rebuilds(app, submission_factory):
+    db.session.add(submission_factory(1))
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['check-rollups'])
+    assert result.exit_code == 1
+    assert 'Kenya / Pro / pending: rollup says 0, table has 1' in result.output
+
+    assert 'Rebuilt' in runner.invoke(args=['check-rollups', '--rebuild']).output
+    assert 'consistent' in runner.invoke(args=['check-rollups']).output
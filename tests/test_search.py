@@ -0,0 +1,53 @@
+"""Full-text search over submissions, its rank window and the bulk form on its results."""
+import pytest
+
+from models import db
+
+
+@pytest.fixture
+def leads(app, submission_factory):
+    rows = [submission_factory(index, message=f'need payments bot {index}', country='Kenya') for index in range(5)]
+    rows.append(submission_factory(5, message='booking reminders', country='Kenya'))
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def search(client, **params):
+    return client.get('/admin/submissions/search', query_string=params, headers={'Accept': 'application/json'})
+
+
+def test_search_matches_message_text(client, leads):
+    data = search(client, q='booking').get_json()
+
+    assert [row['full_name'] for row in data['results']] == ['Lead 5']
+    assert data['truncated'] is False
+
+
+def test_search_reports_when_the_rank_window_cuts_matches(app, client, leads):
+    app.config['SEARCH_RANK_WINDOW'] = 3
+
+    data = search(client, q='payments').get_json()
+
+    assert data['truncated'] is True
+    assert data['rank_window'] == 3
+    assert len(data['results']) == 3
+    assert 'only the newest' in client.get('/admin/submissions/search?q=payments').get_data(as_text=True)
+
+
+def test_search_with_a_filter_ranks_every_match(app, client, leads):
+    app.config['SEARCH_RANK_WINDOW'] = 3
+
+    data = search(client, q='payments', country='Kenya').get_json()
+
+    assert data['truncated'] is False
+    assert len(data['results']) == 5
+
+
+def test_bulk_update_by_filter_is_not_offered_on_search_results(client, leads):
+    filtered = client.get('/admin/submissions?country=Kenya').get_data(as_text=True)
+    searched = client.get('/admin/submissions/search?q=booking&country=Kenya').get_data(as_text=True)
+
+    assert 'Apply to all matching' in filtered
+    assert 'Apply to all matching' not in searched
+    assert 'Apply to selected' in searched
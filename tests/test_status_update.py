@@ -0,0 +1,67 @@
+"""Single submission status updates keep the dashboard counters and rollups exact."""
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from models import db, Submission
+import rollups
+import stats
+
+
+@pytest.fixture
+def submission_id(app, submission_factory):
+    submission = submission_factory(1)
+    db.session.add(submission)
+    db.session.commit()
+    stats.rebuild_counters()
+    rollups.rebuild_rollups()
+    return submission.id
+
+
+def current_status(submission_id):
+    db.session.expire_all()
+    return db.session.get(Submission, submission_id).status
+
+
+def test_update_moves_counters_and_rollups(client, submission_id):
+    client.post(f'/admin/submission/{submission_id}/update-status', data={'status': 'contacted'})
+
+    assert current_status(submission_id) == 'contacted'
+    assert stats.status_counts() == {'contacted': 1}
+    assert stats.check_counters() == {}
+    assert rollups.check_rollups() == {}
+
+
+def test_unknown_status_is_rejected(client, submission_id):
+    response = client.post(f'/admin/submission/{submission_id}/update-status', data={'status': 'archived'},
+                           follow_redirects=True)
+
+    assert "Unknown status" in response.get_data(as_text=True)
+    assert current_status(submission_id) == 'pending'
+
+
+def test_status_is_read_after_taking_the_write_lock(app, client, submission_id):
+    other = app.test_client()
+    other.post('/admin/login', data={'email': 'admin@example.com', 'password': 'password1'})
+    raced = []
+
+    def race(submission, context):
+        # Another request changes the row right after this one first loads it
+        if not raced:
+            raced.append(True)
+            thread = threading.Thread(target=other.post, args=(f'/admin/submission/{submission_id}/update-status',),
+                                      kwargs={'data': {'status': 'converted'}})
+            thread.start()
+            thread.join()
+
+    event.listen(Submission, 'load', race)
+    try:
+        client.post(f'/admin/submission/{submission_id}/update-status', data={'status': 'contacted'})
+    finally:
+        event.remove(Submission, 'load', race)
+
+    assert raced
+    assert current_status(submission_id) == 'contacted'
+    assert stats.check_counters() == {}
+    assert rollups.check_rollups() == {}
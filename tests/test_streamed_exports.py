@@ -0,0 +1,54 @@
+"""CSV, NDJSON and JSON exports are streamed straight from keyset batches."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db
+
+
+@pytest.fixture
+def leads(app, submission_factory):
+    app.config['EXPORT_BATCH_SIZE'] = 4
+    start = datetime(2024, 3, 1)
+    db.session.add_all([submission_factory(index, country='Kenya' if index % 2 else 'Ghana',
+                                           message='says "hi", then\nleaves', created_at=start + timedelta(hours=index))
+                        for index in range(10)])
+    db.session.commit()
+
+
+def test_csv_is_streamed_newest_first(client, leads):
+    response = client.get('/admin/export/csv')
+
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename=submissions.csv'
+    chunks = list(response.response)
+    # The header plus one chunk per batch of 4 rows
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(''.join(chunk.decode() if isinstance(chunk, bytes) else chunk
+                                               for chunk in chunks))))
+    assert rows[0][:3] == ['Date', 'Name', 'Business']
+    assert [row[1] for row in rows[1:]] == [f'Lead {index}' for index in reversed(range(10))]
+    assert rows[1][7] == 'says "hi", then\nleaves'
+
+
+def test_ndjson_applies_filters(client, leads):
+    response = client.get('/admin/export/ndjson?country=Kenya')
+
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['name'] for row in rows] == ['Lead 9', 'Lead 7', 'Lead 5', 'Lead 3', 'Lead 1']
+
+
+def test_json_is_one_valid_document(client, leads):
+    rows = json.loads(client.get('/admin/export/json').get_data(as_text=True))
+
+    assert len(rows) == 10
+    assert rows[0]['date'] == '2024-03-01 09:00'
+
+
+def test_empty_export_still_has_a_header(client, app):
+    assert client.get('/admin/export/csv').get_data(as_text=True).startswith('Date,Name,Business')
+    assert json.loads(client.get('/admin/export/json').get_data(as_text=True)) == []
@@ -0,0 +1,75 @@
+"""The shared Jinja bytecode cache and the {% cache %} fragment tag."""
+import pytest
+from jinja2 import DictLoader, Environment
+
+from cache import FragmentCache
+from templating import FragmentCacheExtension, SharedBytecodeCache
+
+
+def environment(sources, cache_dir):
+    return Environment(loader=DictLoader(sources), bytecode_cache=SharedBytecodeCache(str(cache_dir)))
+
+
+def test_bytecode_is_shared_and_recompiled_after_edits(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'jinja'
+    sources = {'page.html': 'Hello {{ name }}'}
+
+    assert environment(sources, cache_dir).get_template('page.html').render(name='Ann') == 'Hello Ann'
+    # The directory appears with the first compiled template
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Another worker loads the compiled template instead of compiling it
+    other = environment(sources, cache_dir)
+    monkeypatch.setattr(other, 'compile', lambda *args, **kwargs: pytest.fail('compiled again'))
+    assert other.get_template('page.html').render(name='Bo') == 'Hello Bo'
+
+    edited = environment({'page.html': 'Bye {{ name }}'}, cache_dir)
+    assert edited.get_template('page.html').render(name='Cy') == 'Bye Cy'
+
+
+@pytest.fixture
+def fragments():
+    env = Environment(extensions=[FragmentCacheExtension])
+    env.fragment_cache = FragmentCache(2)
+    return env
+
+
+def counting(env, source):
+    calls = []
+    template = env.from_string(source)
+    render = lambda **values: template.render(count=lambda: calls.append(1) or len(calls), **values)
+    return render, calls
+
+
+def test_block_renders_once_per_version(app, fragments):
+    render, calls = counting(fragments, "{% cache 'cards', version %}<b>{{ count() }}</b>{% endcache %}")
+
+    with app.test_request_context():
+        assert [render(version=1), render(version=1), render(version=2), render(version=1)] == \
+            ['<b>1</b>', '<b>1</b>', '<b>2</b>', '<b>1</b>']
+    assert len(calls) == 2
+
+
+def test_least_recently_used_fragments_are_dropped(app, fragments):
+    render, calls = counting(fragments, "{% cache 'cards', version %}{{ count() }}{% endcache %}")
+
+    with app.test_request_context():
+        for version in (1, 2, 1, 3, 1, 2):
+            render(version=version)
+
+    # Version 2 was the oldest entry when 3 came in, so it rendered twice
+    assert len(calls) == 4
+
+
+def test_debug_mode_always_renders(app, fragments):
+    render, calls = counting(fragments, "{% cache 'cards', 1 %}{{ count() }}{% endcache %}")
+    app.debug = True
+    try:
+        with app.test_request_context():
+            render()
+            render()
+    finally:
+        app.debug = False
+
+    assert len(calls) == 2
+
@@ -0,0 +1,82 @@
+"""Logged-in users come from each worker's cache, and credential changes end the other sessions."""
+import os
+
+import pytest
+from sqlalchemy import event
+
+from cache import UserCache
+from models import db, User
+
+
+def login(app, email='admin@example.com', password='password1'):
+    client = app.test_client()
+    client.post('/admin/login', data={'email': email, 'password': password})
+    return client
+
+
+def signed_in(client):
+    return client.get('/admin/settings').status_code == 200
+
+
+@pytest.fixture
+def admin(client):
+    return User.query.filter_by(email='admin@example.com').one()
+
+
+def test_cached_user_costs_no_query(app, admin):
+    cache = UserCache()
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+
+    assert cache.get(admin.id, admin.credential_version).email == 'admin@example.com'
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        assert cache.get(admin.id, admin.credential_version).email == 'admin@example.com'
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert statements == []
+    # A session issued for an older credential version gets no user
+    assert cache.get(admin.id, admin.credential_version - 1) is None
+    assert cache.get(admin.id + 1, 0) is None
+
+
+def test_password_change_ends_every_session(app, client, admin):
+    other = login(app)
+    assert signed_in(other)
+
+    client.post('/admin/settings/change-password', data={
+        'current_password': 'password1', 'new_password': 'password2', 'confirm_password': 'password2'})
+
+    assert not signed_in(client)
+    assert not signed_in(other)
+    assert signed_in(login(app, password='password2'))
+
+
+def test_email_change_ends_every_session(app, client, admin):
+    other = login(app)
+
+    client.post('/admin/settings/change-email', data={'current_password': 'password1',
+                                                     'new_email': 'owner@example.com'})
+
+    assert not signed_in(other)
+    assert signed_in(login(app, email='owner@example.com'))
+
+
+@pytest.mark.parametrize('url, data', [
+    ('/admin/settings/change-email', {'current_password': 'password1', 'new_email': 'admin@example.com'}),
+    ('/admin/settings/change-password', {'current_password': 'password1', 'new_password': 'password1',
+                                         'confirm_password': 'password1'}),
+])
+def test_unchanged_credentials_keep_the_sessions_and_the_stamp(app, client, admin, url, data):
+    other = login(app)
+    UserCache().invalidate()
+    # Backdate the stamp, so a rewrite shows even within the filesystem's timestamp granularity
+    os.utime(app.config['USER_CACHE_STAMP_FILE'], ns=(0, 0))
+
+    response = client.post(url, data=data, follow_redirects=True)
+
+    assert b'already your email' in response.data or b'must be different' in response.data
+    assert os.stat(app.config['USER_CACHE_STAMP_FILE']).st_mtime_ns == 0
+    assert db.session.get(User, admin.id).credential_version == admin.credential_version
+    assert signed_in(client) and signed_in(other)